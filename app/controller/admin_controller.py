@@ -0,0 +1,19 @@
+import json
+
+from app.dao.perfil_consultas import obter_perfil
+from app.view import api_livros
+
+
+def relatorio_consultas(limpar=False):
+    """Relatório do perfil de consultas em JSON, como `(json, status)`.
+
+    Responde 404 quando o modo de perfil está desligado, para não expor a
+    rota em produção. `limpar=True` zera os dados depois de gerar o relatório.
+    """
+    perfil = obter_perfil()
+    if perfil is None:
+        return api_livros.exibe_erro("Perfil de consultas desligado (PERFIL_CONSULTAS=1)"), 404
+    relatorio = perfil.relatorio()
+    if limpar:
+        perfil.limpar()
+    return json.dumps(relatorio, ensure_ascii=False, indent=2), 200
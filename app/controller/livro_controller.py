@@ -2,16 +2,258 @@
 # Marco Tulio Valente. Engenharia de Software Moderna: Princípios e Práticas para Desenvolvimento de Software com Produtividade, Editora: Independente, 2020.
 # UnB-FGA-EPS-MDS
 
-from app.dao.db_connection import conectar
+import asyncio
+import logging
+import os
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+import psycopg2
+
+from app.dao.cache_livros import normalizar_autor, obter_cache_ausentes, obter_cache_autores
+from app.dao.coalescencia import Coalescedor
+from app.dao.db_connection import obter_roteador
+from app.dao.indice_livros import LivroDAOMemoria, obter_indice
 from app.dao.livro_dao import LivroDAO
+from app.dao.sugestoes_livros import obter_sugestoes
+from app.metricas import medir_etapa, obter_metricas
+from app.view import api_livros
+from app.view.exportacao_livros import FORMATOS
 from app.view.pagina_dados_livro import PaginaDadosLivro
 
+# Quantidade de livros por página em /pesquisa
+TAMANHO_PAGINA = int(os.getenv("PAGINA_TAMANHO", "20"))
+# Máximo de autores + ISBNs por requisição em /api/livros
+API_MAX_CHAVES = int(os.getenv("API_MAX_CHAVES", "100"))
+# Teto do parâmetro `limite` (livros por autor) em /api/livros
+API_MAX_LIMITE = 100
+# Sugestões de autores/títulos por prefixo em /api/autocomplete (padrão e teto)
+AUTOCOMPLETE_LIMITE = int(os.getenv("AUTOCOMPLETE_LIMITE", "8"))
+AUTOCOMPLETE_MAX_LIMITE = 20
+# Linhas buscadas por ida ao banco no cursor server-side de /exportar
+LOTE_EXPORTACAO = int(os.getenv("EXPORTACAO_LOTE", "2000"))
+
+# Buscas iguais e simultâneas (mesma chave do cache) dividem uma ida ao banco
+_buscas_em_voo = Coalescedor("pesquisa")
+
+
+@contextmanager
+def _dao_leitura():
+    """DAO de leitura: o índice em memória (`BUSCA_BACKEND=memoria`) ou o Postgres.
+
+    No Postgres, a conexão de leitura (réplica, se houver) é emprestada do
+    pool e devolvida ao fim do bloco, mesmo quando o DAO lança exceção.
+    """
+    indice = obter_indice()
+    if indice is not None:
+        yield LivroDAOMemoria(indice)
+        return
+    with obter_roteador().leitura() as conexao:
+        yield LivroDAO(conexao)
+
+
+def _dao_async():
+    # Para o servidor assíncrono: o LivroDAO empresta a conexão na thread do executor
+    indice = obter_indice()
+    if indice is not None:
+        return LivroDAOMemoria(indice)
+    return LivroDAO(pool=obter_roteador())
+
+
+def listar_livro(autor, apos_titulo=None, apos_isbn=None, limite=None):
+    limite = limite or TAMANHO_PAGINA
+    # Autores populares são servidos do cache sem tocar no banco
+    cache = obter_cache_autores()
+    chave = (normalizar_autor(autor), apos_titulo, apos_isbn, limite)
+    pagina = cache.obter(chave)
+    if pagina is None:
+        if apos_titulo is None and _sabidamente_ausente(chave[0]):
+            return _pagina_do_resultado(autor, None)
+        pagina = _buscas_em_voo.executar(
+            chave, lambda: _pesquisar_paginado(cache, chave, autor, limite, apos_titulo, apos_isbn)
+        )
+    return _pagina_do_resultado(autor, pagina)
+
+
+def _pesquisar_paginado(cache, chave, autor, limite, apos_titulo, apos_isbn):
+    with _dao_leitura() as dao:
+        pagina = dao.pesquisar_por_autor_paginado(autor, limite, apos_titulo, apos_isbn)
+    _guardar_no_cache(cache, chave, pagina)
+    return pagina
+
+
+def exibir_livro(isbn):
+    # Busca pela chave primária (consulta preparada na conexão do pool)
+    with _dao_leitura() as dao:
+        livro = dao.buscar_por_isbn(isbn)
+    return _pagina_do_livro(livro)
+
+
+async def exibir_livro_async(isbn):
+    dao = _dao_async()
+    livro = await dao.em_thread(dao.buscar_por_isbn, isbn)
+    return _pagina_do_livro(livro)
+
+
+async def listar_livro_async(autor, apos_titulo=None, apos_isbn=None, limite=None):
+    # Versão para o servidor assíncrono: a consulta roda fora do event loop
+    limite = limite or TAMANHO_PAGINA
+    cache = obter_cache_autores()
+    chave = (normalizar_autor(autor), apos_titulo, apos_isbn, limite)
+    pagina = cache.obter(chave)
+    if pagina is None:
+        if apos_titulo is None and _sabidamente_ausente(chave[0]):
+            return _pagina_do_resultado(autor, None)
+        pagina = await _buscas_em_voo.executar_async(
+            chave, lambda: _pesquisar_paginado_async(cache, chave, autor, limite, apos_titulo, apos_isbn)
+        )
+    return _pagina_do_resultado(autor, pagina)
+
+
+async def _pesquisar_paginado_async(cache, chave, autor, limite, apos_titulo, apos_isbn):
+    dao = _dao_async()
+    pagina = await dao.em_thread(
+        dao.pesquisar_por_autor_paginado, autor, limite, apos_titulo, apos_isbn
+    )
+    _guardar_no_cache(cache, chave, pagina)
+    return pagina
+
+
+def buscar_livros_api(autores=(), isbns=(), limite=None):
+    """Busca vários autores e ISBNs de uma vez e devolve `(json, status)`."""
+    try:
+        autores, isbns, limite = _validar_lote(autores, isbns, limite)
+    except ValueError as e:
+        return api_livros.exibe_erro(str(e)), 400
+    try:
+        with _dao_leitura() as dao:
+            resultado = dao.pesquisar_em_lote(autores, isbns, limite)
+    except psycopg2.Error:
+        logging.exception("Erro no banco de dados ao buscar livros em lote.")
+        return api_livros.exibe_erro("Banco de dados indisponível"), 503
+    with medir_etapa("renderizacao"):
+        return api_livros.exibe_lote(resultado), 200
+
+
+async def buscar_livros_api_async(autores=(), isbns=(), limite=None):
+    # Versão para o servidor assíncrono: a consulta roda fora do event loop
+    try:
+        autores, isbns, limite = _validar_lote(autores, isbns, limite)
+    except ValueError as e:
+        return api_livros.exibe_erro(str(e)), 400
+    dao = _dao_async()
+    try:
+        resultado = await dao.em_thread(dao.pesquisar_em_lote, autores, isbns, limite)
+    except psycopg2.Error:
+        logging.exception("Erro no banco de dados ao buscar livros em lote.")
+        return api_livros.exibe_erro("Banco de dados indisponível"), 503
+    with medir_etapa("renderizacao"):
+        return api_livros.exibe_lote(resultado), 200
+
+
+def autocompletar(prefixo, limite=None):
+    """Autores e títulos que começam com `prefixo`, como `(json, status)`.
+
+    Atendido pelo índice de prefixos em memória (`obter_sugestoes`), com
+    cache por prefixo; só a primeira chamada do processo lê o catálogo.
+    """
+    prefixo = (prefixo or "").strip()
+    try:
+        limite = int(limite) if limite not in (None, "") else AUTOCOMPLETE_LIMITE
+    except (TypeError, ValueError):
+        return api_livros.exibe_erro("limite deve ser um número inteiro"), 400
+    if not 1 <= limite <= AUTOCOMPLETE_MAX_LIMITE:
+        return api_livros.exibe_erro(f"limite deve estar entre 1 e {AUTOCOMPLETE_MAX_LIMITE}"), 400
+    try:
+        sugestoes = obter_sugestoes().sugerir(prefixo, limite)
+    except psycopg2.Error:
+        logging.exception("Erro no banco de dados ao carregar as sugestões.")
+        return api_livros.exibe_erro("Banco de dados indisponível"), 503
+    with medir_etapa("renderizacao"):
+        return api_livros.exibe_sugestoes(prefixo, sugestoes), 200
+
+
+async def autocompletar_async(prefixo, limite=None):
+    # A primeira carga do índice lê o banco: roda fora do event loop. Depois,
+    # a busca por prefixo leva microssegundos e roda direto no loop.
+    sugestoes = obter_sugestoes()
+    if not sugestoes.pronto:
+        try:
+            await asyncio.to_thread(sugestoes.indice)
+        except psycopg2.Error:
+            logging.exception("Erro no banco de dados ao carregar as sugestões.")
+            return api_livros.exibe_erro("Banco de dados indisponível"), 503
+    return autocompletar(prefixo, limite)
+
+
+def _validar_lote(autores, isbns, limite):
+    # Remove vazios e espaços nas pontas; as chaves da resposta são as limpas
+    autores = [a.strip() for a in autores if a and a.strip()]
+    isbns = [i.strip() for i in isbns if i and i.strip()]
+    if not autores and not isbns:
+        raise ValueError("Informe ao menos um autor ou isbn")
+    if len(autores) + len(isbns) > API_MAX_CHAVES:
+        raise ValueError(f"No máximo {API_MAX_CHAVES} autores e isbns por requisição")
+    try:
+        limite = int(limite) if limite not in (None, "") else TAMANHO_PAGINA
+    except (TypeError, ValueError):
+        raise ValueError("limite deve ser um número inteiro") from None
+    if not 1 <= limite <= API_MAX_LIMITE:
+        raise ValueError(f"limite deve estar entre 1 e {API_MAX_LIMITE}")
+    return autores, isbns, limite
+
+
+def exportar_livros(autor=None, formato="csv"):
+    """Devolve `(content_type, blocos)` para exportar o catálogo.
+
+    `blocos` é um gerador de bytes: a conexão só é emprestada do pool quando
+    a iteração começa e é devolvida ao fim (ou se o gerador for fechado,
+    ex.: cliente desconectou). Lança `ValueError` para formato desconhecido.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação desconhecido: {formato!r}")
+    content_type, serializar = FORMATOS[formato]
+    return content_type, _blocos_exportacao(autor, serializar)
+
+
+def _blocos_exportacao(autor, serializar):
+    with _dao_leitura() as dao:
+        yield from serializar(dao.iterar_linhas(autor or None, lote=LOTE_EXPORTACAO))
+
+
+def _guardar_no_cache(cache, chave, pagina):
+    # Só resultados encontrados entram no cache: o DAO devolve página vazia
+    # também em erro de banco, e isso não pode ficar em cache até o TTL expirar.
+    if pagina and pagina.livros:
+        cache.guardar(chave, pagina)
+    elif pagina is not None and not pagina.erro and chave[1] is None:
+        # Primeira página vazia sem erro: o autor não tem livros
+        obter_cache_ausentes().guardar(chave[0], True)
+
+
+def _sabidamente_ausente(autor_normalizado):
+    """Se a busca por `autor_normalizado` já voltou vazia (cache de ausentes)."""
+    if not obter_cache_ausentes().obter(autor_normalizado):
+        return False
+    obter_metricas().incrementar("biblioteca_buscas_ausentes_total")
+    return True
+
+
+def _pagina_do_livro(livro):
+    if livro is None:
+        return "Livro não encontrado", 404
+    with medir_etapa("renderizacao"):
+        return PaginaDadosLivro.exibe_livro(livro.titulo, livro.autor, livro.isbn)
+
 
-def listar_livro(autor):
-    conexao = conectar()
-    dao = LivroDAO(conexao)
-    livro_pesquisado = dao.pesquisar_por_autor(autor)
-    conexao.close()
-    if livro_pesquisado:
-        return PaginaDadosLivro.exibe_livro(livro_pesquisado[0].titulo, livro_pesquisado[0].autor, livro_pesquisado[0].isbn)
-    return "Livro não encontrado", 404
\ No newline at end of file
+def _pagina_do_resultado(autor, pagina):
+    if pagina and pagina.livros:
+        proxima_url = None
+        if pagina.proximo:
+            apos_titulo, apos_isbn = pagina.proximo
+            proxima_url = "/pesquisa?" + urlencode(
+                {"autor": autor, "apos_titulo": apos_titulo, "apos_isbn": apos_isbn}
+            )
+        with medir_etapa("renderizacao"):
+            return PaginaDadosLivro.exibe_pagina(pagina.livros, autor, proxima_url)
+    return "Livro não encontrado", 404
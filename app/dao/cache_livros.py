@@ -0,0 +1,179 @@
+"""
+Cache de resultados de busca de livros.
+
+- `CacheLRU`: cache em memória, seguro entre threads, com limite de entradas
+  (despejo LRU), TTL por entrada e contadores de acertos/faltas;
+- `obter_cache_autores()`: instância do processo usada pelo controller para
+  `pesquisar_por_autor`, configurada por `CACHE_AUTORES_MAX`/`CACHE_AUTORES_TTL`;
+- `obter_cache_ausentes()`: cache negativo, separado, dos autores que não
+  retornaram nenhum livro (`CACHE_AUSENTES_MAX`/`CACHE_AUSENTES_TTL`);
+- `ao_alterar_livros()` / `livros_alterados()`: ganchos de invalidação. Todo
+  código que grava em `biblioteca.livros` deve chamar `livros_alterados()`.
+"""
+
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+_AUSENTE = object()
+
+# Letras e pontuação que o NFKD não decompõe, mas o unaccent do Postgres
+# translitera (aspas e travessões tipográficos, comuns em teclados de celular)
+_TRANSLITERACAO = str.maketrans({
+    "ß": "ss", "æ": "ae", "Æ": "AE", "œ": "oe", "Œ": "OE", "ø": "o", "Ø": "O",
+    "đ": "d", "Đ": "D", "ł": "l", "Ł": "L", "ð": "d", "Ð": "D", "þ": "th", "Þ": "TH",
+    "‘": "'", "’": "'", "‚": ",", "‛": "'", "“": '"', "”": '"', "„": '"', "‟": '"',
+    "‐": "-", "‑": "-", "‒": "-", "–": "-", "—": "-", "―": "-", "«": "<<", "»": ">>",
+})
+
+
+def normalizar_texto(texto) -> str:
+    """Sem acentos, em minúsculas e com espaços colapsados.
+
+    Equivale a `biblioteca.normalizar_busca` do banco (unaccent + lower),
+    usada pela coluna `autor_normalizado`.
+    """
+    texto = str(texto or "")
+    if not texto.isascii():
+        decomposto = unicodedata.normalize("NFKD", texto.translate(_TRANSLITERACAO))
+        texto = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(texto.lower().split())
+
+
+def normalizar_autor(autor) -> str:
+    """Chave do cache: "Gonçalves" e " goncalves " são a mesma busca."""
+    return normalizar_texto(autor)
+
+
+class CacheLRU:
+    """Cache chave → valor com limite de entradas, TTL e despejo LRU.
+
+    `max_entradas <= 0` desliga o cache (nada é guardado). `ttl` em segundos;
+    `None` mantém as entradas até serem despejadas ou invalidadas.
+    """
+
+    def __init__(self, max_entradas=1024, ttl=60.0, relogio=time.monotonic):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._relogio = relogio
+        self._dados = OrderedDict()  # chave -> (expira_em, valor)
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.despejos = 0
+
+    def __len__(self):
+        return len(self._dados)
+
+    def obter(self, chave, padrao=None):
+        """Valor em cache para `chave` (marcando-a como recente) ou `padrao`."""
+        with self._lock:
+            item = self._dados.get(chave, _AUSENTE)
+            if item is not _AUSENTE:
+                expira_em, valor = item
+                if expira_em is None or expira_em > self._relogio():
+                    self._dados.move_to_end(chave)
+                    self.acertos += 1
+                    return valor
+                del self._dados[chave]
+            self.faltas += 1
+            return padrao
+
+    def guardar(self, chave, valor) -> None:
+        if self.max_entradas <= 0:
+            return
+        expira_em = None if self.ttl is None else self._relogio() + self.ttl
+        with self._lock:
+            self._dados[chave] = (expira_em, valor)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+                self.despejos += 1
+
+    def invalidar(self, chave=_AUSENTE) -> None:
+        """Remove uma chave ou, sem argumento, esvazia o cache."""
+        with self._lock:
+            if chave is _AUSENTE:
+                self._dados.clear()
+            else:
+                self._dados.pop(chave, None)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "entradas": len(self._dados),
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "despejos": self.despejos,
+            }
+
+
+# ---------------------------------------------------------------------------
+# Ganchos de invalidação
+# ---------------------------------------------------------------------------
+_ouvintes = []
+
+
+def ao_alterar_livros(callback) -> None:
+    """Registra `callback()` para ser chamado quando livros forem gravados."""
+    _ouvintes.append(callback)
+
+
+def livros_alterados() -> None:
+    """Notifica os caches de que o catálogo mudou."""
+    for callback in list(_ouvintes):
+        callback()
+
+
+# ---------------------------------------------------------------------------
+# Cache do processo para buscas por autor
+# ---------------------------------------------------------------------------
+_cache_autores = None
+_cache_lock = threading.Lock()
+
+
+def obter_cache_autores() -> CacheLRU:
+    """Cache do processo para `pesquisar_por_autor`, criado na primeira chamada.
+
+    - `CACHE_AUTORES_MAX`: máximo de autores em cache (padrão 1024; 0 desliga);
+    - `CACHE_AUTORES_TTL`: validade de cada entrada em segundos (padrão 60).
+    """
+    global _cache_autores
+    if _cache_autores is None:
+        with _cache_lock:
+            if _cache_autores is None:
+                cache = CacheLRU(
+                    max_entradas=int(os.getenv("CACHE_AUTORES_MAX", "1024")),
+                    ttl=float(os.getenv("CACHE_AUTORES_TTL", "60")),
+                )
+                ao_alterar_livros(cache.invalidar)
+                _cache_autores = cache
+    return _cache_autores
+
+
+_cache_ausentes = None
+
+
+def obter_cache_ausentes() -> CacheLRU:
+    """Cache negativo do processo: autores normalizados sem nenhum livro.
+
+    Fica separado do cache de autores para que rajadas de buscas sem
+    resultado (robôs, erros de digitação) não despejem as páginas
+    populares, e vice-versa. Esvaziado quando livros são gravados.
+    - `CACHE_AUSENTES_MAX`: máximo de autores (padrão 4096; 0 desliga);
+    - `CACHE_AUSENTES_TTL`: validade em segundos (padrão 300), que limita o
+      atraso para ver livros gravados por outros processos.
+    """
+    global _cache_ausentes
+    if _cache_ausentes is None:
+        with _cache_lock:
+            if _cache_ausentes is None:
+                cache = CacheLRU(
+                    max_entradas=int(os.getenv("CACHE_AUSENTES_MAX", "4096")),
+                    ttl=float(os.getenv("CACHE_AUSENTES_TTL", "300")),
+                )
+                ao_alterar_livros(cache.invalidar)
+                _cache_ausentes = cache
+    return _cache_ausentes
@@ -0,0 +1,89 @@
+"""
+Coalescência de chamadas simultâneas iguais ("single-flight").
+
+Quando o cache de um autor popular expira, várias requisições podem pedir
+a mesma página ao mesmo tempo. `Coalescedor` garante que, por chave, só
+uma chamada esteja em andamento: quem chega enquanto ela roda espera e
+recebe o mesmo resultado (ou a mesma exceção), sem uma nova ida ao banco.
+
+- `executar(chave, funcao)`: para os modos com threads; quem chega depois
+  bloqueia até a primeira chamada terminar;
+- `executar_async(chave, fabrica)`: para o servidor assíncrono; a primeira
+  corrotina vira uma tarefa compartilhada, e cancelar uma requisição (ex.:
+  cliente desconectou) não cancela a chamada das demais.
+
+Cada requisição que aproveita uma chamada já em andamento conta em
+`biblioteca_chamadas_coalescidas_total{operacao}`. A coalescência vale
+dentro de um processo: com `--workers N`, cada worker faz sua chamada.
+"""
+
+import asyncio
+import threading
+
+from app.metricas import obter_metricas
+
+
+class _Voo:
+    __slots__ = ("pronto", "resultado", "erro")
+
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class Coalescedor:
+    """Chamadas em andamento por chave; `operacao` rotula a métrica."""
+
+    def __init__(self, operacao: str):
+        self.operacao = operacao
+        self._em_voo = {}
+        self._tarefas = {}
+        self._lock = threading.Lock()
+
+    def _coalescida(self) -> None:
+        obter_metricas().incrementar("biblioteca_chamadas_coalescidas_total", operacao=self.operacao)
+
+    def executar(self, chave, funcao):
+        """Resultado de `funcao()`, compartilhado com chamadas simultâneas de mesma `chave`."""
+        with self._lock:
+            voo = self._em_voo.get(chave)
+            primeiro = voo is None
+            if primeiro:
+                voo = self._em_voo[chave] = _Voo()
+        if not primeiro:
+            self._coalescida()
+            voo.pronto.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado
+        try:
+            voo.resultado = funcao()
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            # Sai do mapa antes de liberar quem espera: uma chamada que chegue
+            # depois disso já encontra o resultado no cache (ou vai ao banco)
+            with self._lock:
+                del self._em_voo[chave]
+            voo.pronto.set()
+        return voo.resultado
+
+    async def executar_async(self, chave, fabrica):
+        """Como `executar`, para corrotinas: `fabrica()` cria a corrotina a aguardar."""
+        tarefa = self._tarefas.get(chave)
+        if tarefa is None:
+            tarefa = self._tarefas[chave] = asyncio.ensure_future(fabrica())
+            tarefa.add_done_callback(lambda t: self._encerrar(chave, t))
+        else:
+            self._coalescida()
+        return await asyncio.shield(tarefa)
+
+    def _encerrar(self, chave, tarefa) -> None:
+        if self._tarefas.get(chave) is tarefa:
+            del self._tarefas[chave]
+        # Marca a exceção como lida: se todos que esperavam foram cancelados,
+        # o asyncio não deve acusar "exception was never retrieved"
+        if not tarefa.cancelled():
+            tarefa.exception()
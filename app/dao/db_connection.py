@@ -1,12 +1,26 @@
 import logging
 import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
 import psycopg2
+import psycopg2.pool
+
+from app.metricas import medir_etapa
+
+
+class PoolEsgotadoError(psycopg2.pool.PoolError):
+    """Nenhuma conexão do pool ficou livre dentro do tempo de espera."""
+
 
-def conectar():
+def conectar(host=None, port=None):
+    """Abre uma conexão; `host`/`port` substituem `DB_HOST`/`DB_PORT` (ex.: réplicas)."""
     try:
         conexao = psycopg2.connect(
-            host=os.getenv("DB_HOST", "db"),          # <— serviço do Compose
-            port=os.getenv("DB_PORT", "5432"),
+            host=host or os.getenv("DB_HOST", "db"),          # <— serviço do Compose
+            port=port or os.getenv("DB_PORT", "5432"),
             dbname=os.getenv("DB_NAME", "mvc_biblioteca_db"),
             user=os.getenv("DB_USER", "postgres"),
             password=os.getenv("DB_PASSWORD", "postgres"),
@@ -16,3 +30,403 @@ def conectar():
     except Exception:
         logging.exception("Erro ao conectar ao Postgres (verifique variáveis DB_*).")
         raise
+
+
+def _conexao_aberta(conexao) -> bool:
+    """Mesma verificação usada em `LivroDAO._conn`: `closed == 0` é aberta."""
+    return conexao is not None and getattr(conexao, "closed", 1) == 0
+
+
+class PoolConexoes:
+    """Pool de conexões Postgres compartilhado entre threads.
+
+    - Mantém entre `minimo` e `maximo` conexões abertas;
+    - Conexões devolvidas fechadas (ou com `closed != 0`) são descartadas e
+      substituídas sob demanda;
+    - Quando todas estão emprestadas, `obter()` espera até `timeout` segundos
+      e então lança `PoolEsgotadoError`;
+    - Com `verificar_apos`, uma conexão ociosa há mais que esses segundos é
+      testada (`SELECT 1`) antes de ser emprestada: se o servidor caiu
+      enquanto ela estava livre, `closed` ainda é 0, e só a ida ao banco
+      revela a queda. Conexões mortas são descartadas.
+    """
+
+    def __init__(self, minimo=1, maximo=10, timeout=5.0, fabrica=None,
+                 verificar_apos=None, relogio=time.monotonic):
+        if minimo < 0 or maximo < 1 or minimo > maximo:
+            raise ValueError("Limites do pool inválidos (0 <= minimo <= maximo, maximo >= 1).")
+        self.minimo = minimo
+        self.maximo = maximo
+        self.timeout = timeout
+        self.verificar_apos = verificar_apos
+        self._fabrica = fabrica or conectar
+        self._relogio = relogio
+        self._livres = []  # (conexão, ociosa desde)
+        self._emprestadas = set()
+        self._cond = threading.Condition()
+        self._fechado = False
+        for _ in range(minimo):
+            self._livres.append((self._fabrica(), self._relogio()))
+
+    @property
+    def total(self) -> int:
+        """Quantidade de conexões abertas (livres + emprestadas)."""
+        return len(self._livres) + len(self._emprestadas)
+
+    @property
+    def em_uso(self) -> int:
+        """Quantidade de conexões emprestadas no momento."""
+        return len(self._emprestadas)
+
+    def obter(self, timeout=None):
+        """Empresta uma conexão saudável, criando uma nova se houver vaga."""
+        # Inclui a espera por vaga e a abertura de conexões novas
+        with medir_etapa("conexao"):
+            return self._obter(timeout)
+
+    def _obter(self, timeout=None):
+        espera = self.timeout if timeout is None else timeout
+        limite = time.monotonic() + espera
+        while True:
+            conexao, ociosa_desde, marcador = self._reservar(espera, limite)
+            if conexao is None:
+                return self._abrir(marcador)
+            if self._viva(conexao, ociosa_desde):
+                return conexao
+            logging.info("Conexão ociosa não respondeu; descartada do pool.")
+            with self._cond:
+                self._emprestadas.discard(id(conexao))
+                self._cond.notify()
+            _fechar_silenciosamente(conexao)
+
+    def _reservar(self, espera, limite):
+        """`(conexão livre, ociosa desde, None)` ou `(None, None, marcador da vaga reservada)`."""
+        with self._cond:
+            while True:
+                if self._fechado:
+                    raise psycopg2.pool.PoolError("Pool de conexões fechado.")
+
+                # Reaproveita conexões livres, descartando as que caíram
+                while self._livres:
+                    conexao, ociosa_desde = self._livres.pop()
+                    if _conexao_aberta(conexao):
+                        self._emprestadas.add(id(conexao))
+                        return conexao, ociosa_desde, None
+
+                if self.total < self.maximo:
+                    # Reserva a vaga antes de abrir a conexão fora do lock
+                    marcador = object()
+                    self._emprestadas.add(id(marcador))
+                    return None, None, marcador
+
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise PoolEsgotadoError(
+                        f"Nenhuma conexão livre após {espera:.1f}s (máximo={self.maximo})."
+                    )
+                self._cond.wait(restante)
+
+    def _abrir(self, marcador):
+        try:
+            conexao = self._fabrica()
+        except Exception:
+            with self._cond:
+                self._emprestadas.discard(id(marcador))
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._emprestadas.discard(id(marcador))
+            self._emprestadas.add(id(conexao))
+        return conexao
+
+    def _viva(self, conexao, ociosa_desde) -> bool:
+        if self.verificar_apos is None or self._relogio() - ociosa_desde < self.verificar_apos:
+            return True
+        try:
+            with conexao.cursor() as cur:
+                cur.execute("SELECT 1")
+            conexao.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def devolver(self, conexao, descartar=False) -> None:
+        """Devolve uma conexão emprestada; conexões quebradas são fechadas.
+
+        Devoluções de conexões que não estão emprestadas (duplicadas ou de
+        outro pool) são ignoradas: na lista de livres, a mesma conexão
+        poderia ser entregue a duas threads.
+        """
+        with self._cond:
+            if id(conexao) not in self._emprestadas:
+                logging.warning("Devolução ignorada: conexão não emprestada por este pool.")
+                return
+            self._emprestadas.discard(id(conexao))
+            reutilizavel = not descartar and not self._fechado and _conexao_aberta(conexao)
+            if reutilizavel:
+                try:
+                    # Garante que nenhuma transação aberta vaze para o próximo uso
+                    conexao.rollback()
+                except Exception:
+                    reutilizavel = False
+            if reutilizavel:
+                self._livres.append((conexao, self._relogio()))
+            self._cond.notify()
+        if not reutilizavel:
+            _fechar_silenciosamente(conexao)
+
+    @contextmanager
+    def conexao(self, timeout=None):
+        """Empresta uma conexão pelo escopo de um bloco `with`."""
+        conexao = self.obter(timeout)
+        try:
+            yield conexao
+        finally:
+            # `devolver` descarta sozinho conexões que caíram durante o uso
+            self.devolver(conexao)
+
+    def fechar_todas(self) -> None:
+        """Fecha as conexões livres e impede novos empréstimos."""
+        with self._cond:
+            self._fechado = True
+            livres, self._livres = self._livres, []
+            self._cond.notify_all()
+        for conexao, _ in livres:
+            _fechar_silenciosamente(conexao)
+
+
+class RoteadorConexoes:
+    """Encaminha leituras para réplicas e escritas para o primário.
+
+    - `obter_leitura()`/`leitura()` escolhem uma réplica por `round_robin`
+      ou `menos_carregada` (menos conexões emprestadas). Se a réplica não
+      aceita conexão, ela fica `quarentena` segundos fora da escolha e a
+      próxima é tentada; sem réplica disponível, a leitura vai ao primário.
+      Uma conexão de réplica devolvida quebrada (a réplica caiu durante o
+      uso) também põe a réplica em quarentena;
+    - `obter()`/`conexao()` usam sempre o primário (escritas e leituras que
+      precisam ver a última escrita);
+    - `devolver()` devolve a conexão ao pool de origem.
+    """
+
+    ESTRATEGIAS = ("round_robin", "menos_carregada")
+
+    def __init__(self, primario, replicas=(), estrategia="round_robin",
+                 quarentena=30.0, relogio=time.monotonic):
+        if estrategia not in self.ESTRATEGIAS:
+            raise ValueError(f"Estratégia de réplicas desconhecida: {estrategia!r}")
+        self.primario = primario
+        self.replicas = list(replicas)
+        self.estrategia = estrategia
+        self.quarentena = quarentena
+        self._relogio = relogio
+        self._indisponivel_ate = [0.0] * len(self.replicas)
+        self._proxima = 0
+        self._origem = {}  # id(conexão) -> pool que a emprestou
+        self._lock = threading.Lock()
+
+    def _candidatas(self) -> list[int]:
+        """Índices das réplicas disponíveis, na ordem em que devem ser tentadas."""
+        agora = self._relogio()
+        with self._lock:
+            disponiveis = [i for i, ate in enumerate(self._indisponivel_ate) if ate <= agora]
+            if not disponiveis:
+                return []
+            if self.estrategia == "menos_carregada":
+                return sorted(disponiveis, key=lambda i: self.replicas[i].em_uso)
+            inicio = self._proxima % len(self.replicas)
+            self._proxima += 1
+        # round robin: começa na "vez" atual e segue a ordem circular
+        return sorted(disponiveis, key=lambda i: (i - inicio) % len(self.replicas))
+
+    def _emprestar(self, pool, timeout=None):
+        conexao = pool.obter(timeout)
+        with self._lock:
+            self._origem[id(conexao)] = pool
+        return conexao
+
+    def obter_leitura(self, timeout=None):
+        """Conexão para leitura: réplica saudável ou, na falta, o primário.
+
+        Primeiro tenta cada réplica sem esperar; se todas as saudáveis
+        estiverem saturadas, espera pela primeira candidata em vez de
+        desviar a carga para o primário.
+        """
+        saturadas = []
+        for i in self._candidatas():
+            try:
+                return self._emprestar(self.replicas[i], timeout=0)
+            except PoolEsgotadoError:
+                saturadas.append(i)
+            except psycopg2.Error:
+                self._quarentenar(i)
+        if saturadas:
+            return self._emprestar(self.replicas[saturadas[0]], timeout)
+        return self.obter(timeout)
+
+    def obter(self, timeout=None):
+        """Conexão com o primário."""
+        return self._emprestar(self.primario, timeout)
+
+    def _quarentenar(self, i: int) -> None:
+        logging.warning("Réplica %d indisponível; em quarentena por %.0fs.", i, self.quarentena)
+        with self._lock:
+            self._indisponivel_ate[i] = self._relogio() + self.quarentena
+
+    def devolver(self, conexao, descartar=False) -> None:
+        with self._lock:
+            pool = self._origem.pop(id(conexao), self.primario)
+        if pool is not self.primario and not _conexao_aberta(conexao):
+            # O psycopg2 marca `closed = 2` quando a conexão cai no meio de uma consulta
+            self._quarentenar(self.replicas.index(pool))
+        pool.devolver(conexao, descartar)
+
+    @contextmanager
+    def leitura(self, timeout=None):
+        """Empresta uma conexão de leitura pelo escopo de um bloco `with`."""
+        conexao = self.obter_leitura(timeout)
+        try:
+            yield conexao
+        finally:
+            self.devolver(conexao)
+
+    @contextmanager
+    def conexao(self, timeout=None):
+        """Empresta uma conexão do primário pelo escopo de um bloco `with`."""
+        conexao = self.obter(timeout)
+        try:
+            yield conexao
+        finally:
+            self.devolver(conexao)
+
+    def fechar_todas(self) -> None:
+        for pool in (self.primario, *self.replicas):
+            pool.fechar_todas()
+
+
+def ler_replicas(texto: str | None) -> list[tuple[str, str | None]]:
+    """`"host1:5433,host2"` -> `[("host1", "5433"), ("host2", None)]`."""
+    replicas = []
+    for item in (texto or "").split(","):
+        item = item.strip()
+        if item:
+            host, _, porta = item.partition(":")
+            replicas.append((host, porta or None))
+    return replicas
+
+
+# Nomes já preparados (PREPARE) em cada conexão. Prepared statements vivem
+# na sessão do Postgres, então acompanham a conexão enquanto ela existir no
+# pool; a referência fraca some junto com a conexão descartada.
+_preparadas = weakref.WeakKeyDictionary()
+_preparadas_lock = threading.Lock()
+
+
+def preparar(conexao, nome: str, consulta: str, tipos=()) -> None:
+    """Executa `PREPARE nome (tipos) AS consulta` só na primeira vez por conexão.
+
+    `nome`, `consulta` e `tipos` são SQL fixo do código (nunca entrada do
+    usuário). Depois disso, `EXECUTE nome (...)` pula análise e planejamento.
+    """
+    with _preparadas_lock:
+        nomes = _preparadas.setdefault(conexao, set())
+        if nome in nomes:
+            return
+    with conexao.cursor() as cur:
+        argumentos = f" ({', '.join(tipos)})" if tipos else ""
+        cur.execute(f"PREPARE {nome}{argumentos} AS {consulta}")
+    with _preparadas_lock:
+        nomes.add(nome)
+
+
+def esquecer_preparadas(conexao) -> None:
+    """Esquece os nomes preparados da conexão (ex.: após `DISCARD ALL`)."""
+    with _preparadas_lock:
+        _preparadas.pop(conexao, None)
+
+
+def _fechar_silenciosamente(conexao) -> None:
+    try:
+        conexao.close()
+    except Exception:
+        logging.debug("Falha ao fechar conexão descartada do pool.", exc_info=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool() -> PoolConexoes:
+    """Devolve o pool do processo, criado na primeira chamada.
+
+    Configuração via ambiente:
+    - `DB_POOL_MIN` (padrão 1) e `DB_POOL_MAX` (padrão 10);
+    - `DB_POOL_TIMEOUT`: segundos de espera quando o pool está esgotado (padrão 5);
+    - `DB_POOL_VERIFICAR`: segundos de ociosidade a partir dos quais a conexão
+      é testada antes do empréstimo (padrão 5; vazio desliga).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexoes(
+                    minimo=int(os.getenv("DB_POOL_MIN", "1")),
+                    maximo=int(os.getenv("DB_POOL_MAX", "10")),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+                    verificar_apos=_verificar_apos(),
+                )
+    return _pool
+
+
+def _verificar_apos():
+    valor = os.getenv("DB_POOL_VERIFICAR", "5")
+    return float(valor) if valor else None
+
+
+_roteador = None
+
+
+def obter_roteador() -> RoteadorConexoes:
+    """Roteador de leituras/escritas do processo, criado na primeira chamada.
+
+    O primário é o pool de `obter_pool()`. Réplicas de leitura vêm de
+    `DB_REPLICAS` (`host[:porta],...`, mesmas credenciais do primário), cada
+    uma com seu pool (até `DB_POOL_MAX` conexões, abertas sob demanda):
+    - `DB_REPLICAS_ESTRATEGIA`: `round_robin` (padrão) ou `menos_carregada`;
+    - `DB_REPLICAS_QUARENTENA`: segundos fora da escolha após uma falha (padrão 30).
+    Sem réplicas, todas as leituras vão ao primário.
+    """
+    global _roteador
+    if _roteador is None:
+        primario = obter_pool()
+        with _pool_lock:
+            if _roteador is None:
+                maximo = int(os.getenv("DB_POOL_MAX", "10"))
+                timeout = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+                replicas = [
+                    PoolConexoes(
+                        minimo=0, maximo=maximo, timeout=timeout,
+                        fabrica=lambda host=host, porta=porta: conectar(host, porta),
+                        verificar_apos=_verificar_apos(),
+                    )
+                    for host, porta in ler_replicas(os.getenv("DB_REPLICAS"))
+                ]
+                _roteador = RoteadorConexoes(
+                    primario, replicas,
+                    estrategia=os.getenv("DB_REPLICAS_ESTRATEGIA", "round_robin"),
+                    quarentena=float(os.getenv("DB_REPLICAS_QUARENTENA", "30")),
+                )
+    return _roteador
+
+
+def fechar_pool() -> None:
+    """Fecha o pool do processo e o das réplicas (ex.: no desligamento do servidor)."""
+    global _pool, _roteador
+    with _pool_lock:
+        if _roteador is not None:
+            for replica in _roteador.replicas:
+                replica.fechar_todas()
+            _roteador = None
+        if _pool is not None:
+            _pool.fechar_todas()
+            _pool = None
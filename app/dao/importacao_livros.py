@@ -0,0 +1,191 @@
+"""
+Carga em massa do catálogo `biblioteca.livros`.
+
+Lê arquivos CSV (cabeçalho `isbn,titulo,autor`) ou JSON Lines (um objeto
+por linha com as mesmas chaves), valida cada registro com
+`Livro.validado` e grava em lotes:
+
+1. o lote é enviado com `COPY ... FROM STDIN` para uma tabela temporária;
+2. um `INSERT ... SELECT ... ON CONFLICT (isbn)` move as linhas para
+   `biblioteca.livros`. O padrão é `DO NOTHING`, como no `init.sql`;
+   `atualizar=True` usa `DO UPDATE`;
+3. cada lote é confirmado (commit) separadamente.
+
+Uso:
+    python -m app.dao.importacao_livros livros.csv [--formato jsonl] [--lote 50000]
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+from app.dao.cache_livros import livros_alterados
+from app.model.livro import Livro
+
+_CRIAR_TEMPORARIA = """
+    CREATE TEMP TABLE IF NOT EXISTS livros_importacao
+        (LIKE biblioteca.livros INCLUDING DEFAULTS)
+        ON COMMIT DELETE ROWS
+"""
+
+_COPY = "COPY livros_importacao (isbn, titulo, autor) FROM STDIN WITH (FORMAT csv)"
+
+# DISTINCT ON: um ISBN repetido no mesmo lote não pode ser gravado duas vezes
+_INSERIR = """
+    INSERT INTO biblioteca.livros (isbn, titulo, autor)
+    SELECT DISTINCT ON (isbn) isbn, titulo, autor
+      FROM livros_importacao
+     ORDER BY isbn
+    ON CONFLICT (isbn) DO {acao}
+"""
+_ACAO_IGNORAR = "NOTHING"
+_ACAO_ATUALIZAR = "UPDATE SET titulo = EXCLUDED.titulo, autor = EXCLUDED.autor"
+
+
+class ResumoImportacao:
+    """Contadores de uma importação, atualizados a cada lote."""
+
+    def __init__(self):
+        self.lidos = 0
+        self.invalidos = 0
+        self.gravados = 0
+        self.lotes = 0
+        self.inicio = time.monotonic()
+
+    @property
+    def segundos(self) -> float:
+        return time.monotonic() - self.inicio
+
+    @property
+    def por_segundo(self) -> float:
+        return self.lidos / self.segundos if self.segundos > 0 else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.lidos} lidos, {self.gravados} gravados, {self.invalidos} inválidos "
+            f"em {self.lotes} lotes ({self.segundos:.1f}s, {self.por_segundo:,.0f} registros/s)"
+        )
+
+
+def ler_csv(arquivo):
+    """Gera dicionários de um CSV com cabeçalho `isbn,titulo,autor`."""
+    yield from csv.DictReader(arquivo)
+
+
+def ler_jsonl(arquivo):
+    """Gera dicionários de um arquivo JSON Lines (linhas vazias são ignoradas).
+
+    Uma linha que não é JSON válido é gerada como texto, para que `importar`
+    a conte como inválida em vez de interromper a carga.
+    """
+    for linha in arquivo:
+        linha = linha.strip()
+        if linha:
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError:
+                yield linha
+
+
+LEITORES = {"csv": ler_csv, "jsonl": ler_jsonl}
+
+
+def _gravar_lote(conexao, buffer: io.StringIO, acao: str) -> int:
+    buffer.seek(0)
+    with conexao.cursor() as cur:
+        cur.execute(_CRIAR_TEMPORARIA)
+        cur.copy_expert(_COPY, buffer)
+        cur.execute(_INSERIR.format(acao=acao))
+        gravados = cur.rowcount
+    conexao.commit()
+    return gravados
+
+
+def importar(conexao, registros, lote: int = 50_000, atualizar: bool = False,
+             progresso=None) -> ResumoImportacao:
+    """Importa `registros` (iterável de dicionários) em lotes via COPY.
+
+    Registros inválidos são contados e registrados em log, sem interromper
+    a carga. `progresso(resumo)` é chamado ao fim de cada lote.
+    """
+    if lote < 1:
+        raise ValueError("lote deve ser positivo")
+    acao = _ACAO_ATUALIZAR if atualizar else _ACAO_IGNORAR
+    resumo = ResumoImportacao()
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    no_lote = 0
+
+    def _fechar_lote():
+        nonlocal buffer, escritor, no_lote
+        resumo.gravados += _gravar_lote(conexao, buffer, acao)
+        resumo.lotes += 1
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, lineterminator="\n")
+        no_lote = 0
+        if progresso is not None:
+            progresso(resumo)
+
+    try:
+        for registro in registros:
+            resumo.lidos += 1
+            try:
+                if not isinstance(registro, dict):
+                    raise ValueError("não é um objeto com isbn, titulo e autor")
+                livro = Livro.validado(registro.get("isbn"), registro.get("autor"), registro.get("titulo"))
+            except ValueError as e:
+                resumo.invalidos += 1
+                logging.warning("Registro %d inválido (%s): %r", resumo.lidos, e, registro)
+                continue
+            escritor.writerow((livro.isbn, livro.titulo, livro.autor))
+            no_lote += 1
+            if no_lote >= lote:
+                _fechar_lote()
+        if no_lote:
+            _fechar_lote()
+    except Exception:
+        conexao.rollback()
+        raise
+    finally:
+        # Só tem efeito quando a importação roda dentro do servidor; pela linha
+        # de comando, os caches do servidor veem os livros após o TTL
+        if resumo.gravados:
+            livros_alterados()
+    return resumo
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importa livros em massa para biblioteca.livros.")
+    parser.add_argument("arquivo", type=Path)
+    parser.add_argument("--formato", choices=sorted(LEITORES), help="padrão: extensão do arquivo")
+    parser.add_argument("--lote", type=int, default=50_000, help="registros por COPY/commit")
+    parser.add_argument("--atualizar", action="store_true",
+                        help="atualiza titulo/autor de ISBNs existentes (padrão: ignora)")
+    args = parser.parse_args(argv)
+
+    formato = args.formato or args.arquivo.suffix.lstrip(".").lower()
+    if formato not in LEITORES:
+        parser.error(f"formato desconhecido: {formato!r} (use --formato)")
+
+    from app.dao.db_connection import conectar
+
+    conexao = conectar()
+    try:
+        with args.arquivo.open(encoding="utf-8", newline="") as arquivo:
+            resumo = importar(
+                conexao, LEITORES[formato](arquivo), lote=args.lote, atualizar=args.atualizar,
+                progresso=lambda r: print(f"... {r}", file=sys.stderr),
+            )
+    finally:
+        conexao.close()
+    print(f"Importação concluída: {resumo}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,489 @@
+"""
+Backend de busca em memória para implantações com muitas leituras.
+
+Com `BUSCA_BACKEND=memoria`, cada processo carrega `biblioteca.livros` uma
+vez na inicialização e passa a responder as buscas sem ir ao Postgres:
+
+- `IndiceLivros`: guarda os livros por ISBN e, para `autor` e `titulo`, os
+  valores distintos normalizados (`normalizar_texto`, a mesma forma da
+  coluna `autor_normalizado` do banco) com *postings* de trigramas. Uma
+  busca por substring intersecta as listas dos trigramas do termo e só
+  então confere `termo in valor` nos candidatos; termos com menos de três
+  caracteres percorrem os valores distintos. As postings de `titulo` só
+  são montadas na primeira busca por título (a carga fica ~10x mais rápida
+  enquanto só se busca por autor);
+- `LivroDAOMemoria`: mesma interface de leitura do `LivroDAO` (inclusive a
+  ordem `titulo, isbn` e o cursor de paginação), escolhida pelo controller;
+- `AtualizadorIndice`: mantém o índice em dia com uma consulta de *delta*
+  periódica (`INDICE_INTERVALO`, padrão 5 s) sobre `atualizado_em` e
+  `biblioteca.livros_removidos` (ver `migrations/004_rastreio_alteracoes.sql`),
+  mais uma recarga completa a cada `INDICE_RECARGA` segundos (padrão 3600).
+  Gravações feitas no próprio processo (`livros_alterados()`) antecipam o
+  delta.
+
+Diferença em relação ao Postgres: a ordenação é por ponto de código (como
+`COLLATE "C"`), não pela collation do banco. Cada worker (pre-fork) mantém
+sua própria cópia do índice.
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from operator import itemgetter
+
+from app.dao.cache_livros import ao_alterar_livros, livros_alterados, normalizar_texto
+from app.dao.livro_dao import LivroDAO, PaginaLivros, ResultadoLote
+from app.metricas import medir_etapa
+from app.model.livro import Livro, LivroResultSet
+
+logger = logging.getLogger(__name__)
+
+# Delta desde a última marca, em ordem de acontecimento: 'u' = inserido ou
+# alterado, 'd' = removido
+_DELTA = """
+    SELECT 'u', isbn, titulo, autor, atualizado_em AS quando
+      FROM biblioteca.livros
+     WHERE atualizado_em > %s
+    UNION ALL
+    SELECT 'd', isbn, NULL, NULL, removido_em
+      FROM biblioteca.livros_removidos
+     WHERE removido_em > %s
+     ORDER BY quando
+"""
+
+# Marca d'água do delta: nenhuma transação de escrita ainda aberta começou
+# antes dela (least ignora o NULL quando não há nenhuma)
+_MARCA = """
+    SELECT least(now(), (SELECT min(xact_start)
+                           FROM pg_stat_activity
+                          WHERE backend_xid IS NOT NULL
+                            AND pid <> pg_backend_pid()))
+           - make_interval(secs => %s)
+"""
+
+
+def trigramas(texto: str) -> set:
+    """Trigramas (substrings de 3 caracteres) de um texto já normalizado."""
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class _CampoIndexado:
+    """Índice de substring de uma coluna.
+
+    `isbns_por_valor` agrupa os livros por valor normalizado (muitos livros
+    têm o mesmo autor) e `postings` leva cada trigrama aos valores que o
+    contêm, então o custo da busca depende dos valores distintos, não do
+    número de livros.
+    """
+
+    __slots__ = ("isbns_por_valor", "postings")
+
+    def __init__(self):
+        self.isbns_por_valor = {}
+        self.postings = defaultdict(set)
+
+    def adicionar(self, valor: str, isbn: str) -> None:
+        isbns = self.isbns_por_valor.get(valor)
+        if isbns is None:
+            isbns = self.isbns_por_valor[valor] = set()
+            for trigrama in trigramas(valor):
+                self.postings[trigrama].add(valor)
+        isbns.add(isbn)
+
+    def remover(self, valor: str, isbn: str) -> None:
+        isbns = self.isbns_por_valor.get(valor)
+        if isbns is None:
+            return
+        isbns.discard(isbn)
+        if not isbns:
+            del self.isbns_por_valor[valor]
+            for trigrama in trigramas(valor):
+                valores = self.postings.get(trigrama)
+                if valores is not None:
+                    valores.discard(valor)
+                    if not valores:
+                        del self.postings[trigrama]
+
+    def buscar(self, termo: str) -> set:
+        """ISBNs cujo valor contém `termo` (já normalizado)."""
+        if len(termo) < 3:
+            candidatos = self.isbns_por_valor.keys()
+        else:
+            listas = []
+            for trigrama in trigramas(termo):
+                valores = self.postings.get(trigrama)
+                if not valores:
+                    return set()
+                listas.append(valores)
+            listas.sort(key=len)
+            candidatos = listas[0].intersection(*listas[1:])
+        encontrados = set()
+        for valor in candidatos:
+            if termo in valor:
+                encontrados |= self.isbns_por_valor[valor]
+        return encontrados
+
+
+class IndiceLivros:
+    """Catálogo em memória com busca por substring em `autor` e `titulo`.
+
+    Leituras e escritas são protegidas por um lock; uma busca típica leva
+    microssegundos, então a contenção é baixa. `carregar` monta as
+    estruturas novas fora do lock e troca de uma vez.
+    """
+
+    def __init__(self, linhas=()):
+        self._lock = threading.Lock()
+        self._livros = {}  # isbn -> (isbn, titulo, autor)
+        self._autor = _CampoIndexado()
+        self._titulo = None  # montado sob demanda (ver `_campo_titulo`)
+        if linhas:
+            self.carregar(linhas)
+
+    def __len__(self):
+        return len(self._livros)
+
+    def carregar(self, linhas) -> None:
+        """Substitui todo o conteúdo por `linhas` `(isbn, titulo, autor)`."""
+        livros, autor = {}, _CampoIndexado()
+        autores = {}  # autor -> normalizado: o mesmo autor se repete em muitos livros
+        for isbn, t, a in linhas:
+            livros[isbn] = (isbn, t, a)
+            normalizado = autores.get(a)
+            if normalizado is None:
+                normalizado = autores[a] = normalizar_texto(a)
+            autor.adicionar(normalizado, isbn)
+        with self._lock:
+            self._livros, self._autor, self._titulo = livros, autor, None
+
+    def gravar(self, isbn: str, titulo: str, autor: str) -> None:
+        """Insere ou atualiza um livro."""
+        with self._lock:
+            self._retirar(isbn)
+            self._livros[isbn] = (isbn, titulo, autor)
+            self._autor.adicionar(normalizar_texto(autor), isbn)
+            if self._titulo is not None:
+                self._titulo.adicionar(normalizar_texto(titulo), isbn)
+
+    def remover(self, isbn: str) -> None:
+        with self._lock:
+            self._retirar(isbn)
+
+    def _retirar(self, isbn: str) -> None:
+        anterior = self._livros.pop(isbn, None)
+        if anterior is not None:
+            self._autor.remover(normalizar_texto(anterior[2]), isbn)
+            if self._titulo is not None:
+                self._titulo.remover(normalizar_texto(anterior[1]), isbn)
+
+    def _campo_titulo(self) -> _CampoIndexado:
+        # Chamado com o lock adquirido
+        if self._titulo is None:
+            titulo = _CampoIndexado()
+            for isbn, t, _ in self._livros.values():
+                titulo.adicionar(normalizar_texto(t), isbn)
+            self._titulo = titulo
+        return self._titulo
+
+    def autores_e_titulos(self):
+        """`(autores, titulos)` distintos, como em `LivroDAO.autores_e_titulos`."""
+        with self._lock:
+            linhas = list(self._livros.values())
+        return list({linha[2] for linha in linhas}), list({linha[1] for linha in linhas})
+
+    def linha(self, isbn: str):
+        """Tupla `(isbn, titulo, autor)` do livro, ou `None`."""
+        return self._livros.get(isbn)
+
+    def pesquisar(self, autor=None, titulo=None, apos=None, limite=None) -> list:
+        """Linhas com `autor` e/ou `titulo` contendo os termos, por `(titulo, isbn)`.
+
+        `apos=(titulo, isbn)` começa depois dessa posição (paginação por
+        keyset) e `limite` corta o resultado sem ordenar todos os encontrados.
+        """
+        with self._lock:
+            if autor is None and titulo is None:
+                linhas = list(self._livros.values())
+            else:
+                isbns = None
+                if autor is not None:
+                    isbns = self._autor.buscar(normalizar_texto(autor))
+                if titulo is not None:
+                    achados = self._campo_titulo().buscar(normalizar_texto(titulo))
+                    isbns = achados if isbns is None else isbns & achados
+                linhas = [self._livros[isbn] for isbn in isbns]
+        if apos is not None:
+            linhas = [linha for linha in linhas if (linha[1], linha[0]) > apos]
+        chave = itemgetter(1, 0)  # (titulo, isbn)
+        if limite is not None and limite < len(linhas):
+            return heapq.nsmallest(limite, linhas, key=chave)
+        linhas.sort(key=chave)
+        return linhas
+
+
+class LivroDAOMemoria:
+    """`LivroDAO` de leitura atendido por um `IndiceLivros`.
+
+    Não há conexão a emprestar: `liberar`, o context manager e `em_thread`
+    existem só para manter a interface do `LivroDAO`.
+    """
+
+    def __init__(self, indice: IndiceLivros):
+        self.indice = indice
+
+    def liberar(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def pesquisar_por_autor(self, autor: str):
+        with medir_etapa("consulta"):
+            linhas = self.indice.pesquisar(autor=autor)
+        with medir_etapa("mapeamento"):
+            return [Livro(isbn=r[0], titulo=r[1], autor=r[2]) for r in linhas]
+
+    def pesquisar_por_autor_paginado(self, autor: str, limite: int = 20,
+                                     apos_titulo=None, apos_isbn=None):
+        if limite < 1:
+            raise ValueError("limite deve ser positivo")
+        apos = (apos_titulo, apos_isbn or "") if apos_titulo is not None else None
+        with medir_etapa("consulta"):
+            linhas = self.indice.pesquisar(autor=autor, apos=apos, limite=limite + 1)
+        with medir_etapa("mapeamento"):
+            livros = LivroResultSet.de_linhas(linhas[:limite])
+        proximo = (livros.titulos[-1], livros.isbns[-1]) if len(linhas) > limite else None
+        return PaginaLivros(livros, proximo)
+
+    def buscar_por_isbn(self, isbn: str):
+        linha = self.indice.linha(isbn)
+        return Livro(isbn=linha[0], titulo=linha[1], autor=linha[2]) if linha else None
+
+    def buscar_por_isbns(self, isbns):
+        encontrados = {}
+        for isbn in dict.fromkeys(isbns):
+            linha = self.indice.linha(isbn)
+            if linha is not None:
+                encontrados[isbn] = Livro(isbn=linha[0], titulo=linha[1], autor=linha[2])
+        return encontrados
+
+    def pesquisar_em_lote(self, autores=(), isbns=(), limite_por_autor: int = 20):
+        if limite_por_autor < 1:
+            raise ValueError("limite_por_autor deve ser positivo")
+        with medir_etapa("consulta"):
+            por_autor = {
+                autor: LivroResultSet.de_linhas(self.indice.pesquisar(autor=autor, limite=limite_por_autor))
+                for autor in dict.fromkeys(autores)
+            }
+            por_isbn = {}
+            for isbn in dict.fromkeys(isbns):
+                linha = self.indice.linha(isbn)
+                por_isbn[isbn] = Livro(isbn=linha[0], titulo=linha[1], autor=linha[2]) if linha else None
+        return ResultadoLote(por_autor, por_isbn)
+
+    def autores_e_titulos(self):
+        return self.indice.autores_e_titulos()
+
+    def iterar_livros(self, autor: str | None = None, lote: int = 1000):
+        for r in self.iterar_linhas(autor, lote):
+            yield Livro(isbn=r[0], titulo=r[1], autor=r[2])
+
+    def iterar_linhas(self, autor: str | None = None, lote: int = 1000):
+        # `lote` só existe por compatibilidade: o resultado já está em memória
+        yield from self.indice.pesquisar(autor=autor or None)
+
+    async def em_thread(self, metodo, *args, executor=None):
+        # A busca em memória não bloqueia: roda direto no event loop
+        return metodo(*args)
+
+    async def pesquisar_por_autor_async(self, autor: str, executor=None):
+        return self.pesquisar_por_autor(autor)
+
+
+class AtualizadorIndice:
+    """Carrega o `IndiceLivros` do banco e o mantém atualizado em segundo plano.
+
+    `fonte()` devolve um context manager que empresta uma conexão (ex.:
+    `obter_roteador().conexao`, o primário, para não ler deltas atrasados de
+    uma réplica). `atualizado_em` e `removido_em` recebem o `now()` da
+    transação que escreve, ou seja, o seu início, e as linhas só ficam
+    visíveis no commit. Por isso a marca d'água é o menor entre o `now()` do
+    banco e o início da transação de escrita aberta mais antiga
+    (`pg_stat_activity`), menos `margem` segundos. Assim, uma carga longa
+    (ex.: um lote de COPY) é vista inteira no delta seguinte ao seu commit.
+    A `margem` cobre transações que ainda não tinham escrito nada no momento
+    da leitura. Linhas relidas que não mudaram nada são ignoradas.
+
+    Sem `pg_read_all_stats`, o `pg_stat_activity` esconde o início das
+    transações de outros usuários. Por isso as escritas devem usar o mesmo
+    usuário do app, ou esse papel deve ser concedido a ele.
+    """
+
+    def __init__(self, indice: IndiceLivros, fonte, intervalo: float = 5.0,
+                 recarga: float = 3600.0, margem: float = 5.0, relogio=time.monotonic):
+        self.indice = indice
+        self.fonte = fonte
+        self.intervalo = intervalo
+        self.recarga = recarga
+        self.margem = margem
+        self._relogio = relogio
+        self.marca = None
+        self.ultima_carga = None
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _agora_no_banco(self, cur):
+        cur.execute(_MARCA, (self.margem,))
+        return cur.fetchone()[0]
+
+    def carregar_tudo(self) -> int:
+        """Recarrega o catálogo inteiro (cursor server-side) e devolve o total."""
+        with self.fonte() as conexao:
+            with conexao.cursor() as cur:
+                marca = self._agora_no_banco(cur)
+            self.indice.carregar(LivroDAO(conexao).iterar_linhas())
+            conexao.commit()
+        self.marca = marca
+        self.ultima_carga = self._relogio()
+        logger.info("Índice de livros carregado: %d livros.", len(self.indice))
+        return len(self.indice)
+
+    def aplicar_delta(self) -> int:
+        """Aplica inserções, alterações e remoções desde a última marca; devolve quantas mudaram o índice."""
+        if self.marca is None:
+            return self.carregar_tudo()
+        with self.fonte() as conexao:
+            with conexao.cursor() as cur:
+                marca = self._agora_no_banco(cur)
+                cur.execute(_DELTA, (self.marca, self.marca))
+                alteracoes = cur.fetchall()
+            conexao.commit()
+        mudancas = 0
+        for tipo, isbn, titulo, autor, _ in alteracoes:
+            # Deltas se sobrepõem (margem, transações longas): reaplicar o
+            # que o índice já tem não conta como mudança
+            if tipo == "d":
+                if self.indice.linha(isbn) is not None:
+                    self.indice.remover(isbn)
+                    mudancas += 1
+            elif self.indice.linha(isbn) != (isbn, titulo, autor):
+                self.indice.gravar(isbn, titulo, autor)
+                mudancas += 1
+        self.marca = marca
+        if mudancas:
+            # Mudanças de outros processos: avisa os caches deste (o próprio
+            # atualizador também ouve e fará um delta extra, sem mudanças)
+            livros_alterados()
+        return mudancas
+
+    def atualizar(self) -> int:
+        """Delta, ou recarga completa se a última tiver mais de `recarga` segundos."""
+        if self.ultima_carga is None or self._relogio() - self.ultima_carga >= self.recarga:
+            return self.carregar_tudo()
+        return self.aplicar_delta()
+
+    def solicitar(self) -> None:
+        """Antecipa a próxima atualização (gancho de `ao_alterar_livros`)."""
+        self._acordar.set()
+
+    def iniciar(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._laco, name="atualizador-indice", daemon=True)
+            self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _laco(self) -> None:
+        while not self._parar.is_set():
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            if self._parar.is_set():
+                break
+            try:
+                self.atualizar()
+            except Exception:
+                # Continua servindo o conteúdo atual; tenta de novo no próximo ciclo
+                logger.exception("Falha ao atualizar o índice de livros.")
+
+
+_indice = None
+_atualizador = None
+_falhou_em = None
+_indice_lock = threading.Lock()
+# Segundos entre tentativas de carga quando o banco está indisponível
+_ESPERA_APOS_FALHA = 30.0
+
+
+def obter_indice() -> IndiceLivros | None:
+    """Índice do processo, ou `None` quando `BUSCA_BACKEND` não é `memoria`.
+
+    A primeira chamada (feita pelos servidores antes de aceitar conexões)
+    carrega o catálogo e inicia o atualizador. Se a carga falhar, devolve
+    `None` (as buscas vão ao Postgres) e, passados 30 segundos, tenta de
+    novo em uma thread de segundo plano: nenhuma requisição espera pela
+    carga, nem o event loop do servidor assíncrono.
+    - `INDICE_INTERVALO`: segundos entre deltas (padrão 5);
+    - `INDICE_RECARGA`: segundos entre recargas completas (padrão 3600).
+    """
+    if os.getenv("BUSCA_BACKEND", "postgres") != "memoria":
+        return None
+    if _indice is not None:
+        return _indice
+    if _falhou_em is None:
+        with _indice_lock:
+            if _indice is None and _falhou_em is None:
+                _carregar_indice()
+    elif time.monotonic() - _falhou_em >= _ESPERA_APOS_FALHA and _indice_lock.acquire(blocking=False):
+        threading.Thread(target=_tentar_de_novo, name="carga-indice", daemon=True).start()
+    return _indice
+
+
+def _tentar_de_novo() -> None:
+    try:
+        if _indice is None:
+            _carregar_indice()
+    finally:
+        _indice_lock.release()
+
+
+def _carregar_indice() -> None:
+    # Chamado com `_indice_lock` adquirido
+    global _indice, _atualizador, _falhou_em
+    from app.dao.db_connection import obter_roteador
+
+    indice = IndiceLivros()
+    atualizador = AtualizadorIndice(
+        indice, lambda: obter_roteador().conexao(),
+        intervalo=float(os.getenv("INDICE_INTERVALO", "5")),
+        recarga=float(os.getenv("INDICE_RECARGA", "3600")),
+    )
+    try:
+        atualizador.carregar_tudo()
+    except Exception:
+        logger.exception("Índice de livros indisponível; buscas seguem no Postgres.")
+        _falhou_em = time.monotonic()
+        return
+    ao_alterar_livros(atualizador.solicitar)
+    atualizador.iniciar()
+    _indice, _atualizador, _falhou_em = indice, atualizador, None
+
+
+def fechar_indice() -> None:
+    """Para o atualizador e descarta o índice do processo."""
+    global _indice, _atualizador, _falhou_em
+    with _indice_lock:
+        if _atualizador is not None:
+            _atualizador.parar()
+        _indice, _atualizador, _falhou_em = None, None, None
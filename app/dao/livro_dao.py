@@ -1,30 +1,347 @@
-from app.dao.db_connection import conectar
-from app.model.livro import Livro
+import asyncio
+import uuid
+from typing import NamedTuple
+
+from app.dao.db_connection import conectar, esquecer_preparadas, preparar
+from app.dao.perfil_consultas import obter_perfil
+from app.metricas import medir_etapa
+from app.model.livro import Livro, LivroResultSet
 import psycopg2
+from psycopg2.errors import InvalidSqlStatementName
+
+
+# Consultas por chave primária, preparadas uma vez por conexão (ver
+# `preparar`): nome -> (consulta, tipos dos parâmetros)
+_PREPARADAS = {
+    "livro_por_isbn": (
+        "SELECT isbn, titulo, autor FROM biblioteca.livros WHERE isbn = $1", ("text",)
+    ),
+    "livros_por_isbns": (
+        "SELECT isbn, titulo, autor FROM biblioteca.livros WHERE isbn = ANY($1)", ("text[]",)
+    ),
+}
+
+
+# Busca por autor na coluna normalizada (sem acentos, minúsculas; ver
+# migrations/005_autor_normalizado.sql), com o termo normalizado pela mesma
+# função. Com o termo constante, o padrão é calculado no planejamento e a
+# busca usa o índice trigram `livros_autor_normalizado_trgm_idx`. `%`, `_`
+# e `\` do termo são escapados: valem como texto, como no índice em memória.
+def _filtro_autor(termo: str) -> str:
+    normalizado = f"biblioteca.normalizar_busca({termo})"
+    escapado = f"replace(replace(replace({normalizado}, '\\', '\\\\'), '%%', '\\%%'), '_', '\\_')"
+    return f"autor_normalizado LIKE '%%' || {escapado} || '%%'"
+
+
+_FILTRO_AUTOR = _filtro_autor("%s")
+
+
+class PaginaLivros(NamedTuple):
+    """Uma página de resultados e o cursor `(titulo, isbn)` da próxima, se houver.
+
+    `erro` indica que a página está vazia por falha de banco, e não por
+    falta de livros: ela não pode ser guardada como "não encontrado".
+    """
+    livros: LivroResultSet
+    proximo: tuple | None = None
+    erro: bool = False
+
+
+class ResultadoLote(NamedTuple):
+    """Resultado de `pesquisar_em_lote`, agrupado pela chave de entrada.
+
+    `por_autor` mapeia cada autor pesquisado aos livros encontrados;
+    `por_isbn` mapeia cada ISBN ao `Livro` ou a `None`, se não existir.
+    """
+    por_autor: dict
+    por_isbn: dict
+
 
 class LivroDAO:
-    def __init__(self, conexao=None):
+    def __init__(self, conexao=None, pool=None, perfil=None):
         self.conexao = conexao
+        # Quando há pool, conexões são emprestadas dele e devolvidas em `liberar()`
+        self.pool = pool
+        self._emprestada = False
+        # Perfil de consultas; `None` usa o do processo (ver PERFIL_CONSULTAS)
+        self.perfil = perfil
 
     def _conn(self):
         if self.conexao is None or getattr(self.conexao, "closed", 1) != 0:
-            self.conexao = conectar()
+            if self.pool is not None:
+                self.liberar()
+                # Todas as consultas do DAO são leituras: com um roteador de
+                # réplicas (RoteadorConexoes), vão para uma réplica
+                obter = getattr(self.pool, "obter_leitura", self.pool.obter)
+                self.conexao = obter()
+                self._emprestada = True
+            else:
+                self.conexao = conectar()
         return self.conexao
 
+    def _executar(self, cur, nome: str, sql: str, params=None):
+        """`cur.execute`, passando pelo perfil de consultas quando ativo."""
+        perfil = self.perfil or obter_perfil()
+        if perfil is None:
+            cur.execute(sql, params)
+        else:
+            perfil.executar(self.conexao, cur, nome, sql, params)
+
+    def liberar(self):
+        """Devolve ao pool a conexão emprestada por `_conn()`, se houver."""
+        if self._emprestada:
+            if self.conexao is not None:
+                self.pool.devolver(self.conexao)
+            self.conexao = None
+            self._emprestada = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.liberar()
+        return False
+
     def pesquisar_por_autor(self, autor: str):
-        sql = """
+        sql = f"""
             SELECT isbn, titulo, autor
               FROM biblioteca.livros
-             WHERE autor ILIKE %s
+             WHERE {_FILTRO_AUTOR}
              ORDER BY titulo
         """
-        params = (f"%{autor}%",)
+        params = (autor,)
+        try:
+            conn = self._conn()
+            with conn.cursor() as cur, medir_etapa("consulta"):
+                self._executar(cur, "pesquisar_por_autor", sql, params)
+                rows = cur.fetchall()
+            with medir_etapa("mapeamento"):
+                return [Livro(isbn=r[0], titulo=r[1], autor=r[2]) for r in rows] if rows else []
+        except psycopg2.Error as e:
+            print(f"Erro no banco de dados: {e}")
+            return []
+
+    def pesquisar_por_autor_similar(self, autor: str, limiar: float = 0.3):
+        """Busca aproximada por autor usando similaridade de trigramas.
+
+        Usa o operador `%` do pg_trgm (atendido pelo índice GIN
+        `livros_autor_trgm_idx`) com `pg_trgm.similarity_threshold = limiar`
+        apenas na transação corrente, e ordena pelo `similarity()` decrescente.
+        """
+        if not 0 <= limiar <= 1:
+            raise ValueError("limiar deve estar entre 0 e 1")
+        sql = """
+            SELECT isbn, titulo, autor
+              FROM biblioteca.livros
+             WHERE autor %% %s
+             ORDER BY similarity(autor, %s) DESC, titulo
+        """
         try:
             conn = self._conn()
             with conn.cursor() as cur:
-                cur.execute(sql, params)
+                # set_config(..., true) equivale a SET LOCAL: não vaza para o pool
+                cur.execute(
+                    "SELECT set_config('pg_trgm.similarity_threshold', %s, true)",
+                    (str(limiar),),
+                )
+                with medir_etapa("consulta"):
+                    self._executar(cur, "pesquisar_por_autor_similar", sql, (autor, autor))
+                    rows = cur.fetchall()
+            with medir_etapa("mapeamento"):
+                return [Livro(isbn=r[0], titulo=r[1], autor=r[2]) for r in rows] if rows else []
+        except psycopg2.Error as e:
+            print(f"Erro no banco de dados: {e}")
+            return []
+
+    def pesquisar_por_autor_paginado(self, autor: str, limite: int = 20,
+                                     apos_titulo=None, apos_isbn=None):
+        """Busca por autor paginada por *keyset* em `(titulo, isbn)`.
+
+        Em vez de `OFFSET`, a página seguinte começa após o último
+        `(titulo, isbn)` visto, o que usa o índice `livros_titulo_isbn_idx` e
+        custa o mesmo em qualquer página. Lê `limite + 1` linhas apenas para
+        saber se existe próxima página.
+        """
+        if limite < 1:
+            raise ValueError("limite deve ser positivo")
+        filtros = [_FILTRO_AUTOR]
+        params = [autor]
+        if apos_titulo is not None:
+            filtros.append("(titulo, isbn) > (%s, %s)")
+            params += [apos_titulo, apos_isbn or ""]
+        sql = f"""
+            SELECT isbn, titulo, autor
+              FROM biblioteca.livros
+             WHERE {' AND '.join(filtros)}
+             ORDER BY titulo, isbn
+             LIMIT %s
+        """
+        params.append(limite + 1)
+        try:
+            conn = self._conn()
+            with conn.cursor() as cur, medir_etapa("consulta"):
+                self._executar(cur, "pesquisar_por_autor_paginado", sql, tuple(params))
                 rows = cur.fetchall()
-            return [Livro(isbn=r[0], titulo=r[1], autor=r[2]) for r in rows] if rows else []
         except psycopg2.Error as e:
             print(f"Erro no banco de dados: {e}")
-            return []
\ No newline at end of file
+            return PaginaLivros(LivroResultSet(), erro=True)
+        with medir_etapa("mapeamento"):
+            livros = LivroResultSet.de_linhas(rows[:limite])
+        proximo = (livros.titulos[-1], livros.isbns[-1]) if len(rows) > limite else None
+        return PaginaLivros(livros, proximo)
+
+    def _executar_preparada(self, nome: str, params: tuple):
+        """`EXECUTE` de uma consulta de `_PREPARADAS`, preparando-a se preciso.
+
+        Se o Postgres não conhecer mais o nome (sessão reiniciada por um
+        `DISCARD ALL`, por exemplo), prepara de novo e repete uma vez.
+        """
+        conn = self._conn()
+        marcadores = ", ".join(["%s"] * len(params))
+        for tentativa in range(2):
+            preparar(conn, nome, *_PREPARADAS[nome])
+            try:
+                with conn.cursor() as cur, medir_etapa("consulta"):
+                    self._executar(cur, nome, f"EXECUTE {nome} ({marcadores})", params)
+                    return cur.fetchall()
+            except InvalidSqlStatementName:
+                if tentativa:
+                    raise
+                conn.rollback()
+                esquecer_preparadas(conn)
+
+    def buscar_por_isbn(self, isbn: str):
+        """Livro com o ISBN informado (chave primária), ou `None`."""
+        try:
+            rows = self._executar_preparada("livro_por_isbn", (isbn,))
+        except psycopg2.Error as e:
+            print(f"Erro no banco de dados: {e}")
+            return None
+        with medir_etapa("mapeamento"):
+            return Livro(isbn=rows[0][0], titulo=rows[0][1], autor=rows[0][2]) if rows else None
+
+    def buscar_por_isbns(self, isbns):
+        """Livros dos ISBNs informados, como `{isbn: Livro}` (só os existentes)."""
+        isbns = list(dict.fromkeys(isbns))
+        if not isbns:
+            return {}
+        try:
+            rows = self._executar_preparada("livros_por_isbns", (isbns,))
+        except psycopg2.Error as e:
+            print(f"Erro no banco de dados: {e}")
+            return {}
+        with medir_etapa("mapeamento"):
+            return {r[0]: Livro(isbn=r[0], titulo=r[1], autor=r[2]) for r in rows}
+
+    def pesquisar_em_lote(self, autores=(), isbns=(), limite_por_autor: int = 20):
+        """Resolve vários autores e ISBNs em uma única ida ao banco.
+
+        Cada autor vira uma busca por substring limitada a `limite_por_autor`
+        livros (`LATERAL` sobre `unnest` do array de autores) e os ISBNs são
+        buscados pela chave primária com `= ANY(%s)`; as duas partes vão no
+        mesmo `UNION ALL`. Erros de banco são propagados: para a API, "não
+        encontrado" e "banco indisponível" precisam ser distinguíveis.
+        """
+        if limite_por_autor < 1:
+            raise ValueError("limite_por_autor deve ser positivo")
+        autores = list(dict.fromkeys(autores))
+        isbns = list(dict.fromkeys(isbns))
+        por_autor = {autor: [] for autor in autores}
+        por_isbn = dict.fromkeys(isbns)
+        if not autores and not isbns:
+            return ResultadoLote({}, {})
+
+        sql = f"""
+            SELECT 'autor', a.chave, l.isbn, l.titulo, l.autor
+              FROM unnest(%s::text[]) AS a(chave)
+             CROSS JOIN LATERAL (
+                    SELECT isbn, titulo, autor
+                      FROM biblioteca.livros
+                     WHERE {_filtro_autor("a.chave")}
+                     ORDER BY titulo, isbn
+                     LIMIT %s
+                   ) AS l
+            UNION ALL
+            SELECT 'isbn', isbn, isbn, titulo, autor
+              FROM biblioteca.livros
+             WHERE isbn = ANY(%s::text[])
+             ORDER BY 1, 2, 4, 3
+        """
+        conn = self._conn()
+        with conn.cursor() as cur, medir_etapa("consulta"):
+            self._executar(cur, "pesquisar_em_lote", sql, (autores, limite_por_autor, isbns))
+            rows = cur.fetchall()
+
+        with medir_etapa("mapeamento"):
+            for tipo, chave, isbn, titulo, autor in rows:
+                if tipo == "autor":
+                    por_autor[chave].append((isbn, titulo, autor))
+                else:
+                    por_isbn[chave] = Livro(isbn=isbn, titulo=titulo, autor=autor)
+            return ResultadoLote(
+                {autor: LivroResultSet.de_linhas(linhas) for autor, linhas in por_autor.items()},
+                por_isbn,
+            )
+
+    def autores_e_titulos(self):
+        """`(autores, titulos)`: listas dos valores distintos do catálogo.
+
+        Usado para montar as sugestões de `/api/autocomplete`. Erros de
+        banco são propagados.
+        """
+        conn = self._conn()
+        with conn.cursor() as cur, medir_etapa("consulta"):
+            self._executar(cur, "autores_distintos", "SELECT DISTINCT autor FROM biblioteca.livros")
+            autores = [r[0] for r in cur.fetchall()]
+            self._executar(cur, "titulos_distintos", "SELECT DISTINCT titulo FROM biblioteca.livros")
+            titulos = [r[0] for r in cur.fetchall()]
+        return autores, titulos
+
+    def iterar_livros(self, autor: str | None = None, lote: int = 1000):
+        """Gera todos os livros (ou os de um autor) em ordem de título.
+
+        Usa um cursor *nomeado* (server-side): o Postgres envia `lote` linhas
+        por vez, então a memória não cresce com o tamanho do catálogo. Erros
+        de banco são propagados, pois quem exporta precisa saber da falha.
+        """
+        for r in self.iterar_linhas(autor, lote):
+            yield Livro(isbn=r[0], titulo=r[1], autor=r[2])
+
+    def iterar_linhas(self, autor: str | None = None, lote: int = 1000):
+        """Como `iterar_livros`, mas gera as tuplas `(isbn, titulo, autor)`.
+
+        Evita criar um `Livro` por linha quando o destino é só serializar
+        (ex.: exportação do catálogo).
+        """
+        sql = "SELECT isbn, titulo, autor FROM biblioteca.livros"
+        params = ()
+        if autor:
+            sql += f" WHERE {_FILTRO_AUTOR}"
+            params = (autor,)
+        sql += " ORDER BY titulo, isbn"
+
+        conn = self._conn()
+        with conn.cursor(name=f"livros_{uuid.uuid4().hex}") as cur:
+            cur.itersize = lote
+            cur.execute(sql, params)
+            yield from cur
+
+    async def em_thread(self, metodo, *args, executor=None):
+        """Executa um método bloqueante do DAO em uma thread do `executor`.
+
+        O psycopg2 é bloqueante, então a consulta roda fora do event loop
+        (executor padrão quando `None`). Com pool, a conexão é emprestada e
+        devolvida dentro dessa mesma thread, sem ficar presa entre `await`s.
+        """
+        def _executar():
+            try:
+                return metodo(*args)
+            finally:
+                self.liberar()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, _executar)
+
+    async def pesquisar_por_autor_async(self, autor: str, executor=None):
+        """Variante assíncrona de `pesquisar_por_autor` (ver `em_thread`)."""
+        return await self.em_thread(self.pesquisar_por_autor, autor, executor=executor)
@@ -0,0 +1,160 @@
+"""
+Modo de perfil das consultas do `LivroDAO` (depuração/diagnóstico).
+
+Desligado por padrão. Com `PERFIL_CONSULTAS=1`, cada consulta principal do
+DAO passa por `PerfilConsultas.executar`, que:
+
+- acumula estatísticas por consulta (chamadas, tempo total/médio/máximo);
+- registra em log (`app.dao.consultas`) as consultas acima de
+  `PERFIL_LIMIAR_MS` (padrão 200 ms), com parâmetros e duração, e guarda
+  as últimas em memória;
+- para uma fração `PERFIL_AMOSTRAGEM` das execuções (padrão 0.01), roda
+  antes `EXPLAIN (ANALYZE, BUFFERS)` da mesma consulta e guarda o plano.
+  O EXPLAIN ANALYZE executa a consulta de novo, então a amostra custa o
+  dobro; ele roda dentro de um SAVEPOINT para que uma falha não aborte a
+  transação da consulta real.
+
+O relatório fica disponível em `/admin/consultas`.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("app.dao.consultas")
+
+
+class EstatisticaConsulta:
+    __slots__ = ("sql", "chamadas", "total", "maximo", "lentas")
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.chamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.lentas = 0
+
+    def como_dict(self) -> dict:
+        return {
+            "sql": self.sql,
+            "chamadas": self.chamadas,
+            "total_ms": round(self.total * 1000, 3),
+            "media_ms": round(self.total / self.chamadas * 1000, 3) if self.chamadas else 0.0,
+            "max_ms": round(self.maximo * 1000, 3),
+            "lentas": self.lentas,
+        }
+
+
+class PerfilConsultas:
+    """Coleta tempos, consultas lentas e planos amostrados."""
+
+    def __init__(self, limiar_lento: float = 0.2, amostragem: float = 0.01,
+                 max_lentas: int = 100, relogio=time.perf_counter, sortear=random.random):
+        if not 0 <= amostragem <= 1:
+            raise ValueError("amostragem deve estar entre 0 e 1")
+        self.limiar_lento = limiar_lento
+        self.amostragem = amostragem
+        self._relogio = relogio
+        self._sortear = sortear
+        self._estatisticas = {}
+        self._lentas = deque(maxlen=max_lentas)
+        self._planos = {}
+        self._lock = threading.Lock()
+
+    def executar(self, conexao, cur, nome: str, sql: str, params=None) -> None:
+        """`cur.execute(sql, params)` medido; `nome` identifica a consulta."""
+        if self.amostragem and self._sortear() < self.amostragem:
+            self._explicar(conexao, cur, nome, sql, params)
+
+        inicio = self._relogio()
+        try:
+            cur.execute(sql, params)
+        finally:
+            self._registrar(nome, sql, params, self._relogio() - inicio)
+
+    def _registrar(self, nome, sql, params, duracao: float) -> None:
+        lenta = duracao >= self.limiar_lento
+        with self._lock:
+            estatistica = self._estatisticas.get(nome)
+            if estatistica is None:
+                estatistica = self._estatisticas[nome] = EstatisticaConsulta(" ".join(sql.split()))
+            estatistica.chamadas += 1
+            estatistica.total += duracao
+            estatistica.maximo = max(estatistica.maximo, duracao)
+            if lenta:
+                estatistica.lentas += 1
+                self._lentas.append({
+                    "consulta": nome,
+                    "duracao_ms": round(duracao * 1000, 3),
+                    "params": repr(params),
+                    "quando": time.time(),
+                })
+        if lenta:
+            logger.warning("Consulta lenta %s (%.1f ms) params=%r", nome, duracao * 1000, params)
+
+    def _explicar(self, conexao, cur, nome, sql, params) -> None:
+        # Sem SAVEPOINT em autocommit: não há transação a proteger
+        protegido = not getattr(conexao, "autocommit", False)
+        try:
+            if protegido:
+                cur.execute("SAVEPOINT perfil_explain")
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, params)
+            plano = "\n".join(linha[0] for linha in cur.fetchall())
+            if protegido:
+                cur.execute("RELEASE SAVEPOINT perfil_explain")
+        except Exception as e:
+            logger.warning("EXPLAIN de %s falhou: %s", nome, e)
+            if protegido:
+                try:
+                    cur.execute("ROLLBACK TO SAVEPOINT perfil_explain")
+                except Exception:
+                    logger.debug("Falha ao desfazer SAVEPOINT do EXPLAIN.", exc_info=True)
+            return
+        with self._lock:
+            self._planos[nome] = {"params": repr(params), "plano": plano, "quando": time.time()}
+
+    def relatorio(self) -> dict:
+        """Estatísticas (ordenadas por tempo total), lentas recentes e planos."""
+        with self._lock:
+            estatisticas = {nome: e.como_dict() for nome, e in self._estatisticas.items()}
+            lentas = list(self._lentas)
+            planos = dict(self._planos)
+        return {
+            "limiar_lento_ms": round(self.limiar_lento * 1000, 3),
+            "amostragem": self.amostragem,
+            "consultas": dict(sorted(estatisticas.items(), key=lambda item: -item[1]["total_ms"])),
+            "lentas": lentas,
+            "planos": planos,
+        }
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._estatisticas.clear()
+            self._lentas.clear()
+            self._planos.clear()
+
+
+_perfil = None
+_perfil_lock = threading.Lock()
+
+
+def obter_perfil() -> PerfilConsultas | None:
+    """Perfil do processo, ou `None` quando `PERFIL_CONSULTAS` não está ligado.
+
+    - `PERFIL_LIMIAR_MS`: a partir de quantos ms a consulta é lenta (padrão 200);
+    - `PERFIL_AMOSTRAGEM`: fração das execuções com EXPLAIN (padrão 0.01).
+    """
+    global _perfil
+    if os.getenv("PERFIL_CONSULTAS", "0") != "1":
+        return None
+    if _perfil is None:
+        with _perfil_lock:
+            if _perfil is None:
+                _perfil = PerfilConsultas(
+                    limiar_lento=float(os.getenv("PERFIL_LIMIAR_MS", "200")) / 1000,
+                    amostragem=float(os.getenv("PERFIL_AMOSTRAGEM", "0.01")),
+                )
+    return _perfil
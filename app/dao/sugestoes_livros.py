@@ -0,0 +1,202 @@
+"""
+Sugestões por prefixo para a busca enquanto se digita (`/api/autocomplete`).
+
+- `IndiceSugestoes`: autores e títulos distintos em listas ordenadas pela
+  forma normalizada (`normalizar_texto`); um prefixo é resolvido com duas
+  buscas binárias (`bisect`), sem percorrer o catálogo. Autores também são
+  encontrados pelo início de qualquer palavra ("fowl" sugere "Martin
+  Fowler"); títulos, pelo início do título. Casamentos no início do valor
+  vêm antes dos casamentos no meio;
+- `SugestoesLivros`: mantém o índice do processo, reconstruído a cada
+  `AUTOCOMPLETE_RECARGA` segundos (padrão 300) ou quando o catálogo muda
+  (`livros_alterados()`), e guarda o resultado de cada prefixo em um
+  `CacheLRU` (`AUTOCOMPLETE_CACHE_MAX`, padrão 4096). A reconstrução roda
+  em segundo plano, e as requisições seguem usando o índice anterior.
+
+Os valores vêm do índice em memória, se `BUSCA_BACKEND=memoria`, ou de um
+`SELECT DISTINCT` no Postgres (`LivroDAO.autores_e_titulos`).
+"""
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from app.dao.cache_livros import CacheLRU, ao_alterar_livros, normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+
+class _Prefixos:
+    """Lista ordenada de `(chave normalizada, valor original)`."""
+
+    __slots__ = ("chaves", "valores")
+
+    def __init__(self, entradas):
+        entradas = sorted(entradas)
+        self.chaves = [chave for chave, _ in entradas]
+        self.valores = [valor for _, valor in entradas]
+
+    def buscar(self, prefixo: str, limite: int, vistos: dict) -> None:
+        """Acrescenta a `vistos` (dict ordenado) até `limite` valores com o prefixo."""
+        i = bisect_left(self.chaves, prefixo)
+        while len(vistos) < limite and i < len(self.chaves) and self.chaves[i].startswith(prefixo):
+            vistos.setdefault(self.valores[i])
+            i += 1
+
+
+class IndiceSugestoes:
+    """Autores e títulos distintos, consultáveis por prefixo."""
+
+    def __init__(self, autores=(), titulos=()):
+        autores_inteiros, autores_palavras, titulos_inteiros = [], [], []
+        for autor in set(autores):
+            normalizado = normalizar_texto(autor)
+            if not normalizado:
+                continue
+            autores_inteiros.append((normalizado, autor))
+            # Uma entrada a partir de cada palavra seguinte: sobrenomes
+            inicio = normalizado.find(" ") + 1
+            while inicio:
+                autores_palavras.append((normalizado[inicio:], autor))
+                inicio = normalizado.find(" ", inicio) + 1
+        for titulo in set(titulos):
+            normalizado = normalizar_texto(titulo)
+            if normalizado:
+                titulos_inteiros.append((normalizado, titulo))
+        self._autores = (_Prefixos(autores_inteiros), _Prefixos(autores_palavras))
+        self._titulos = (_Prefixos(titulos_inteiros),)
+
+    def sugerir(self, prefixo: str, limite: int = 8) -> dict:
+        """`{"autores": [...], "titulos": [...]}` com até `limite` itens cada."""
+        prefixo = normalizar_texto(prefixo)
+        resultado = {"autores": [], "titulos": []}
+        if not prefixo or limite < 1:
+            return resultado
+        for chave, estruturas in (("autores", self._autores), ("titulos", self._titulos)):
+            vistos = {}
+            for estrutura in estruturas:
+                estrutura.buscar(prefixo, limite, vistos)
+            resultado[chave] = list(vistos)
+        return resultado
+
+
+def _ler_catalogo():
+    """`(autores, titulos)` distintos do índice em memória ou do Postgres."""
+    from app.dao.indice_livros import obter_indice
+
+    indice = obter_indice()
+    if indice is not None:
+        return indice.autores_e_titulos()
+
+    from app.dao.db_connection import obter_roteador
+    from app.dao.livro_dao import LivroDAO
+
+    with obter_roteador().leitura() as conexao:
+        return LivroDAO(conexao).autores_e_titulos()
+
+
+def _em_thread(funcao) -> None:
+    threading.Thread(target=funcao, name="sugestoes-livros", daemon=True).start()
+
+
+class SugestoesLivros:
+    """Índice de sugestões do processo, com recarga periódica e cache por prefixo.
+
+    Só a primeira carga bloqueia quem pede sugestões (e propaga erros de
+    leitura). Depois, um índice vencido é reconstruído por `disparar`
+    (uma thread em segundo plano) enquanto as requisições seguem com o
+    anterior; se a reconstrução falhar, nova tentativa após `recarga`.
+    """
+
+    def __init__(self, ler_catalogo=_ler_catalogo, recarga: float = 300.0,
+                 cache: CacheLRU | None = None, relogio=time.monotonic, disparar=_em_thread):
+        self._ler_catalogo = ler_catalogo
+        self.recarga = recarga
+        self.cache = cache if cache is not None else CacheLRU(max_entradas=4096, ttl=None)
+        self._relogio = relogio
+        self._disparar = disparar
+        # (índice, geração): trocados juntos, para que um resultado calculado
+        # com o índice anterior nunca entre no cache com a geração nova
+        self._atual = None
+        self._carregado_em = None
+        self._desatualizado = False
+        self._lock = threading.Lock()
+
+    @property
+    def pronto(self) -> bool:
+        """Se já há um índice (ou seja, se `sugerir` não vai bloquear)."""
+        return self._atual is not None
+
+    def invalidar(self) -> None:
+        """Marca o índice para reconstrução (gancho de `ao_alterar_livros`)."""
+        self._desatualizado = True
+
+    def _vencido(self) -> bool:
+        return self._desatualizado or self._relogio() - self._carregado_em >= self.recarga
+
+    def _carregar(self) -> None:
+        self._desatualizado = False
+        try:
+            autores, titulos = self._ler_catalogo()
+        finally:
+            self._carregado_em = self._relogio()
+        geracao = self._atual[1] + 1 if self._atual else 0
+        self._atual = (IndiceSugestoes(autores, titulos), geracao)
+        self.cache.invalidar()
+
+    def _reconstruir(self) -> None:
+        try:
+            self._carregar()
+        except Exception:
+            logger.exception("Falha ao reconstruir as sugestões; mantendo o índice anterior.")
+        finally:
+            self._lock.release()
+
+    def _vigente(self):
+        """`(índice, geração)` atuais."""
+        atual = self._atual
+        if atual is not None:
+            if self._vencido() and self._lock.acquire(blocking=False):
+                self._disparar(self._reconstruir)
+            return atual
+        with self._lock:
+            if self._atual is None:
+                self._carregar()
+            return self._atual
+
+    def indice(self) -> IndiceSugestoes:
+        return self._vigente()[0]
+
+    def sugerir(self, prefixo: str, limite: int = 8) -> dict:
+        indice, geracao = self._vigente()
+        chave = (geracao, normalizar_texto(prefixo), limite)
+        resultado = self.cache.obter(chave)
+        if resultado is None:
+            resultado = indice.sugerir(prefixo, limite)
+            self.cache.guardar(chave, resultado)
+        return resultado
+
+
+_sugestoes = None
+_sugestoes_lock = threading.Lock()
+
+
+def obter_sugestoes() -> SugestoesLivros:
+    """Sugestões do processo, criadas na primeira chamada.
+
+    - `AUTOCOMPLETE_RECARGA`: segundos entre reconstruções (padrão 300);
+    - `AUTOCOMPLETE_CACHE_MAX`: prefixos guardados em cache (padrão 4096; 0 desliga).
+    """
+    global _sugestoes
+    if _sugestoes is None:
+        with _sugestoes_lock:
+            if _sugestoes is None:
+                sugestoes = SugestoesLivros(
+                    recarga=float(os.getenv("AUTOCOMPLETE_RECARGA", "300")),
+                    cache=CacheLRU(max_entradas=int(os.getenv("AUTOCOMPLETE_CACHE_MAX", "4096")), ttl=None),
+                )
+                ao_alterar_livros(sugestoes.invalidar)
+                _sugestoes = sugestoes
+    return _sugestoes
@@ -0,0 +1,201 @@
+"""
+Métricas de desempenho do processo, no formato texto do Prometheus.
+
+- `biblioteca_requisicoes_total{rota, status}`: contador de requisições;
+- `biblioteca_requisicao_segundos{rota}`: histograma da latência total;
+- `biblioteca_etapa_segundos{etapa}`: histograma por etapa do caminho de
+  uma busca: `roteamento`, `conexao` (empréstimo do pool), `consulta`
+  (execute + fetch), `mapeamento` (linhas -> modelo) e `renderizacao`;
+- `biblioteca_buscas_ausentes_total`: buscas sem resultado respondidas
+  pelo cache de ausentes, sem ir ao banco;
+- `biblioteca_chamadas_coalescidas_total{operacao}`: requisições que
+  aproveitaram uma chamada igual já em andamento (`app.dao.coalescencia`).
+
+Registrar uma observação custa um `perf_counter()`, uma busca binária no
+vetor de limites e um lock por histograma. Com vários workers (pre-fork),
+cada processo tem seus próprios números. `METRICAS_ATIVAS=0` desliga a
+coleta.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+# Limites (em segundos) dos buckets de latência
+LIMITES_PADRAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_DESCRICOES = {
+    "biblioteca_requisicoes_total": ("counter", "Requisições HTTP atendidas, por rota e status."),
+    "biblioteca_requisicao_segundos": ("histogram", "Latência das requisições HTTP, por rota."),
+    "biblioteca_etapa_segundos": ("histogram", "Tempo gasto em cada etapa do atendimento."),
+    "biblioteca_buscas_ausentes_total": (
+        "counter", "Buscas por autor sem resultado respondidas pelo cache, sem consultar o banco.",
+    ),
+    "biblioteca_chamadas_coalescidas_total": (
+        "counter", "Requisições atendidas por uma chamada igual já em andamento, por operação.",
+    ),
+}
+
+# Rotas com parâmetro no caminho viram um rótulo fixo (cardinalidade limitada)
+_ROTAS_PREFIXO = (("/static/", "/static/*"), ("/livro/", "/livro/{isbn}"), ("/pesquisa", "/pesquisa"))
+_ROTAS_EXATAS = frozenset((
+    "/", "/index", "/api/livros", "/api/autocomplete", "/exportar", "/metrics", "/admin/consultas",
+))
+
+
+def rota_metrica(path: str) -> str:
+    """Rótulo `rota` para um caminho de requisição."""
+    if path in _ROTAS_EXATAS:
+        return path
+    for prefixo, rota in _ROTAS_PREFIXO:
+        if path.startswith(prefixo):
+            return rota
+    return "outras"
+
+
+class Histograma:
+    """Histograma de buckets fixos (contagens não cumulativas internamente)."""
+
+    __slots__ = ("limites", "contagens", "soma", "contagem", "_lock")
+
+    def __init__(self, limites=LIMITES_PADRAO):
+        self.limites = tuple(limites)
+        # Um bucket por limite e um último para +Inf
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+        self.contagem = 0
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float) -> None:
+        i = bisect_left(self.limites, valor)
+        with self._lock:
+            self.contagens[i] += 1
+            self.soma += valor
+            self.contagem += 1
+
+    def retrato(self):
+        """`(contagens cumulativas por limite + Inf, soma, contagem)`."""
+        with self._lock:
+            contagens, soma, contagem = list(self.contagens), self.soma, self.contagem
+        acumulado, cumulativas = 0, []
+        for c in contagens:
+            acumulado += c
+            cumulativas.append(acumulado)
+        return cumulativas, soma, contagem
+
+
+class Metricas:
+    """Registro de contadores e histogramas rotulados."""
+
+    def __init__(self, limites=LIMITES_PADRAO, ativo=True):
+        self.limites = limites
+        self.ativo = ativo
+        self._histogramas = {}
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    def _histograma(self, nome, rotulos):
+        chave = (nome, rotulos)
+        histograma = self._histogramas.get(chave)
+        if histograma is None:
+            with self._lock:
+                histograma = self._histogramas.setdefault(chave, Histograma(self.limites))
+        return histograma
+
+    def observar(self, nome: str, valor: float, **rotulos) -> None:
+        if self.ativo:
+            self._histograma(nome, tuple(sorted(rotulos.items()))).observar(valor)
+
+    def incrementar(self, nome: str, valor: int = 1, **rotulos) -> None:
+        if self.ativo:
+            chave = (nome, tuple(sorted(rotulos.items())))
+            with self._lock:
+                self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def medir(self, nome: str, **rotulos):
+        """Context manager que observa a duração do bloco em `nome`."""
+        if not self.ativo:
+            return nullcontext()
+        return self._medir(self._histograma(nome, tuple(sorted(rotulos.items()))))
+
+    @staticmethod
+    @contextmanager
+    def _medir(histograma):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            histograma.observar(time.perf_counter() - inicio)
+
+    def registrar_requisicao(self, rota: str, status: int, segundos: float) -> None:
+        self.incrementar("biblioteca_requisicoes_total", rota=rota, status=str(status))
+        self.observar("biblioteca_requisicao_segundos", segundos, rota=rota)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+
+    def exportar(self) -> str:
+        """Todas as métricas no formato texto do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            histogramas = sorted(self._histogramas.items(), key=lambda item: item[0])
+
+        linhas, cabecalhos = [], set()
+
+        def cabecalho(nome):
+            if nome not in cabecalhos:
+                cabecalhos.add(nome)
+                tipo, descricao = _DESCRICOES.get(nome, ("untyped", nome))
+                linhas.append(f"# HELP {nome} {descricao}")
+                linhas.append(f"# TYPE {nome} {tipo}")
+
+        for (nome, rotulos), valor in contadores:
+            cabecalho(nome)
+            linhas.append(f"{nome}{_rotulos(rotulos)} {valor}")
+
+        for (nome, rotulos), histograma in histogramas:
+            cabecalho(nome)
+            cumulativas, soma, contagem = histograma.retrato()
+            limites = [repr(float(limite)) for limite in histograma.limites] + ["+Inf"]
+            for limite, c in zip(limites, cumulativas):
+                linhas.append(f"{nome}_bucket{_rotulos(rotulos + (('le', limite),))} {c}")
+            linhas.append(f"{nome}_sum{_rotulos(rotulos)} {soma!r}")
+            linhas.append(f"{nome}_count{_rotulos(rotulos)} {contagem}")
+
+        return "\n".join(linhas) + "\n"
+
+
+def _rotulos(rotulos) -> str:
+    if not rotulos:
+        return ""
+    pares = ",".join(f'{k}="{_escapar(v)}"' for k, v in rotulos)
+    return "{" + pares + "}"
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+_metricas = None
+_metricas_lock = threading.Lock()
+
+
+def obter_metricas() -> Metricas:
+    """Registro de métricas do processo (`METRICAS_ATIVAS=0` desliga)."""
+    global _metricas
+    if _metricas is None:
+        with _metricas_lock:
+            if _metricas is None:
+                _metricas = Metricas(ativo=os.getenv("METRICAS_ATIVAS", "1") != "0")
+    return _metricas
+
+
+def medir_etapa(etapa: str):
+    """Atalho para `obter_metricas().medir("biblioteca_etapa_segundos", etapa=...)`."""
+    return obter_metricas().medir("biblioteca_etapa_segundos", etapa=etapa)
@@ -3,7 +3,93 @@
 # UnB-FGA-EPS-MDS
 
 class Livro:
+    # Sem __dict__ por instância: listagens grandes ocupam bem menos memória
+    __slots__ = ("isbn", "autor", "titulo")
+
     def __init__(self, isbn, autor, titulo):
         self.isbn = isbn
         self.autor = autor
-        self.titulo = titulo
\ No newline at end of file
+        self.titulo = titulo
+
+    # O ISBN é a chave primária do livro: identidade, igualdade e hash vêm dele
+    def __eq__(self, outro):
+        if not isinstance(outro, Livro):
+            return NotImplemented
+        return self.isbn == outro.isbn
+
+    def __hash__(self):
+        return hash(self.isbn)
+
+    def __repr__(self):
+        return f"Livro(isbn={self.isbn!r}, autor={self.autor!r}, titulo={self.titulo!r})"
+
+    # Limites das colunas de biblioteca.livros (ver init.sql)
+    MAX_ISBN = 20
+    MAX_TEXTO = 255
+
+    @classmethod
+    def validado(cls, isbn, autor, titulo):
+        """Cria um `Livro` a partir de dados externos (ex.: importação).
+
+        Remove espaços nas pontas e lança `ValueError` se algum campo estiver
+        vazio ou exceder o tamanho da coluna correspondente.
+        """
+        isbn = str(isbn or "").strip()
+        autor = str(autor or "").strip()
+        titulo = str(titulo or "").strip()
+        if not isbn or not autor or not titulo:
+            raise ValueError("isbn, autor e titulo são obrigatórios")
+        if len(isbn) > cls.MAX_ISBN:
+            raise ValueError(f"isbn com mais de {cls.MAX_ISBN} caracteres")
+        if len(autor) > cls.MAX_TEXTO or len(titulo) > cls.MAX_TEXTO:
+            raise ValueError(f"autor/titulo com mais de {cls.MAX_TEXTO} caracteres")
+        return cls(isbn=isbn, autor=autor, titulo=titulo)
+
+
+class LivroResultSet:
+    """Resultado de consulta guardado em colunas, com `Livro` criado sob demanda.
+
+    Recebe as linhas `(isbn, titulo, autor)` do cursor e as mantém como três
+    tuplas (uma por coluna). Objetos `Livro` só são criados no acesso por
+    índice ou iteração, então quem só precisa contar, fatiar ou ler uma
+    coluna não paga a alocação de um objeto por linha.
+    """
+
+    __slots__ = ("isbns", "titulos", "autores")
+
+    def __init__(self, isbns=(), titulos=(), autores=()):
+        if not len(isbns) == len(titulos) == len(autores):
+            raise ValueError("Colunas com tamanhos diferentes")
+        self.isbns = tuple(isbns)
+        self.titulos = tuple(titulos)
+        self.autores = tuple(autores)
+
+    @classmethod
+    def de_linhas(cls, linhas):
+        """Monta o resultado a partir de linhas `(isbn, titulo, autor)`."""
+        linhas = list(linhas)
+        if not linhas:
+            return cls()
+        return cls(*zip(*linhas))
+
+    def __len__(self):
+        return len(self.isbns)
+
+    def __bool__(self):
+        return bool(self.isbns)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return LivroResultSet(self.isbns[indice], self.titulos[indice], self.autores[indice])
+        return Livro(isbn=self.isbns[indice], titulo=self.titulos[indice], autor=self.autores[indice])
+
+    def __iter__(self):
+        for isbn, titulo, autor in zip(self.isbns, self.titulos, self.autores):
+            yield Livro(isbn=isbn, titulo=titulo, autor=autor)
+
+    def linhas(self):
+        """Itera as linhas como tuplas `(isbn, titulo, autor)`, sem criar `Livro`."""
+        return zip(self.isbns, self.titulos, self.autores)
+
+    def __repr__(self):
+        return f"LivroResultSet({len(self)} livros)"
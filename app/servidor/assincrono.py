@@ -0,0 +1,361 @@
+"""
+Servidor HTTP assíncrono (asyncio) do mvc-biblioteca.
+
+Implementa as rotas de `BibliotecaMVCHandler.do_GET` (exceto `/exportar`,
+que depende de streaming):
+- `/static/*`: arquivos estáticos;
+- `/pesquisa?autor=...`: busca de livros via `listar_livro_async`;
+- `/livro/<isbn>`: dados de um livro pela chave primária;
+- `/api/livros?autor=...&isbn=...`: busca em lote, em JSON;
+- `/api/autocomplete?q=...`: sugestões de autores e títulos por prefixo;
+- `/metrics`: métricas do processo (Prometheus);
+- `/admin/consultas`: perfil das consultas do DAO (com `PERFIL_CONSULTAS=1`);
+- `/` ou `/index`: página inicial.
+
+Cada conexão é uma *coroutine*, não uma thread: milhares de clientes
+ociosos em keep-alive (HTTP/1.1) custam apenas memória. O acesso ao banco,
+que é bloqueante no psycopg2, é feito em threads do executor do event loop.
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlparse
+
+from app.metricas import CONTENT_TYPE as METRICAS_CONTENT_TYPE
+from app.metricas import obter_metricas, rota_metrica
+from app.servidor.compressao import compressivel, negociar
+from app.servidor.estaticos import CACHE_CONTROL, obter_estaticos
+from app.view.api_livros import JSON
+from app.view.templates import obter_templates
+
+HTML = 'text/html; charset=utf-8'
+
+# Limites de proteção do parser
+MAX_LINHA = 8 * 1024
+MAX_CABECALHOS = 100
+# Corpo de requisição descartado para manter a conexão; acima disso, fecha
+MAX_CORPO = 64 * 1024
+
+
+class Resposta:
+    """Resposta HTTP já pronta para serialização."""
+
+    __slots__ = ('status', 'corpo', 'tipo', 'cabecalhos', 'arquivo')
+
+    def __init__(self, status: int, corpo: bytes, tipo: str = HTML, cabecalhos=(), arquivo=None):
+        self.status = status
+        self.corpo = corpo
+        self.tipo = tipo
+        # Cabeçalhos extras como pares (nome, valor)
+        self.cabecalhos = list(cabecalhos)
+        # `Recurso` estático `em_disco`: o corpo é enviado do arquivo
+        self.arquivo = arquivo
+
+
+def _erro(status: int, mensagem: str) -> Resposta:
+    return Resposta(status, f'<h1>{status}</h1><p>{mensagem}</p>'.encode('utf-8'))
+
+
+async def despachar(metodo: str, alvo: str, cabecalhos: dict | None = None) -> Resposta:
+    """Roteia uma requisição e devolve a `Resposta` correspondente.
+
+    `cabecalhos` traz os cabeçalhos da requisição com nomes em minúsculas.
+    """
+    inicio = time.perf_counter()
+    metricas = obter_metricas()
+    parsed = urlparse(alvo)
+    rota = rota_metrica(parsed.path)
+    metricas.observar('biblioteca_etapa_segundos', time.perf_counter() - inicio, etapa='roteamento')
+    status = 0
+    try:
+        resposta = await _rotear(metodo, parsed, cabecalhos or {})
+        status = resposta.status
+        return resposta
+    finally:
+        metricas.registrar_requisicao(rota, status, time.perf_counter() - inicio)
+
+
+async def _rotear(metodo: str, parsed, cabecalhos: dict) -> Resposta:
+    if metodo not in ('GET', 'HEAD'):
+        return _erro(501, f'Método não suportado ({metodo})')
+
+    path = parsed.path
+
+    if path == '/metrics':
+        return Resposta(200, obter_metricas().exportar().encode('utf-8'), METRICAS_CONTENT_TYPE)
+
+    if path == '/admin/consultas':
+        from app.controller.admin_controller import relatorio_consultas
+
+        limpar = parse_qs(parsed.query).get('limpar', ['0'])[0] == '1'
+        corpo, status = relatorio_consultas(limpar)
+        return _comprimida(Resposta(status, corpo.encode('utf-8'), JSON), cabecalhos)
+
+    if path.startswith('/static/'):
+        estaticos = obter_estaticos()
+        recurso = estaticos.em_memoria(path)
+        if recurso is None:
+            # Falta no cache: leitura do disco fora do event loop
+            recurso = await asyncio.to_thread(estaticos.obter, path)
+        if recurso is None:
+            return _erro(404, 'Arquivo estático não encontrado')
+        corpo, codificacao, etag = recurso.representacao(cabecalhos.get('accept-encoding'))
+        validadores = [
+            ('ETag', etag),
+            ('Last-Modified', recurso.last_modified),
+            ('Cache-Control', CACHE_CONTROL),
+        ]
+        if recurso.compressivel:
+            validadores.append(('Vary', 'Accept-Encoding'))
+        if recurso.nao_modificado(cabecalhos.get('if-none-match'), cabecalhos.get('if-modified-since'), etag):
+            return Resposta(304, b'', recurso.tipo, validadores)
+        if recurso.em_disco:
+            return Resposta(200, b'', recurso.tipo, validadores, arquivo=recurso)
+        if codificacao:
+            validadores.append(('Content-Encoding', codificacao))
+        return Resposta(200, corpo, recurso.tipo, validadores)
+
+    if path.startswith('/pesquisa'):
+        query = parse_qs(parsed.query)
+        autor = query.get('autor', [''])[0]
+        apos_titulo = query.get('apos_titulo', [None])[0]
+        apos_isbn = query.get('apos_isbn', [None])[0]
+
+        # Import tardio, como em main.py
+        from app.controller.livro_controller import listar_livro_async
+
+        resultado = await listar_livro_async(autor, apos_titulo, apos_isbn)
+        if isinstance(resultado, tuple):
+            html, status = resultado
+        else:
+            html, status = resultado, 200
+        return _comprimida(Resposta(status, html.encode('utf-8')), cabecalhos)
+
+    if path.startswith('/livro/'):
+        isbn = unquote(path[len('/livro/'):])
+        if not isbn or '/' in isbn:
+            return _erro(404, 'Página não encontrada')
+
+        from app.controller.livro_controller import exibir_livro_async
+
+        resultado = await exibir_livro_async(isbn)
+        html, status = resultado if isinstance(resultado, tuple) else (resultado, 200)
+        return _comprimida(Resposta(status, html.encode('utf-8')), cabecalhos)
+
+    if path == '/api/livros':
+        query = parse_qs(parsed.query)
+
+        from app.controller.livro_controller import buscar_livros_api_async
+
+        corpo, status = await buscar_livros_api_async(
+            query.get('autor', []), query.get('isbn', []), query.get('limite', [None])[0]
+        )
+        return _comprimida(Resposta(status, corpo.encode('utf-8'), JSON), cabecalhos)
+
+    if path == '/api/autocomplete':
+        query = parse_qs(parsed.query)
+
+        from app.controller.livro_controller import autocompletar_async
+
+        corpo, status = await autocompletar_async(
+            query.get('q', [''])[0], query.get('limite', [None])[0]
+        )
+        return _comprimida(Resposta(status, corpo.encode('utf-8'), JSON), cabecalhos)
+
+    if path in ('/', '/index'):
+        try:
+            template = obter_templates().obter('index.html')
+        except FileNotFoundError:
+            return _erro(404, 'Template não encontrado')
+        return _comprimida(
+            Resposta(200, template.renderizar()), cabecalhos,
+            memorizar=template.estatico is not None,
+        )
+
+    return _erro(404, 'Página não encontrada')
+
+
+def _comprimida(resposta: Resposta, cabecalhos: dict, memorizar: bool = False) -> Resposta:
+    """Aplica gzip/deflate conforme `Accept-Encoding` (ver `negociar`)."""
+    corpo, codificacao = negociar(
+        resposta.corpo, resposta.tipo, cabecalhos.get('accept-encoding'), memorizar=memorizar
+    )
+    if compressivel(resposta.tipo):
+        resposta.cabecalhos.append(('Vary', 'Accept-Encoding'))
+    if codificacao:
+        resposta.corpo = corpo
+        resposta.cabecalhos.append(('Content-Encoding', codificacao))
+    return resposta
+
+
+def _manter_conexao(versao: str, cabecalhos: dict) -> bool:
+    """Regras de keep-alive do HTTP/1.1 (padrão) e HTTP/1.0 (opt-in)."""
+    connection = cabecalhos.get('connection', '').lower()
+    if versao == 'HTTP/1.1':
+        return connection != 'close'
+    return connection == 'keep-alive'
+
+
+def _serializar(resposta: Resposta, manter: bool, incluir_corpo: bool) -> bytes:
+    motivo = HTTPStatus(resposta.status).phrase
+    linhas = [f'HTTP/1.1 {resposta.status} {motivo}']
+    if resposta.status != 304:
+        # 304 não tem corpo: tipo e tamanho seriam os da representação em cache
+        tamanho = len(resposta.corpo) if resposta.arquivo is None else resposta.arquivo.tamanho_arquivo
+        linhas += [f'Content-Type: {resposta.tipo}', f'Content-Length: {tamanho}']
+    linhas.append('Connection: keep-alive' if manter else 'Connection: close')
+    linhas += [f'{nome}: {valor}' for nome, valor in resposta.cabecalhos]
+    cabecalho = ('\r\n'.join(linhas) + '\r\n\r\n').encode('latin-1')
+    return cabecalho + resposta.corpo if incluir_corpo else cabecalho
+
+
+async def _enviar_arquivo(writer, recurso) -> None:
+    """Envia um estático grande do disco (`sendfile` quando o SO permite)."""
+    arquivo = await asyncio.to_thread(open, recurso.caminho, 'rb')
+    try:
+        await asyncio.get_running_loop().sendfile(
+            writer.transport, arquivo, count=recurso.tamanho_arquivo
+        )
+    finally:
+        arquivo.close()
+
+
+class ServidorAssincrono:
+    """Aceita conexões com `asyncio.start_server` e atende em keep-alive."""
+
+    def __init__(self, host: str, porta: int, timeout_ocioso: float = 15.0):
+        self.host = host
+        self.porta = porta
+        self.timeout_ocioso = timeout_ocioso
+        self._servidor = None
+        self._parando = False
+        # writer -> True enquanto uma requisição está sendo processada
+        self._conexoes = {}
+
+    async def iniciar(self) -> None:
+        self._servidor = await asyncio.start_server(
+            self._atender, self.host, self.porta, limit=MAX_LINHA
+        )
+        self.porta = self._servidor.sockets[0].getsockname()[1]
+
+    async def _ler_requisicao(self, reader):
+        """Lê linha de requisição e cabeçalhos; `None` em EOF/ociosidade."""
+        try:
+            linha = await asyncio.wait_for(reader.readline(), self.timeout_ocioso)
+        except (asyncio.TimeoutError, asyncio.LimitOverrunError, ValueError, ConnectionError):
+            return None
+        if not linha.strip():
+            return None
+        partes = linha.decode('latin-1').split()
+        if len(partes) != 3:
+            raise ValueError('Linha de requisição inválida')
+
+        cabecalhos = {}
+        for _ in range(MAX_CABECALHOS + 1):
+            bruta = await asyncio.wait_for(reader.readline(), self.timeout_ocioso)
+            if bruta in (b'\r\n', b'\n', b''):
+                break
+            nome, _, valor = bruta.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+        else:
+            raise ValueError('Cabeçalhos demais')
+        return partes, cabecalhos
+
+    async def _descartar_corpo(self, reader, cabecalhos: dict) -> bool:
+        """Lê e descarta o corpo da requisição, que nenhuma rota usa.
+
+        Sem isso, os bytes do corpo seriam lidos como a próxima requisição
+        da conexão. Devolve `False` quando a conexão não pode continuar:
+        corpo `chunked` ou maior que `MAX_CORPO`.
+        """
+        if 'transfer-encoding' in cabecalhos:
+            return False
+        tamanho = int(cabecalhos.get('content-length', '0'))
+        if tamanho < 0:
+            raise ValueError('Content-Length inválido')
+        if tamanho > MAX_CORPO:
+            return False
+        if tamanho:
+            await asyncio.wait_for(reader.readexactly(tamanho), self.timeout_ocioso)
+        return True
+
+    async def _atender(self, reader, writer) -> None:
+        self._conexoes[writer] = False
+        try:
+            while not self._parando:
+                try:
+                    requisicao = await self._ler_requisicao(reader)
+                    if requisicao is None:
+                        break
+                    (metodo, alvo, versao), cabecalhos = requisicao
+                    corpo_descartado = await self._descartar_corpo(reader, cabecalhos)
+                except (ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    writer.write(_serializar(_erro(400, 'Requisição inválida'), False, True))
+                    await writer.drain()
+                    break
+
+                self._conexoes[writer] = True
+                try:
+                    resposta = await despachar(metodo, alvo, cabecalhos)
+                except Exception:
+                    logging.exception('Erro ao processar %s %s', metodo, alvo)
+                    resposta = _erro(500, 'Erro interno')
+                manter = corpo_descartado and _manter_conexao(versao, cabecalhos) and not self._parando
+                writer.write(_serializar(resposta, manter, metodo != 'HEAD'))
+                if resposta.arquivo is not None and metodo != 'HEAD':
+                    await _enviar_arquivo(writer, resposta.arquivo)
+                await writer.drain()
+                self._conexoes[writer] = False
+                if not manter:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._conexoes.pop(writer, None)
+            writer.close()
+
+    async def parar(self, prazo: float = 10.0) -> None:
+        """Para de aceitar conexões, fecha as ociosas e drena as ativas."""
+        self._parando = True
+        if self._servidor is not None:
+            self._servidor.close()
+        for writer, ocupada in list(self._conexoes.items()):
+            if not ocupada:
+                writer.close()
+        limite = asyncio.get_running_loop().time() + prazo
+        while self._conexoes and asyncio.get_running_loop().time() < limite:
+            await asyncio.sleep(0.05)
+
+
+async def _executar(host: str, porta: int) -> None:
+    servidor = ServidorAssincrono(host, porta)
+    await servidor.iniciar()
+
+    # Abre o pool de conexões (e carrega o índice em memória, se ativo) fora
+    # do event loop; falhas não impedem o start
+    from app.dao.db_connection import fechar_pool, obter_roteador
+    from app.dao.indice_livros import fechar_indice, obter_indice
+    try:
+        await asyncio.to_thread(obter_roteador)
+        await asyncio.to_thread(obter_indice)
+    except Exception:
+        logging.exception('Pool de conexões indisponível na inicialização.')
+
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sinal in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sinal, parar.set)
+
+    await parar.wait()
+    await servidor.parar()
+    await asyncio.to_thread(fechar_indice)
+    await asyncio.to_thread(fechar_pool)
+
+
+def executar(endereco) -> None:
+    """Sobe o servidor assíncrono até receber SIGTERM/SIGINT."""
+    host, porta = endereco
+    asyncio.run(_executar(host, porta))
@@ -0,0 +1,108 @@
+"""
+Negociação de `Content-Encoding` (gzip/deflate) para respostas HTTP.
+
+- Corpos dinâmicos (ex.: `/pesquisa`) só são comprimidos acima de
+  `COMPRESSAO_MINIMO` bytes (padrão 1024), onde o ganho compensa a CPU;
+- Corpos que não mudam (estáticos, templates sem variáveis) são comprimidos
+  uma única vez e reutilizados (`negociar(..., memorizar=True)`);
+- Só tipos textuais são comprimidos: imagens e binários já vêm comprimidos.
+"""
+
+import functools
+import gzip
+import os
+import zlib
+
+MINIMO = int(os.getenv("COMPRESSAO_MINIMO", "1024"))
+NIVEL = int(os.getenv("COMPRESSAO_NIVEL", "6"))
+
+# Em ordem de preferência do servidor quando o cliente aceita ambas
+CODIFICACOES = ("gzip", "deflate")
+
+_TIPOS_TEXTUAIS = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def compressivel(content_type: str | None) -> bool:
+    """Se vale a pena comprimir corpos deste `Content-Type`."""
+    return bool(content_type) and content_type.startswith(_TIPOS_TEXTUAIS)
+
+
+def escolher_codificacao(accept_encoding: str | None) -> str | None:
+    """Escolhe gzip ou deflate a partir de `Accept-Encoding` (com valores q).
+
+    Devolve `None` quando o cliente não aceita nenhuma das duas.
+    """
+    if not accept_encoding:
+        return None
+    aceitas = {}
+    for item in accept_encoding.split(","):
+        nome, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        aceitas[nome.strip().lower()] = q
+
+    coringa = aceitas.get("*", 0.0)
+    melhor, melhor_q = None, 0.0
+    for codificacao in CODIFICACOES:
+        q = aceitas.get(codificacao, coringa)
+        if q > melhor_q:
+            melhor, melhor_q = codificacao, q
+    return melhor
+
+
+def comprimir(corpo: bytes, codificacao: str) -> bytes:
+    """Comprime `corpo`; `deflate` no HTTP é o formato zlib (RFC 1950)."""
+    if codificacao == "gzip":
+        # mtime fixo: o mesmo corpo gera sempre os mesmos bytes
+        return gzip.compress(corpo, compresslevel=NIVEL, mtime=0)
+    if codificacao == "deflate":
+        return zlib.compress(corpo, NIVEL)
+    raise ValueError(f"Codificação não suportada: {codificacao}")
+
+
+def compressor(codificacao: str):
+    """Compressor incremental (`compress()`/`flush()`) para respostas em streaming.
+
+    Gera o mesmo formato de `comprimir()`: gzip (wbits=31) ou zlib (deflate).
+    """
+    if codificacao == "gzip":
+        return zlib.compressobj(NIVEL, zlib.DEFLATED, 31)
+    if codificacao == "deflate":
+        return zlib.compressobj(NIVEL)
+    raise ValueError(f"Codificação não suportada: {codificacao}")
+
+
+@functools.lru_cache(maxsize=128)
+def _comprimir_memorizado(corpo: bytes, codificacao: str) -> bytes:
+    # `bytes` guarda o próprio hash: repetir a chamada com o mesmo objeto é O(1)
+    return comprimir(corpo, codificacao)
+
+
+def negociar(corpo: bytes, content_type: str | None, accept_encoding: str | None,
+             minimo: int | None = None, memorizar: bool = False) -> tuple[bytes, str | None]:
+    """Devolve `(corpo_final, codificacao)`; `codificacao` é `None` sem compressão.
+
+    A versão comprimida só é usada se for de fato menor que a original.
+    """
+    minimo = MINIMO if minimo is None else minimo
+    if len(corpo) < minimo or not compressivel(content_type):
+        return corpo, None
+    codificacao = escolher_codificacao(accept_encoding)
+    if codificacao is None:
+        return corpo, None
+    comprimido = (_comprimir_memorizado if memorizar else comprimir)(corpo, codificacao)
+    if len(comprimido) >= len(corpo):
+        return corpo, None
+    return comprimido, codificacao
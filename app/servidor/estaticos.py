@@ -0,0 +1,250 @@
+"""
+Cache em memória dos arquivos estáticos.
+
+Cada arquivo servido em `/static/*` é lido uma vez e mantido como um
+`Recurso` (bytes, MIME, ETag forte e `mtime`). O total guardado respeita um
+orçamento de memória (`ESTATICOS_ORCAMENTO`, em bytes), com despejo LRU;
+arquivos maiores que o orçamento não são carregados: são enviados do disco
+em blocos a cada requisição, com ETag derivado de tamanho e `mtime`.
+
+`Recurso.nao_modificado()` implementa as requisições condicionais
+(`If-None-Match` / `If-Modified-Since`) que permitem responder 304.
+Arquivos textuais são comprimidos (gzip/deflate) sob demanda: cada variante
+é gerada na primeira requisição que a aceita, reaproveitada nas seguintes e
+tem ETag própria.
+"""
+
+import hashlib
+import os
+import posixpath
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+from app.servidor.compressao import comprimir, compressivel, escolher_codificacao
+from app.servidor.recursos import STATIC_ROOT, localizar_estatico, tipo_mime
+
+
+class Recurso:
+    """Arquivo estático pronto para envio, com seus validadores HTTP."""
+
+    __slots__ = (
+        "corpo", "tipo", "etag", "mtime", "last_modified", "caminho", "tamanho_arquivo",
+        "variantes", "ao_crescer",
+    )
+
+    def __init__(self, caminho, corpo: bytes | None, mtime: float, tamanho_arquivo: int | None = None):
+        self.caminho = caminho
+        self.corpo = corpo
+        self.tipo = tipo_mime(caminho)
+        if corpo is None:
+            # Enviado do disco: o ETag não pode depender de ler o conteúdo
+            self.tamanho_arquivo = tamanho_arquivo
+            self.etag = f'"{tamanho_arquivo:x}-{int(mtime * 1_000_000):x}"'
+        else:
+            self.tamanho_arquivo = len(corpo)
+            # ETag forte: muda sempre que o conteúdo muda
+            self.etag = '"' + hashlib.blake2b(corpo, digest_size=16).hexdigest() + '"'
+        self.mtime = mtime
+        self.last_modified = formatdate(mtime, usegmt=True)
+        # codificação -> bytes comprimidos, ou `None` quando não compensa
+        self.variantes = {}
+        # Avisado a cada variante nova (contabilidade do `CacheEstaticos`)
+        self.ao_crescer = None
+
+    @property
+    def tamanho(self) -> int:
+        """Bytes ocupados pelo corpo e pelas variantes já comprimidas."""
+        return len(self.corpo) + sum(len(v) for v in self.variantes.values() if v)
+
+    @property
+    def em_disco(self) -> bool:
+        """Conteúdo fora da memória: envie `caminho` em blocos (`blocos()`)."""
+        return self.corpo is None
+
+    @property
+    def compressivel(self) -> bool:
+        return not self.em_disco and compressivel(self.tipo)
+
+    def blocos(self, tamanho: int = 64 * 1024):
+        """Conteúdo de um recurso `em_disco`, lido em blocos."""
+        with open(self.caminho, "rb") as arquivo:
+            while bloco := arquivo.read(tamanho):
+                yield bloco
+
+    def representacao(self, accept_encoding: str | None) -> tuple[bytes, str | None, str]:
+        """`(corpo, codificacao, etag)` da variante aceita pelo cliente."""
+        codificacao = escolher_codificacao(accept_encoding) if self.compressivel else None
+        variante = self._variante(codificacao) if codificacao else None
+        if variante is None:
+            return self.corpo, None, self.etag
+        # ETag forte precisa diferir entre representações do mesmo recurso
+        return variante, codificacao, f'{self.etag[:-1]}-{codificacao}"'
+
+    def _variante(self, codificacao: str) -> bytes | None:
+        """Variante comprimida, gerada no primeiro pedido; `None` se não ficar menor."""
+        if codificacao in self.variantes:
+            return self.variantes[codificacao]
+        comprimido = comprimir(self.corpo, codificacao)
+        variante = comprimido if len(comprimido) < len(self.corpo) else None
+        # Duas threads podem comprimir ao mesmo tempo: só a primeira é guardada
+        guardada = self.variantes.setdefault(codificacao, variante)
+        if guardada is variante and variante is not None and self.ao_crescer is not None:
+            self.ao_crescer()
+        return guardada
+
+    def nao_modificado(self, if_none_match: str | None, if_modified_since: str | None,
+                       etag: str | None = None) -> bool:
+        """`True` quando o cliente já tem esta versão (resposta 304).
+
+        `etag` é o da representação escolhida (padrão: a não comprimida).
+        Como manda a RFC 9110, `If-Modified-Since` só é considerado quando
+        não há `If-None-Match`.
+        """
+        if if_none_match:
+            if if_none_match.strip() == "*":
+                return True
+            etags = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+            return (etag or self.etag) in etags
+        if if_modified_since:
+            try:
+                desde = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            # Datas HTTP têm resolução de segundos
+            return int(self.mtime) <= desde
+        return False
+
+
+def _normalizar(path: str) -> str:
+    """`/static/./css//a.css` -> `css/a.css` (sem acesso a disco)."""
+    return posixpath.normpath(path.removeprefix("/static/"))
+
+
+class CacheEstaticos:
+    """Cache LRU de `Recurso` por caminho relativo, limitado em bytes."""
+
+    def __init__(self, raiz=STATIC_ROOT, orcamento=8 * 1024 * 1024, recarregar=False):
+        self.raiz = raiz
+        self._raiz_resolvida = Path(raiz).resolve()
+        self.orcamento = orcamento
+        self.recarregar = recarregar
+        self._recursos = OrderedDict()
+        # Bytes contabilizados por caminho (o recurso cresce com as variantes)
+        self._contados = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_em_uso(self) -> int:
+        return self._bytes
+
+    def em_memoria(self, path: str) -> Recurso | None:
+        """Recurso já em cache, sem nenhum acesso a disco (ou `None`).
+
+        No modo de recarga sempre devolve `None`, pois é preciso checar o
+        `mtime`; use `obter()` nesse caso.
+        """
+        if self.recarregar:
+            return None
+        return self._consultar(_normalizar(path))
+
+    def obter(self, path: str) -> Recurso | None:
+        """Recurso de `/static/<rel>`, ou `None` se não existir (404).
+
+        A chave do cache é o caminho do arquivo, resolvido, relativo à raiz:
+        `/static/./css/a.css`, `/static/css//a.css` e links simbólicos para o
+        mesmo arquivo dividem uma única entrada.
+        """
+        chave = _normalizar(path)
+        recurso = self._consultar(chave)
+        if recurso is None:
+            arquivo = localizar_estatico(chave, self.raiz)
+            if arquivo is None:
+                return None
+            chave = arquivo.relative_to(self._raiz_resolvida).as_posix()
+            recurso = self._consultar(chave)
+        if recurso is not None:
+            if not self.recarregar:
+                return recurso
+            try:
+                if recurso.caminho.stat().st_mtime == recurso.mtime:
+                    return recurso
+            except FileNotFoundError:
+                self._remover(chave)
+                return None
+            arquivo = recurso.caminho
+
+        estado = arquivo.stat()
+        if estado.st_size > self.orcamento:
+            # Não cabe no cache: nem é carregado, sai do disco a cada envio
+            return Recurso(arquivo, None, estado.st_mtime, estado.st_size)
+        recurso = Recurso(arquivo, arquivo.read_bytes(), estado.st_mtime)
+        self._guardar(chave, recurso)
+        return recurso
+
+    def _consultar(self, chave: str) -> Recurso | None:
+        with self._lock:
+            recurso = self._recursos.get(chave)
+            if recurso is not None:
+                self._recursos.move_to_end(chave)
+            return recurso
+
+    def _guardar(self, path: str, recurso: Recurso) -> None:
+        tamanho = recurso.tamanho
+        if tamanho > self.orcamento:
+            return
+        recurso.ao_crescer = lambda: self._crescer(path, recurso)
+        with self._lock:
+            self._descartar(path)
+            self._recursos[path] = recurso
+            self._contados[path] = tamanho
+            self._bytes += tamanho
+            self._despejar()
+
+    def _crescer(self, path: str, recurso: Recurso) -> None:
+        """Contabiliza uma variante comprimida nova de um recurso em cache."""
+        with self._lock:
+            if self._recursos.get(path) is not recurso:
+                return
+            tamanho = recurso.tamanho
+            self._bytes += tamanho - self._contados[path]
+            self._contados[path] = tamanho
+            self._despejar()
+
+    def _remover(self, path: str) -> None:
+        with self._lock:
+            self._descartar(path)
+
+    # Os dois abaixo são chamados com `_lock` adquirido
+
+    def _descartar(self, path: str) -> None:
+        if self._recursos.pop(path, None) is not None:
+            self._bytes -= self._contados.pop(path)
+
+    def _despejar(self) -> None:
+        while self._bytes > self.orcamento:
+            path, _ = self._recursos.popitem(last=False)
+            self._bytes -= self._contados.pop(path)
+
+
+# Cabeçalho Cache-Control enviado com os estáticos
+CACHE_CONTROL = f"public, max-age={int(os.getenv('ESTATICOS_MAX_AGE', '3600'))}"
+
+_cache = None
+
+
+def obter_estaticos() -> CacheEstaticos:
+    """Cache de estáticos do processo.
+
+    - `ESTATICOS_ORCAMENTO`: bytes máximos em memória (padrão 8 MiB);
+    - `ESTATICOS_RECARREGAR=1`: revalida o `mtime` a cada acesso (desenvolvimento).
+    """
+    global _cache
+    if _cache is None:
+        _cache = CacheEstaticos(
+            orcamento=int(os.getenv("ESTATICOS_ORCAMENTO", str(8 * 1024 * 1024))),
+            recarregar=os.getenv("ESTATICOS_RECARREGAR", "0") == "1",
+        )
+    return _cache
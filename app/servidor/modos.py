@@ -0,0 +1,135 @@
+"""
+Modos de execução do servidor HTTP do mvc-biblioteca.
+
+- `simples`: um único `HTTPServer` (uma requisição por vez, como antes), sem
+  keep-alive: cada conexão é fechada após a resposta;
+- `threads`: `ServidorThreadPool`, que atende cada conexão em um pool fixo de
+  threads, bloqueando o `accept` quando todas estão ocupadas;
+- `processos` (pre-fork): o processo pai abre o socket de escuta e cria N
+  workers com `os.fork()`; todos aceitam conexões do mesmo socket e cada um
+  pode usar seu próprio pool de threads.
+
+Em todos os modos, SIGTERM/SIGINT param de aceitar conexões e aguardam as
+requisições em andamento terminarem antes de encerrar.
+"""
+
+import logging
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, ThreadingHTTPServer
+
+from app.dao.db_connection import fechar_pool
+from app.dao.indice_livros import fechar_indice, obter_indice
+
+
+class ServidorThreadPool(ThreadingHTTPServer):
+    """`ThreadingHTTPServer` com número limitado de threads de atendimento.
+
+    O `ThreadingHTTPServer` padrão cria uma thread por conexão, sem limite.
+    Aqui as conexões são entregues a um `ThreadPoolExecutor` de `threads`
+    workers; um semáforo impede que a fila cresça sem controle, deixando o
+    excedente no *backlog* do kernel.
+    """
+
+    daemon_threads = True
+    # Cada conexão tem sua thread: keep-alive não bloqueia as demais
+    # (ver `BibliotecaMVCHandler.end_headers`)
+    conexoes_persistentes = True
+
+    def __init__(self, server_address, handler_class, threads=8, bind_and_activate=True):
+        self.threads = threads
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="biblioteca-http")
+        self._vagas = threading.BoundedSemaphore(threads)
+        super().__init__(server_address, handler_class, bind_and_activate)
+
+    def process_request(self, request, client_address):
+        self._vagas.acquire()
+        try:
+            self._executor.submit(self._atender, request, client_address)
+        except RuntimeError:
+            # Executor já encerrado: recusa a conexão sem atendê-la
+            self._vagas.release()
+            self.shutdown_request(request)
+
+    def _atender(self, request, client_address):
+        try:
+            self.process_request_thread(request, client_address)
+        finally:
+            self._vagas.release()
+
+    def server_close(self):
+        """Fecha o socket e aguarda as requisições em andamento (drenagem)."""
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def criar_servidor(endereco, handler_class, threads=1, bind_and_activate=True):
+    """Cria o servidor adequado ao número de threads pedido."""
+    if threads > 1:
+        return ServidorThreadPool(endereco, handler_class, threads, bind_and_activate)
+    return HTTPServer(endereco, handler_class, bind_and_activate)
+
+
+def _instalar_desligamento(httpd) -> None:
+    """Faz SIGTERM/SIGINT encerrarem `serve_forever` sem matar requisições."""
+    def _parar(signum, frame):
+        # `shutdown()` bloqueia até o loop terminar; não pode rodar na thread dele
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _parar)
+    signal.signal(signal.SIGINT, _parar)
+
+
+def _servir_ate_parar(httpd) -> None:
+    _instalar_desligamento(httpd)
+    # Com BUSCA_BACKEND=memoria, carrega o índice antes da primeira requisição
+    # (no pre-fork, já no filho: cada worker tem o seu)
+    obter_indice()
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+        fechar_indice()
+        fechar_pool()
+
+
+def executar(endereco, handler_class, workers=1, threads=1) -> None:
+    """Executa o servidor no modo definido por `workers` e `threads`."""
+    if workers <= 1:
+        _servir_ate_parar(criar_servidor(endereco, handler_class, threads))
+        return
+
+    # Pre-fork: o socket é aberto uma vez no pai e herdado pelos filhos.
+    # O pool de conexões do banco é criado de forma preguiçosa, já no filho.
+    httpd = criar_servidor(endereco, handler_class, threads)
+    filhos = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - executa no processo filho
+            codigo = 0
+            try:
+                _servir_ate_parar(httpd)
+            except Exception:
+                logging.exception("Worker %s encerrou com erro.", os.getpid())
+                codigo = 1
+            finally:
+                os._exit(codigo)
+        filhos.append(pid)
+
+    # O pai não atende requisições: apenas repassa sinais e espera os filhos
+    def _repassar(signum, frame):
+        for pid in filhos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _repassar)
+    signal.signal(signal.SIGINT, _repassar)
+    try:
+        for pid in filhos:
+            os.waitpid(pid, 0)
+    finally:
+        httpd.server_close()
@@ -0,0 +1,77 @@
+"""
+Localização de templates e arquivos estáticos, compartilhada entre o
+`BibliotecaMVCHandler` (main.py) e o servidor assíncrono.
+"""
+
+import functools
+import mimetypes
+import os
+from pathlib import Path
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+
+# Raiz dos arquivos estáticos (ex.: CSS, JS, imagens). Mantida fora da pasta
+# de templates para separação de responsabilidades.
+STATIC_ROOT = APP_ROOT / "static"
+
+
+def resolver_templates_dir() -> Path:
+    """Resolve o diretório de templates com múltiplos fallbacks.
+
+    Ordem de resolução:
+    1) Variável de ambiente `TEMPLATES_DIR` (útil em testes e containers);
+    2) Caminho '/app/app/templates' (compatível com layout em Docker);
+    3) Pasta 'app/templates' do projeto.
+
+    O resultado é memorizado por valor de `TEMPLATES_DIR`, evitando
+    `exists()`/`resolve()` (syscalls) a cada requisição.
+    """
+    return _resolver_templates_dir(os.getenv('TEMPLATES_DIR'))
+
+
+@functools.lru_cache(maxsize=8)
+def _resolver_templates_dir(env_dir: str | None) -> Path:
+    if env_dir:
+        return Path(env_dir).resolve()
+
+    # Fallback para um caminho usado frequentemente em imagens Docker
+    cand = Path('/app/app/templates')
+    if cand.exists():
+        return cand.resolve()
+
+    # Por fim, usa a pasta de templates do projeto
+    return (APP_ROOT / 'templates').resolve()
+
+
+def caminho_template(filename: str, templates_dir: Path | None = None) -> Path:
+    """Devolve o caminho de um template, aceitando apenas o *nome* do arquivo.
+
+    Lança `FileNotFoundError` se o template não existir.
+    """
+    templates_dir = templates_dir or resolver_templates_dir()
+    # Usa somente o nome do arquivo para evitar que subcaminhos escapem
+    safe_name = Path(filename).name
+    path = (templates_dir / safe_name).resolve()
+    if not path.is_file():
+        raise FileNotFoundError(path)
+    return path
+
+
+def localizar_estatico(path: str, static_root: Path = STATIC_ROOT) -> Path | None:
+    """Resolve `/static/<rel>` dentro de `static_root`, ou `None`.
+
+    Garante que o caminho final esteja *dentro* da raiz para evitar
+    *path traversal* (ex.: `../../etc/passwd`).
+    """
+    rel = path[len('/static/'):] if path.startswith('/static/') else path
+    wanted = (static_root / rel).resolve()
+    root = static_root.resolve()
+    if wanted.is_file() and wanted.is_relative_to(root):
+        return wanted
+    return None
+
+
+def tipo_mime(path: Path) -> str:
+    """MIME do arquivo pela extensão, com fallback binário."""
+    mime, _ = mimetypes.guess_type(str(path))
+    return mime or 'application/octet-stream'
@@ -0,0 +1,57 @@
+// Sugestões de autores enquanto se digita, via /api/autocomplete.
+// - espera uma pausa curta na digitação antes de consultar (debounce);
+// - cancela a consulta anterior ainda em andamento (AbortController);
+// - guarda as respostas por prefixo, então apagar e redigitar não consulta de novo.
+(function () {
+  "use strict";
+
+  var ESPERA_MS = 120;
+  var campo = document.querySelector("input[data-autocompletar]");
+  var lista = campo && document.getElementById(campo.getAttribute("list"));
+  if (!campo || !lista || !window.fetch) {
+    return;
+  }
+
+  var respostas = new Map();
+  var temporizador = null;
+  var emAndamento = null;
+
+  function preencher(autores) {
+    lista.textContent = "";
+    autores.forEach(function (autor) {
+      var opcao = document.createElement("option");
+      opcao.value = autor;
+      lista.appendChild(opcao);
+    });
+  }
+
+  function consultar(prefixo) {
+    if (respostas.has(prefixo)) {
+      preencher(respostas.get(prefixo));
+      return;
+    }
+    if (emAndamento) {
+      emAndamento.abort();
+    }
+    emAndamento = new AbortController();
+    fetch("/api/autocomplete?q=" + encodeURIComponent(prefixo), { signal: emAndamento.signal })
+      .then(function (resposta) { return resposta.ok ? resposta.json() : { autores: [] }; })
+      .then(function (dados) {
+        respostas.set(prefixo, dados.autores);
+        if (campo.value.trim() === prefixo) {
+          preencher(dados.autores);
+        }
+      })
+      .catch(function () { /* consulta cancelada ou falha de rede: mantém a lista */ });
+  }
+
+  campo.addEventListener("input", function () {
+    clearTimeout(temporizador);
+    var prefixo = campo.value.trim();
+    if (!prefixo) {
+      preencher([]);
+      return;
+    }
+    temporizador = setTimeout(function () { consultar(prefixo); }, ESPERA_MS);
+  });
+})();
@@ -0,0 +1,101 @@
+import json
+
+from benchmarks import suite
+
+
+def test_percentil_nearest_rank():
+    dados = [float(i) for i in range(1, 101)]
+    assert suite.percentil(dados, 50) == 50.0
+    assert suite.percentil(dados, 99) == 99.0
+    assert suite.percentil([7.0], 99) == 7.0
+    assert suite.percentil([], 50) == 0.0
+
+
+def test_suite_roda_sem_postgres_e_gera_json(tmp_path):
+    saida = tmp_path / "resultado.json"
+
+    codigo = suite.main([
+        "--requisicoes", "8", "--concorrencia", "2", "--threads", "2",
+        "--repeticoes", "20", "--saida", str(saida),
+    ])
+
+    documento = json.loads(saida.read_text(encoding="utf-8"))
+    assert codigo == 0
+    assert {"http_index", "http_estatico", "http_pesquisa", "http_autocomplete", "view_exibe_livro"} <= set(documento["resultados"])
+    assert all(r.get("erros", 0) == 0 for r in documento["resultados"].values())
+    assert documento["resultados"]["http_pesquisa"]["operacoes"] == 8
+
+
+def test_preparar_ambiente_desliga_o_indice_em_memoria(monkeypatch):
+    import app.controller.livro_controller as lc
+
+    monkeypatch.setenv("BUSCA_BACKEND", "memoria")
+    original = lc.obter_indice
+    restaurar = suite._preparar_ambiente(linhas_por_pesquisa=1)
+    try:
+        assert lc.obter_indice() is None
+    finally:
+        restaurar()
+    assert lc.obter_indice is original
+
+
+def test_comparar_acusa_queda_de_vazao_acima_da_tolerancia():
+    base = {"resultados": {"a": {"ops_por_segundo": 100.0}, "b": {"ops_por_segundo": 100.0}}}
+    atual = {"resultados": {"a": {"ops_por_segundo": 85.0}, "b": {"ops_por_segundo": 70.0},
+                            "novo": {"ops_por_segundo": 1.0}}}
+
+    regressoes = suite.comparar(atual, base, tolerancia=0.2)
+
+    assert len(regressoes) == 1 and regressoes[0].startswith("b:")
+
+
+# ---------- Gerador de carga ----------
+
+def test_zipf_concentra_buscas_nos_primeiros_postos():
+    from benchmarks import carga
+
+    termos = [(f"autor{i}", True) for i in range(50)]
+    sorteador = carga.Sorteador(termos, {"pesquisa": 1}, expoente=1.1, semente=1)
+    gerador = sorteador.gerador(0)
+    alvos = [next(gerador)[1] for _ in range(5000)]
+
+    primeiro = alvos.count("/pesquisa?autor=autor0")
+    ultimo = alvos.count("/pesquisa?autor=autor49")
+    assert primeiro > 10 * max(1, ultimo)
+
+
+def test_vocabulario_mistura_autores_inexistentes():
+    from benchmarks import carga
+
+    termos = carga.vocabulario(["a", "b", "c", "a"], fracao_inexistentes=0.25, semente=3)
+    assert sorted(t for t, existe in termos if existe) == ["a", "b", "c"]
+    assert sum(1 for _, existe in termos if not existe) == 1
+
+
+def test_ler_mix_valida_tipos():
+    import pytest
+
+    from benchmarks import carga
+
+    assert carga.ler_mix("pesquisa=1,index=2") == {"pesquisa": 1.0, "index": 2.0}
+    with pytest.raises(ValueError):
+        carga.ler_mix("outro=1")
+
+
+def test_carga_contra_servidor_local_relata_vazao_e_status():
+    from benchmarks import carga
+
+    restaurar = suite._preparar_ambiente(linhas_por_pesquisa=5)
+    servidor = suite._iniciar_servidor(threads=2)
+    try:
+        url = "http://127.0.0.1:%d" % servidor.server_address[1]
+        sorteador = carga.Sorteador(carga.vocabulario(["x", "y"], 0, 1), carga.MIX_PADRAO, semente=1)
+        relatorio = carga.executar_carga(url, duracao=0.5, concorrencia=2, taxa=60, sorteador=sorteador)
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+        restaurar()
+
+    assert 20 <= relatorio["geral"]["operacoes"] <= 31
+    assert relatorio["taxa_erros"] == 0.0
+    assert set(relatorio["status"]) == {"200"}
@@ -0,0 +1,90 @@
+# app/tests/test_cache_livros.py
+import app.dao.cache_livros as cl
+from app.dao.cache_livros import CacheLRU, normalizar_autor, normalizar_texto
+
+
+class RelogioFake:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_normalizar_autor_ignora_caixa_e_espacos():
+    assert normalizar_autor("  Martin   FOWLER ") == "martin fowler"
+    assert normalizar_autor(None) == ""
+
+
+def test_normalizar_autor_ignora_acentos():
+    assert normalizar_autor("GONÇALVES") == normalizar_autor(" goncalves ") == "goncalves"
+    assert normalizar_texto("Ñúñez  Álvares") == "nunez alvares"
+
+
+def test_cache_conta_acertos_e_faltas():
+    cache = CacheLRU(max_entradas=2, ttl=None)
+    assert cache.obter("fowler") is None
+    cache.guardar("fowler", ("livro",))
+    assert cache.obter("fowler") == ("livro",)
+
+    assert cache.estatisticas() == {"entradas": 1, "acertos": 1, "faltas": 1, "despejos": 0}
+
+
+def test_cache_despeja_o_menos_usado_recentemente():
+    cache = CacheLRU(max_entradas=2, ttl=None)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    cache.obter("a")        # 'a' passa a ser o mais recente
+    cache.guardar("c", 3)   # despeja 'b'
+
+    assert cache.obter("b") is None
+    assert cache.obter("a") == 1 and cache.obter("c") == 3
+    assert cache.despejos == 1
+
+
+def test_cache_expira_entradas_pelo_ttl():
+    relogio = RelogioFake()
+    cache = CacheLRU(max_entradas=10, ttl=5, relogio=relogio)
+    cache.guardar("valente", 1)
+
+    relogio.agora = 4.9
+    assert cache.obter("valente") == 1
+    relogio.agora = 5.0
+    assert cache.obter("valente") is None
+    assert len(cache) == 0
+
+
+def test_cache_com_max_zero_fica_desligado():
+    cache = CacheLRU(max_entradas=0)
+    cache.guardar("a", 1)
+    assert cache.obter("a") is None
+
+
+def test_livros_alterados_invalida_caches_registrados(monkeypatch):
+    monkeypatch.setattr(cl, "_ouvintes", [])
+    cache = CacheLRU(ttl=None)
+    cl.ao_alterar_livros(cache.invalidar)
+    cache.guardar("gof", 1)
+
+    cl.livros_alterados()
+
+    assert len(cache) == 0
+
+
+def test_normalizar_texto_translitera_letras_sem_decomposicao():
+    assert normalizar_texto("Łukasz Straße") == "lukasz strasse"
+    assert normalizar_texto("Søren Kierkegaard") == "soren kierkegaard"
+    # Aspas tipográficas (teclados de celular) viram as retas, como no unaccent
+    assert normalizar_texto("Tim O’Brien") == normalizar_texto("Tim O'Brien") == "tim o'brien"
+
+
+def test_cache_de_ausentes_e_esvaziado_quando_livros_mudam(monkeypatch):
+    monkeypatch.setattr(cl, "_ouvintes", [])
+    monkeypatch.setattr(cl, "_cache_ausentes", None)
+    ausentes = cl.obter_cache_ausentes()
+    ausentes.guardar("ninguem", True)
+
+    cl.livros_alterados()
+
+    assert ausentes.obter("ninguem") is None
+    assert cl.obter_cache_ausentes() is ausentes
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import app.controller.livro_controller as lc
+import app.dao.coalescencia as co
+from app.dao.cache_livros import CacheLRU
+from app.dao.coalescencia import Coalescedor
+from app.dao.livro_dao import PaginaLivros
+from app.metricas import Metricas
+from app.model.livro import LivroResultSet
+
+
+@pytest.fixture
+def metricas(monkeypatch):
+    metricas = Metricas()
+    monkeypatch.setattr(co, "obter_metricas", lambda: metricas)
+    return metricas
+
+
+def _coalescidas(metricas, operacao="teste"):
+    return metricas._contadores.get(
+        ("biblioteca_chamadas_coalescidas_total", (("operacao", operacao),)), 0
+    )
+
+
+def _esperar(condicao, limite=2.0):
+    fim = time.monotonic() + limite
+    while not condicao() and time.monotonic() < fim:
+        time.sleep(0.001)
+    assert condicao()
+
+
+# ---------- Threads ----------
+
+def test_chamadas_simultaneas_dividem_uma_execucao(metricas):
+    coalescedor = Coalescedor("teste")
+    liberar, chamadas, resultados = threading.Event(), [], []
+
+    def lenta():
+        chamadas.append(1)
+        liberar.wait(2)
+        return "pagina"
+
+    threads = [
+        threading.Thread(target=lambda: resultados.append(coalescedor.executar("fowler", lenta)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    _esperar(lambda: _coalescidas(metricas) == 4)
+    liberar.set()
+    for t in threads:
+        t.join()
+
+    assert chamadas == [1]
+    assert resultados == ["pagina"] * 5
+    # Terminada a chamada, a próxima com a mesma chave executa de novo
+    assert coalescedor.executar("fowler", lambda: "outra") == "outra"
+
+
+def test_excecao_chega_a_todos_que_esperavam(metricas):
+    coalescedor = Coalescedor("teste")
+    liberar, erros = threading.Event(), []
+
+    def falha():
+        liberar.wait(2)
+        raise RuntimeError("banco fora")
+
+    def chamar():
+        try:
+            coalescedor.executar("x", falha)
+        except RuntimeError as e:
+            erros.append(str(e))
+
+    threads = [threading.Thread(target=chamar) for _ in range(3)]
+    for t in threads:
+        t.start()
+    _esperar(lambda: _coalescidas(metricas) == 2)
+    liberar.set()
+    for t in threads:
+        t.join()
+
+    assert erros == ["banco fora"] * 3
+    assert coalescedor._em_voo == {}
+
+
+def test_chaves_diferentes_nao_coalescem(metricas):
+    coalescedor = Coalescedor("teste")
+    assert [coalescedor.executar(c, lambda c=c: c.upper()) for c in "ab"] == ["A", "B"]
+    assert _coalescidas(metricas) == 0
+
+
+# ---------- asyncio ----------
+
+def test_async_coalesce_e_sobrevive_ao_cancelamento_de_quem_chegou_primeiro(metricas):
+    coalescedor = Coalescedor("teste")
+    chamadas = []
+
+    async def consulta():
+        chamadas.append(1)
+        await asyncio.sleep(0.01)
+        return "pagina"
+
+    async def cenario():
+        primeira = asyncio.ensure_future(coalescedor.executar_async("k", consulta))
+        await asyncio.sleep(0)
+        demais = [asyncio.ensure_future(coalescedor.executar_async("k", consulta)) for _ in range(3)]
+        await asyncio.sleep(0)
+        primeira.cancel()  # cliente desconectou
+        return await asyncio.gather(*demais)
+
+    assert asyncio.run(cenario()) == ["pagina"] * 3
+    assert chamadas == [1]
+    assert _coalescidas(metricas) == 3
+    assert coalescedor._tarefas == {}
+
+
+# ---------- Controller ----------
+
+def test_listar_livro_async_simultaneos_fazem_uma_consulta(monkeypatch, metricas):
+    consultas = []
+
+    class DAOLento:
+        async def em_thread(self, funcao, *args):
+            await asyncio.sleep(0.01)
+            return funcao(*args)
+
+        def pesquisar_por_autor_paginado(self, autor, limite, apos_titulo=None, apos_isbn=None):
+            consultas.append(autor)
+            return PaginaLivros(LivroResultSet.de_linhas([("1", "Refactoring", "Martin Fowler")]))
+
+    monkeypatch.setattr(lc, "_dao_async", DAOLento)
+    monkeypatch.setattr(lc, "obter_cache_autores", lambda: CacheLRU(max_entradas=0))
+    monkeypatch.setattr(lc, "obter_cache_ausentes", lambda: CacheLRU(max_entradas=0))
+
+    async def cenario():
+        return await asyncio.gather(*(lc.listar_livro_async(a) for a in ("Fowler", " fowler", "FOWLER")))
+
+    paginas = asyncio.run(cenario())
+    assert all("Refactoring" in p for p in paginas)
+    assert len(consultas) == 1
+    assert _coalescidas(metricas, "pesquisa") == 2
@@ -0,0 +1,54 @@
+# app/tests/test_compressao.py
+import gzip
+import zlib
+
+import pytest
+
+from app.servidor.compressao import comprimir, escolher_codificacao, negociar
+
+HTML = "text/html; charset=utf-8"
+GRANDE = ("<li>Livro de Teste</li>" * 200).encode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "accept,esperado",
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("deflate", "deflate"),
+        ("deflate, gzip", "gzip"),              # empate: preferência do servidor
+        ("gzip;q=0.5, deflate", "deflate"),
+        ("gzip;q=0, deflate;q=0", None),
+        ("*", "gzip"),
+        ("br, *;q=0.1", "gzip"),
+    ],
+)
+def test_escolher_codificacao(accept, esperado):
+    assert escolher_codificacao(accept) == esperado
+
+
+def test_comprimir_gzip_e_deflate_sao_reversiveis():
+    assert gzip.decompress(comprimir(GRANDE, "gzip")) == GRANDE
+    assert zlib.decompress(comprimir(GRANDE, "deflate")) == GRANDE
+    # gzip com mtime fixo: saída determinística
+    assert comprimir(GRANDE, "gzip") == comprimir(GRANDE, "gzip")
+
+
+def test_negociar_respeita_limite_minimo_e_tipo():
+    pequeno = b"<p>oi</p>"
+    assert negociar(pequeno, HTML, "gzip") == (pequeno, None)
+    assert negociar(GRANDE, "image/png", "gzip") == (GRANDE, None)
+    assert negociar(GRANDE, HTML, None) == (GRANDE, None)
+
+    corpo, codificacao = negociar(GRANDE, HTML, "gzip, deflate")
+    assert codificacao == "gzip"
+    assert len(corpo) < len(GRANDE)
+    assert gzip.decompress(corpo) == GRANDE
+
+
+def test_negociar_memorizado_reutiliza_resultado():
+    a, _ = negociar(GRANDE, HTML, "gzip", memorizar=True)
+    b, _ = negociar(GRANDE, HTML, "gzip", memorizar=True)
+    assert a is b
@@ -83,4 +83,336 @@ def test_conectar_lanca_excecao_em_falha(monkeypatch):
     when(psycopg2).connect(...).thenRaise(psycopg2.OperationalError("Falha na conexão"))
 
     with pytest.raises(psycopg2.OperationalError, match="Falha na conexão"):
-        sut.conectar()
\ No newline at end of file
+        sut.conectar()
+
+# =========================
+# Pool de conexões
+# =========================
+class _ConnPool:
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+def _fabrica_contada():
+    criadas = []
+
+    def fabrica():
+        conn = _ConnPool()
+        criadas.append(conn)
+        return conn
+
+    return fabrica, criadas
+
+
+def test_pool_reusa_conexao_devolvida():
+    fabrica, criadas = _fabrica_contada()
+    pool = sut.PoolConexoes(minimo=1, maximo=2, timeout=0.1, fabrica=fabrica)
+
+    with pool.conexao() as c1:
+        pass
+    with pool.conexao() as c2:
+        pass
+
+    assert c1 is c2
+    assert len(criadas) == 1
+    assert c1.rollbacks == 2  # devolução sempre limpa a transação
+
+
+def test_pool_descarta_conexao_fechada_e_abre_outra():
+    fabrica, criadas = _fabrica_contada()
+    pool = sut.PoolConexoes(minimo=1, maximo=1, timeout=0.1, fabrica=fabrica)
+
+    primeira = pool.obter()
+    primeira.closed = 2  # simula queda da conexão durante o uso
+    pool.devolver(primeira)
+
+    segunda = pool.obter()
+    assert segunda is not primeira
+    assert len(criadas) == 2
+
+
+def test_pool_ignora_devolucao_duplicada_ou_desconhecida():
+    fabrica, criadas = _fabrica_contada()
+    pool = sut.PoolConexoes(minimo=0, maximo=2, timeout=0.1, fabrica=fabrica)
+
+    conexao = pool.obter()
+    pool.devolver(conexao)
+    pool.devolver(conexao)      # devolvida duas vezes
+    pool.devolver(_ConnPool())  # nunca emprestada
+
+    assert pool.total == 1
+    assert pool.obter() is conexao
+    assert pool.obter() is not conexao
+    assert len(criadas) == 2
+
+
+def test_pool_esgotado_lanca_apos_timeout():
+    fabrica, _ = _fabrica_contada()
+    pool = sut.PoolConexoes(minimo=0, maximo=1, timeout=0.05, fabrica=fabrica)
+    pool.obter()
+
+    with pytest.raises(sut.PoolEsgotadoError):
+        pool.obter()
+
+
+def test_pool_libera_espera_quando_conexao_e_devolvida():
+    import threading
+
+    fabrica, _ = _fabrica_contada()
+    pool = sut.PoolConexoes(minimo=0, maximo=1, timeout=2, fabrica=fabrica)
+    emprestada = pool.obter()
+
+    threading.Timer(0.05, pool.devolver, args=(emprestada,)).start()
+
+    assert pool.obter() is emprestada
+
+
+def test_obter_pool_le_limites_do_ambiente(monkeypatch):
+    monkeypatch.setenv("DB_POOL_MIN", "0")
+    monkeypatch.setenv("DB_POOL_MAX", "3")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "1.5")
+    sut.fechar_pool()
+    try:
+        pool = sut.obter_pool()
+        assert (pool.minimo, pool.maximo, pool.timeout) == (0, 3, 1.5)
+        assert sut.obter_pool() is pool
+    finally:
+        sut.fechar_pool()
+
+
+def test_preparar_executa_prepare_uma_vez_por_conexao():
+    class Cur:
+        def __init__(self, sqls):
+            self.sqls = sqls
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params=None):
+            self.sqls.append(sql)
+
+    class Conn:
+        def __init__(self):
+            self.sqls = []
+
+        def cursor(self):
+            return Cur(self.sqls)
+
+    a, b = Conn(), Conn()
+    for _ in range(3):
+        sut.preparar(a, "q", "SELECT $1", ("text",))
+    sut.preparar(b, "q", "SELECT $1", ("text",))
+
+    assert a.sqls == ["PREPARE q (text) AS SELECT $1"]
+    assert b.sqls == ["PREPARE q (text) AS SELECT $1"]
+
+    sut.esquecer_preparadas(a)
+    sut.preparar(a, "q", "SELECT $1", ("text",))
+    assert len(a.sqls) == 2
+
+
+# ---------- Réplicas de leitura ----------
+
+class PoolReplica:
+    """Pool falso: empresta objetos nomeados ou simula queda/saturação."""
+    def __init__(self, nome, em_uso=0):
+        self.nome = nome
+        self.em_uso = em_uso
+        self.falha = None
+        self.devolvidas = []
+        self.timeouts = []
+
+    def obter(self, timeout=None):
+        self.timeouts.append(timeout)
+        if self.falha is not None:
+            raise self.falha
+        return f"{self.nome}-conn-{len(self.timeouts)}"
+
+    def devolver(self, conexao, descartar=False):
+        self.devolvidas.append(conexao)
+
+    def fechar_todas(self):
+        pass
+
+
+def _roteador(n=2, **kw):
+    primario = PoolReplica("primario")
+    replicas = [PoolReplica(f"r{i}") for i in range(n)]
+    return sut.RoteadorConexoes(primario, replicas, **kw), primario, replicas
+
+
+def test_roteador_round_robin_alterna_replicas_e_escrita_vai_ao_primario():
+    roteador, primario, replicas = _roteador()
+
+    leituras = [roteador.obter_leitura() for _ in range(4)]
+
+    assert [c.split("-")[0] for c in leituras] == ["r0", "r1", "r0", "r1"]
+    assert roteador.obter().startswith("primario")
+
+
+def test_roteador_menos_carregada_escolhe_replica_com_menos_conexoes():
+    roteador, _, replicas = _roteador(3, estrategia="menos_carregada")
+    replicas[0].em_uso, replicas[1].em_uso, replicas[2].em_uso = 5, 1, 3
+
+    assert roteador.obter_leitura().startswith("r1")
+
+
+def test_roteador_failover_poe_replica_em_quarentena_e_depois_volta():
+    agora = [0.0]
+    roteador, primario, replicas = _roteador(quarentena=10, relogio=lambda: agora[0])
+    replicas[0].falha = psycopg2.OperationalError("conexão recusada")
+
+    assert [roteador.obter_leitura()[:2] for _ in range(3)] == ["r1", "r1", "r1"]
+    assert len(replicas[0].timeouts) == 1  # em quarentena: não é mais tentada
+
+    replicas[0].falha = None
+    agora[0] = 11
+    assert {roteador.obter_leitura()[:2] for _ in range(2)} == {"r0", "r1"}
+
+
+def test_roteador_sem_replica_disponivel_le_do_primario():
+    roteador, primario, replicas = _roteador()
+    for r in replicas:
+        r.falha = psycopg2.OperationalError("fora do ar")
+
+    assert roteador.obter_leitura().startswith("primario")
+    assert sut.RoteadorConexoes(primario).obter_leitura().startswith("primario")
+
+
+def test_roteador_replicas_saturadas_espera_na_primeira_candidata():
+    roteador, primario, replicas = _roteador()
+    for r in replicas:
+        r.falha = sut.PoolEsgotadoError("cheio")
+
+    with pytest.raises(sut.PoolEsgotadoError):
+        roteador.obter_leitura(timeout=2)
+
+    assert replicas[0].timeouts == [0, 2]  # tentativa sem espera e depois a espera
+    assert primario.timeouts == []         # não desvia a carga para o primário
+
+
+def test_roteador_devolve_conexao_ao_pool_de_origem():
+    roteador, primario, replicas = _roteador()
+    with roteador.leitura() as conexao:
+        pass
+    with roteador.conexao() as escrita:
+        pass
+
+    assert replicas[0].devolvidas == [conexao]
+    assert primario.devolvidas == [escrita]
+
+
+def test_livro_dao_com_roteador_le_da_replica():
+    from app.dao.livro_dao import LivroDAO
+
+    roteador, primario, replicas = _roteador(1)
+    dao = LivroDAO(pool=roteador)
+    obtida = []
+    replicas[0].obter = lambda timeout=None: obtida.append(1) or mock({"closed": 0})
+    dao._conn()
+    dao.liberar()
+
+    assert obtida == [1] and primario.timeouts == []
+    assert len(replicas[0].devolvidas) == 1
+
+
+class ServidorFalso:
+    """Réplica que pode cair depois que o pool já tem conexões abertas."""
+    def __init__(self):
+        self.no_ar = True
+        self.conexoes = []
+
+    def conectar(self):
+        if not self.no_ar:
+            raise psycopg2.OperationalError("conexão recusada")
+        conexao = ConexaoServidor(self)
+        self.conexoes.append(conexao)
+        return conexao
+
+
+class ConexaoServidor(_ConnPool):
+    def __init__(self, servidor):
+        super().__init__()
+        self.servidor = servidor
+
+    def cursor(self):
+        conexao = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql, params=None):
+                if not conexao.servidor.no_ar:
+                    conexao.closed = 2  # como o psycopg2 após perder o servidor
+                    raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+        return Cursor()
+
+
+def _roteador_com_replica_real(verificar_apos):
+    agora = [0.0]
+    servidor = ServidorFalso()
+    replica = sut.PoolConexoes(minimo=0, maximo=3, timeout=0.1, fabrica=servidor.conectar,
+                               verificar_apos=verificar_apos, relogio=lambda: agora[0])
+    primario = PoolReplica("primario")
+    roteador = sut.RoteadorConexoes(primario, [replica], quarentena=30, relogio=lambda: agora[0])
+    # Aquece o pool da réplica com duas conexões livres
+    a, b = roteador.obter_leitura(), roteador.obter_leitura()
+    roteador.devolver(a)
+    roteador.devolver(b)
+    return roteador, replica, servidor, agora
+
+
+def test_roteador_descarta_conexoes_ociosas_de_replica_que_caiu():
+    roteador, replica, servidor, agora = _roteador_com_replica_real(verificar_apos=5)
+    servidor.no_ar = False
+    agora[0] = 10
+
+    # As duas conexões ociosas falham no teste, a nova é recusada: primário
+    assert roteador.obter_leitura().startswith("primario")
+    assert replica.total == 0
+    assert all(c.closed for c in servidor.conexoes)
+
+    servidor.no_ar = True
+    assert roteador.obter_leitura().startswith("primario")  # ainda em quarentena
+    agora[0] = 41
+    assert isinstance(roteador.obter_leitura(), ConexaoServidor)
+
+
+def test_roteador_poe_replica_em_quarentena_quando_conexao_cai_durante_o_uso():
+    roteador, replica, servidor, agora = _roteador_com_replica_real(verificar_apos=None)
+    servidor.no_ar = False
+
+    conexao = roteador.obter_leitura()  # conexão quente: entregue sem teste
+    with pytest.raises(psycopg2.OperationalError):
+        with conexao.cursor() as cur:
+            cur.execute("SELECT 1")
+    roteador.devolver(conexao)
+
+    assert roteador.obter_leitura().startswith("primario")
+
+
+def test_ler_replicas_e_conectar_com_host_da_replica(monkeypatch):
+    assert sut.ler_replicas(" r1:5433, r2 ,") == [("r1", "5433"), ("r2", None)]
+    assert sut.ler_replicas(None) == []
+
+    monkeypatch.setenv("DB_PORT", "5432")
+    fake_conn = mock()
+    when(psycopg2).connect(
+        host="r1", port="5433", dbname=ANY, user=ANY, password=ANY, options=ANY,
+    ).thenReturn(fake_conn)
+    assert sut.conectar("r1", "5433") is fake_conn
@@ -0,0 +1,166 @@
+# app/tests/test_estaticos.py
+from email.utils import formatdate
+
+import pytest
+
+from app.servidor.compressao import comprimir
+from app.servidor.estaticos import CacheEstaticos
+
+
+@pytest.fixture
+def raiz(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "style.css").write_bytes(b"body{}")
+    (tmp_path / "app.js").write_bytes(b"x" * 10)
+    return tmp_path
+
+
+def test_obter_le_disco_uma_vez_e_detecta_mime(raiz):
+    cache = CacheEstaticos(raiz=raiz)
+
+    primeiro = cache.obter("/static/css/style.css")
+    (raiz / "css" / "style.css").write_bytes(b"mudou")
+    segundo = cache.obter("/static/css/style.css")
+
+    assert primeiro is segundo
+    assert segundo.corpo == b"body{}"
+    assert segundo.tipo == "text/css"
+    assert segundo.etag.startswith('"') and segundo.etag.endswith('"')
+    assert cache.em_memoria("/static/css/style.css") is primeiro
+
+
+def test_obter_nao_permite_fuga_do_diretorio(raiz):
+    cache = CacheEstaticos(raiz=raiz / "css")
+    assert cache.obter("/static/../app.js") is None
+    assert cache.obter("/static/nao-existe.css") is None
+
+
+def test_orcamento_despeja_o_menos_recente(raiz):
+    cache = CacheEstaticos(raiz=raiz, orcamento=12)
+    cache.obter("/static/css/style.css")  # 6 bytes
+    cache.obter("/static/app.js")         # 10 bytes -> despeja o css
+
+    assert cache.bytes_em_uso == 10
+    assert cache.em_memoria("/static/css/style.css") is None
+
+
+def test_arquivo_maior_que_orcamento_e_servido_do_disco(raiz):
+    cache = CacheEstaticos(raiz=raiz, orcamento=5)
+    recurso = cache.obter("/static/app.js")
+
+    assert recurso.em_disco and recurso.corpo is None
+    assert recurso.tamanho_arquivo == 10
+    assert b"".join(recurso.blocos(4)) == b"x" * 10
+    assert not recurso.compressivel
+    assert cache.bytes_em_uso == 0
+    # ETag estável entre requisições, sem ler o conteúdo
+    assert cache.obter("/static/app.js").etag == recurso.etag
+    assert recurso.nao_modificado(recurso.etag, None)
+
+
+def test_caminhos_equivalentes_dividem_a_mesma_entrada(raiz):
+    cache = CacheEstaticos(raiz=raiz)
+    recurso = cache.obter("/static/css/style.css")
+
+    assert cache.obter("/static/./css/style.css") is recurso
+    assert cache.obter("/static/css//style.css") is recurso
+    assert cache.em_memoria("/static/css/./style.css") is recurso
+    assert cache.bytes_em_uso == len(b"body{}")
+
+
+def test_link_simbolico_usa_a_entrada_do_arquivo_real(raiz):
+    (raiz / "atalho.css").symlink_to(raiz / "css" / "style.css")
+    cache = CacheEstaticos(raiz=raiz)
+
+    assert cache.obter("/static/atalho.css") is cache.obter("/static/css/style.css")
+    assert cache.bytes_em_uso == len(b"body{}")
+
+
+def test_modo_recarga_percebe_alteracao(raiz):
+    import os
+
+    cache = CacheEstaticos(raiz=raiz, recarregar=True)
+    antigo = cache.obter("/static/css/style.css")
+    arquivo = raiz / "css" / "style.css"
+    arquivo.write_bytes(b"novo")
+    os.utime(arquivo, (antigo.mtime + 10, antigo.mtime + 10))
+
+    novo = cache.obter("/static/css/style.css")
+    assert novo.corpo == b"novo" and novo.etag != antigo.etag
+
+
+def test_nao_modificado_por_etag_e_por_data(raiz):
+    recurso = CacheEstaticos(raiz=raiz).obter("/static/css/style.css")
+
+    assert recurso.nao_modificado(recurso.etag, None)
+    assert recurso.nao_modificado(f'"outro", W/{recurso.etag}', None)
+    assert recurso.nao_modificado("*", None)
+    assert not recurso.nao_modificado('"outro"', None)
+
+    assert recurso.nao_modificado(None, formatdate(recurso.mtime + 1, usegmt=True))
+    assert not recurso.nao_modificado(None, formatdate(recurso.mtime - 60, usegmt=True))
+    assert not recurso.nao_modificado(None, "data inválida")
+    # If-None-Match tem precedência sobre If-Modified-Since
+    assert not recurso.nao_modificado('"outro"', formatdate(recurso.mtime + 1, usegmt=True))
+
+
+def test_recurso_textual_tem_variantes_comprimidas_com_etag_propria(tmp_path):
+    import gzip
+
+    conteudo = b"body { margin: 0; }\n" * 100
+    (tmp_path / "grande.css").write_bytes(conteudo)
+    recurso = CacheEstaticos(raiz=tmp_path).obter("/static/grande.css")
+
+    corpo, codificacao, etag = recurso.representacao("gzip")
+    assert codificacao == "gzip" and gzip.decompress(corpo) == conteudo
+    assert etag != recurso.etag and etag.endswith('-gzip"')
+    assert recurso.nao_modificado(etag, None, etag)
+    assert not recurso.nao_modificado(recurso.etag, None, etag)
+
+    assert recurso.representacao(None) == (conteudo, None, recurso.etag)
+    assert recurso.tamanho > len(conteudo)
+
+
+def test_recurso_binario_nao_e_comprimido(tmp_path):
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG" + b"\x00" * 500)
+    recurso = CacheEstaticos(raiz=tmp_path).obter("/static/logo.png")
+    assert recurso.variantes == {}
+    assert recurso.representacao("gzip")[1] is None
+
+
+def test_variante_e_comprimida_so_quando_pedida_e_entra_no_orcamento(tmp_path):
+    conteudo = b"body { margin: 0; }\n" * 100
+    (tmp_path / "grande.css").write_bytes(conteudo)
+    cache = CacheEstaticos(raiz=tmp_path)
+    recurso = cache.obter("/static/grande.css")
+
+    assert recurso.variantes == {}
+    assert cache.bytes_em_uso == len(conteudo)
+
+    gzip_1 = recurso.representacao("gzip, deflate")[0]
+    assert set(recurso.variantes) == {"gzip"}
+    assert cache.bytes_em_uso == len(conteudo) + len(gzip_1)
+    # A segunda requisição reaproveita a variante
+    assert recurso.representacao("gzip")[0] is gzip_1
+    assert cache.bytes_em_uso == recurso.tamanho
+
+
+def test_variante_nova_respeita_o_orcamento(tmp_path):
+    conteudo = b"body { margin: 0; }\n" * 100
+    (tmp_path / "grande.css").write_bytes(conteudo)
+    (tmp_path / "app.js").write_bytes(b"x" * 10)
+    gzip_ = comprimir(conteudo, "gzip")
+    cache = CacheEstaticos(raiz=tmp_path, orcamento=len(conteudo) + len(gzip_) + 5)
+    cache.obter("/static/app.js")
+    recurso = cache.obter("/static/grande.css")
+
+    recurso.representacao("gzip")  # o app.js, menos recente, sai do cache
+    assert cache.em_memoria("/static/app.js") is None
+    assert cache.bytes_em_uso == recurso.tamanho
+
+
+def test_texto_que_nao_diminui_sai_sem_compressao(tmp_path):
+    (tmp_path / "mini.css").write_bytes(b"a{}")
+    recurso = CacheEstaticos(raiz=tmp_path).obter("/static/mini.css")
+    assert recurso.representacao("gzip") == (b"a{}", None, recurso.etag)
+    assert recurso.variantes == {"gzip": None}
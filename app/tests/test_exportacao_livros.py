@@ -0,0 +1,42 @@
+import json
+
+from app.view.exportacao_livros import FORMATOS, csv_em_blocos, jsonl_em_blocos
+
+LINHAS = [("1", 'Um, "dois"', "Autor A"), ("2", "Ação", "Autor B")]
+
+
+def test_csv_tem_cabecalho_e_escapa_campos():
+    corpo = b"".join(csv_em_blocos(LINHAS)).decode("utf-8")
+    assert corpo == 'isbn,titulo,autor\n1,"Um, ""dois""",Autor A\n2,Ação,Autor B\n'
+
+
+def test_csv_vazio_ainda_tem_cabecalho():
+    assert b"".join(csv_em_blocos([])) == b"isbn,titulo,autor\n"
+
+
+def test_jsonl_um_objeto_por_linha():
+    linhas = b"".join(jsonl_em_blocos(LINHAS)).decode("utf-8").splitlines()
+    assert [json.loads(l) for l in linhas] == [
+        {"isbn": "1", "titulo": 'Um, "dois"', "autor": "Autor A"},
+        {"isbn": "2", "titulo": "Ação", "autor": "Autor B"},
+    ]
+
+
+def test_blocos_agrupam_linhas_e_sao_consumidos_sob_demanda():
+    consumidas = []
+
+    def linhas():
+        for i in range(100):
+            consumidas.append(i)
+            yield (str(i), "T", "A")
+
+    blocos = jsonl_em_blocos(linhas(), tamanho_bloco=200)
+    primeiro = next(blocos)
+    assert len(primeiro) >= 200
+    assert len(consumidas) < 100  # não leu tudo para gerar o 1º bloco
+    assert len(list(blocos)) > 1
+
+
+def test_formatos_registrados():
+    assert FORMATOS["csv"][0].startswith("text/csv")
+    assert FORMATOS["jsonl"][0].startswith("application/x-ndjson")
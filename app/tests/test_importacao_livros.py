@@ -0,0 +1,138 @@
+import io
+
+import pytest
+
+import app.dao.importacao_livros as imp
+from app.model.livro import Livro
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = -1
+
+    def execute(self, sql, params=None):
+        self.conn.executados.append(sql)
+        if "INSERT INTO" in sql:
+            # Simula o DISTINCT ON + ON CONFLICT: grava ISBNs ainda não vistos
+            novos = {linha.split(",")[0] for linha in self.conn.copiados[-1]} - self.conn.isbns
+            self.conn.isbns |= novos
+            self.rowcount = len(novos)
+
+    def copy_expert(self, sql, arquivo):
+        self.conn.copy_sql = sql
+        self.conn.copiados.append(arquivo.read().splitlines())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeConn:
+    def __init__(self):
+        self.executados = []
+        self.copiados = []
+        self.isbns = set()
+        self.commits = 0
+        self.rollbacks = 0
+        self.copy_sql = None
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def alterados(monkeypatch):
+    chamadas = []
+    monkeypatch.setattr(imp, "livros_alterados", lambda: chamadas.append(1))
+    return chamadas
+
+
+def _registros(n, inicio=0):
+    return [{"isbn": f"{i:013d}", "titulo": f"Título {i}", "autor": "Autor"} for i in range(inicio, inicio + n)]
+
+
+def test_livro_validado_normaliza_e_rejeita():
+    livro = Livro.validado("  123 ", " Autor ", "Título ")
+    assert (livro.isbn, livro.autor, livro.titulo) == ("123", "Autor", "Título")
+    with pytest.raises(ValueError):
+        Livro.validado("", "Autor", "Título")
+    with pytest.raises(ValueError):
+        Livro.validado("1" * 21, "Autor", "Título")
+    with pytest.raises(ValueError):
+        Livro.validado("1", "A" * 256, "Título")
+
+
+def test_importar_em_lotes_via_copy(alterados):
+    conn = FakeConn()
+    progresso = []
+
+    resumo = imp.importar(conn, _registros(5), lote=2, progresso=lambda r: progresso.append(r.lidos))
+
+    assert (resumo.lidos, resumo.gravados, resumo.lotes) == (5, 5, 3)
+    assert [len(lote) for lote in conn.copiados] == [2, 2, 1]
+    assert conn.copy_sql.startswith("COPY livros_importacao")
+    assert conn.commits == 3
+    assert progresso == [2, 4, 5]
+    assert alterados == [1]
+
+
+def test_importar_ignora_invalidos_e_conflitos(alterados):
+    conn = FakeConn()
+    conn.isbns.add(f"{0:013d}")
+    registros = _registros(3) + [{"isbn": "", "titulo": "X", "autor": "Y"}, "não é objeto"]
+
+    resumo = imp.importar(conn, registros)
+
+    assert (resumo.lidos, resumo.invalidos, resumo.gravados) == (5, 2, 2)
+    assert any("DO NOTHING" in sql for sql in conn.executados)
+
+
+def test_importar_atualizar_usa_do_update(alterados):
+    conn = FakeConn()
+    imp.importar(conn, _registros(1), atualizar=True)
+    assert any("DO UPDATE SET" in sql for sql in conn.executados)
+
+
+def test_importar_csv_escapa_virgulas_e_aspas(alterados):
+    conn = FakeConn()
+    imp.importar(conn, [{"isbn": "1", "titulo": 'Um, "dois"', "autor": "Autor"}])
+    assert conn.copiados == [['1,"Um, ""dois""",Autor']]
+
+
+def test_importar_faz_rollback_em_erro(alterados):
+    conn = FakeConn()
+
+    def falha(*a):
+        raise RuntimeError("copy falhou")
+
+    conn.cursor = lambda: type("C", (FakeCursor,), {"copy_expert": falha})(conn)
+    with pytest.raises(RuntimeError):
+        imp.importar(conn, _registros(1))
+    assert conn.rollbacks == 1
+    assert alterados == []
+
+
+def test_leitores_csv_e_jsonl():
+    csv_ = io.StringIO("isbn,titulo,autor\n1,T,A\n")
+    jsonl = io.StringIO('{"isbn": "2", "titulo": "U", "autor": "B"}\n\n')
+    assert list(imp.ler_csv(csv_)) == [{"isbn": "1", "titulo": "T", "autor": "A"}]
+    assert list(imp.ler_jsonl(jsonl)) == [{"isbn": "2", "titulo": "U", "autor": "B"}]
+
+
+def test_importar_jsonl_com_linha_malformada_segue_a_carga(alterados):
+    conn = FakeConn()
+    jsonl = io.StringIO('{"isbn": "1", "titulo": "T", "autor": "A"}\n{"isbn": "2", quebrado\n')
+
+    resumo = imp.importar(conn, imp.ler_jsonl(jsonl))
+
+    assert (resumo.lidos, resumo.invalidos, resumo.gravados) == (2, 1, 1)
+    assert conn.rollbacks == 0 and conn.commits == 1
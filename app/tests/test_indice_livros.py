@@ -0,0 +1,300 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import app.controller.livro_controller as lc
+import app.dao.indice_livros as il
+from app.dao.cache_livros import CacheLRU, normalizar_texto
+from app.dao.indice_livros import AtualizadorIndice, IndiceLivros, LivroDAOMemoria
+
+LINHAS = [
+    ("1", "Engenharia de Software Moderna", "Marco Túlio Valente"),
+    ("2", "Refactoring", "Martin Fowler"),
+    ("3", "Patterns of Enterprise Application Architecture", "Martin Fowler"),
+    ("4", "Análise de Algoritmos", "José Álvares"),
+    ("5", "UML Distilled", "martin FOWLER"),
+]
+
+
+@pytest.fixture
+def indice():
+    return IndiceLivros(LINHAS)
+
+
+# ---------- Normalização e busca ----------
+
+def test_normalizar_texto_remove_acentos_caixa_e_espacos():
+    assert normalizar_texto("  José   ÁLVARES ") == "jose alvares"
+    assert normalizar_texto(None) == ""
+
+
+def test_pesquisar_substring_ignora_acentos_e_caixa_e_ordena_por_titulo(indice):
+    linhas = indice.pesquisar(autor="FOWL")
+    assert [l[1] for l in linhas] == [
+        "Patterns of Enterprise Application Architecture", "Refactoring", "UML Distilled",
+    ]
+    assert [l[0] for l in indice.pesquisar(autor="tulio")] == ["1"]
+    assert [l[0] for l in indice.pesquisar(autor="alvar")] == ["4"]
+
+
+def test_pesquisar_confere_substring_alem_dos_trigramas(indice):
+    # "tin fow" tem trigramas de "martin fowler", mas "fow tin" não é substring
+    assert [l[0] for l in indice.pesquisar(autor="tin fow")] == ["3", "2", "5"]
+    assert indice.pesquisar(autor="fow tin") == []
+    assert indice.pesquisar(autor="inexistente") == []
+
+
+def test_termos_curtos_e_vazio_percorrem_os_valores(indice):
+    assert {l[0] for l in indice.pesquisar(autor="JÓ")} == {"4"}
+    assert len(indice.pesquisar(autor="")) == len(LINHAS)
+
+
+def test_pesquisar_por_autor_e_titulo(indice):
+    assert indice._titulo is None  # montado só na primeira busca por título
+    assert [l[0] for l in indice.pesquisar(autor="fowler", titulo="refac")] == ["2"]
+    indice.gravar("6", "Refactoring to Patterns", "Joshua Kerievsky")
+    assert [l[0] for l in indice.pesquisar(titulo="refactoring")] == ["2", "6"]
+
+
+def test_gravar_e_remover_atualizam_postings(indice):
+    indice.gravar("2", "Refactoring", "Kent Beck")
+    assert [l[0] for l in indice.pesquisar(autor="fowler")] == ["3", "5"]
+    assert [l[0] for l in indice.pesquisar(autor="beck")] == ["2"]
+
+    indice.remover("3")
+    indice.remover("5")
+    assert indice.pesquisar(autor="fowler") == []
+    # Trigramas sem nenhum valor são descartados
+    assert "fow" not in indice._autor.postings
+    assert len(indice) == 3
+
+
+# ---------- LivroDAOMemoria ----------
+
+def test_paginado_percorre_todas_as_paginas_por_keyset(indice):
+    dao = LivroDAOMemoria(indice)
+    vistos, apos = [], (None, None)
+    while True:
+        pagina = dao.pesquisar_por_autor_paginado("martin", 1, *apos)
+        vistos += list(pagina.livros.isbns)
+        if pagina.proximo is None:
+            break
+        apos = pagina.proximo
+    assert vistos == ["3", "2", "5"]
+    with pytest.raises(ValueError):
+        dao.pesquisar_por_autor_paginado("martin", 0)
+
+
+def test_buscas_por_isbn_e_em_lote(indice):
+    dao = LivroDAOMemoria(indice)
+    assert dao.buscar_por_isbn("2").titulo == "Refactoring"
+    assert dao.buscar_por_isbn("x") is None
+    assert set(dao.buscar_por_isbns(["1", "x", "1"])) == {"1"}
+
+    resultado = dao.pesquisar_em_lote(["fowler", "ninguem"], ["4", "x"], limite_por_autor=2)
+    assert resultado.por_autor["fowler"].isbns == ("3", "2")
+    assert len(resultado.por_autor["ninguem"]) == 0
+    assert resultado.por_isbn["4"].autor == "José Álvares"
+    assert resultado.por_isbn["x"] is None
+
+
+def test_iterar_linhas_e_em_thread(indice):
+    dao = LivroDAOMemoria(indice)
+    assert [r[0] for r in dao.iterar_linhas("fowler")] == ["3", "2", "5"]
+    livros = asyncio.run(dao.em_thread(dao.pesquisar_por_autor, "valente"))
+    assert [l.isbn for l in livros] == ["1"]
+
+
+# ---------- AtualizadorIndice ----------
+
+class FakeCursor:
+    def __init__(self, conexao, name=None):
+        self.conexao = conexao
+        self.name = name
+        self.itersize = None
+        self._resultado = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conexao.executados.append(sql)
+        if "now()" in sql:
+            # least(now(), início da transação de escrita mais antiga) - margem
+            self.conexao.relogio += 1
+            inicio = min([self.conexao.relogio, *self.conexao.transacoes_abertas])
+            self._resultado = [(inicio - params[0],)]
+        elif "livros_removidos" in sql:
+            # Só linhas de transações confirmadas, depois da marca
+            self._resultado = [linha for linha in self.conexao.delta if linha[-1] > params[0]]
+        else:
+            self._resultado = list(self.conexao.linhas)
+
+    def fetchone(self):
+        return self._resultado[0]
+
+    def fetchall(self):
+        return self._resultado
+
+    def __iter__(self):
+        return iter(self._resultado)
+
+
+class FakeConexaoBanco:
+    closed = 0
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.delta = []
+        self.transacoes_abertas = []
+        self.relogio = 100
+        self.executados = []
+        self.commits = 0
+
+    def cursor(self, name=None):
+        return FakeCursor(self, name)
+
+    def commit(self):
+        self.commits += 1
+
+
+def _atualizador(conexao, **kwargs):
+    @contextmanager
+    def fonte():
+        yield conexao
+
+    return AtualizadorIndice(IndiceLivros(), fonte, **kwargs)
+
+
+def test_carregar_tudo_e_aplicar_delta(monkeypatch):
+    avisos = []
+    monkeypatch.setattr(il, "livros_alterados", lambda: avisos.append(True))
+    conexao = FakeConexaoBanco(LINHAS)
+    atualizador = _atualizador(conexao)
+
+    assert atualizador.carregar_tudo() == len(LINHAS)
+    assert atualizador.marca == 96  # now() - margem
+
+    conexao.delta = [
+        ("u", "6", "Domain-Driven Design", "Eric Evans", 101),
+        ("d", "2", None, None, 102),
+    ]
+    assert atualizador.aplicar_delta() == 2
+    assert atualizador.marca == 97
+    assert [l[0] for l in atualizador.indice.pesquisar(autor="fowler")] == ["3", "5"]
+    assert [l[0] for l in atualizador.indice.pesquisar(autor="evans")] == ["6"]
+    # Alterações de outros processos invalidam os caches deste
+    assert avisos == [True]
+    # Relidas por causa da margem, as mesmas linhas não contam de novo
+    assert atualizador.aplicar_delta() == 0 and avisos == [True]
+
+
+def test_delta_ve_transacao_de_escrita_mais_longa_que_a_margem(monkeypatch):
+    monkeypatch.setattr(il, "livros_alterados", lambda: None)
+    conexao = FakeConexaoBanco(LINHAS)
+    atualizador = _atualizador(conexao, margem=5)
+    atualizador.carregar_tudo()
+
+    # Um lote de COPY começa em 102 (linhas com atualizado_em = 102) e só
+    # confirma 20 s depois: bem mais que a margem
+    conexao.transacoes_abertas = [102]
+    conexao.relogio = 120
+    assert atualizador.aplicar_delta() == 0
+    assert atualizador.marca == 97  # presa ao início da transação aberta
+
+    conexao.transacoes_abertas = []
+    conexao.delta = [("u", "7", "Livro Longo", "Autor Lento", 102)]
+    assert atualizador.aplicar_delta() == 1
+    assert [l[0] for l in atualizador.indice.pesquisar(autor="lento")] == ["7"]
+
+
+def test_atualizar_faz_recarga_completa_apos_o_intervalo():
+    agora = [0.0]
+    conexao = FakeConexaoBanco(LINHAS)
+    atualizador = _atualizador(conexao, recarga=60, relogio=lambda: agora[0])
+    atualizador.atualizar()  # primeira vez: carga completa
+    conexao.executados.clear()
+
+    agora[0] = 30
+    atualizador.atualizar()
+    assert any("livros_removidos" in sql for sql in conexao.executados)
+
+    conexao.executados.clear()
+    agora[0] = 61
+    atualizador.atualizar()
+    assert not any("livros_removidos" in sql for sql in conexao.executados)
+    assert atualizador.ultima_carga == 61
+
+
+# ---------- Seleção do backend ----------
+
+def test_obter_indice_desligado_por_padrao(monkeypatch):
+    monkeypatch.delenv("BUSCA_BACKEND", raising=False)
+    assert il.obter_indice() is None
+
+
+def test_nova_tentativa_apos_falha_roda_em_segundo_plano(monkeypatch):
+    liberar, tentativas = threading.Event(), []
+
+    class AtualizadorFalso:
+        def __init__(self, indice, fonte, **kwargs):
+            self.indice = indice
+
+        def carregar_tudo(self):
+            tentativas.append(1)
+            if len(tentativas) == 1:
+                raise OSError("banco fora")
+            liberar.wait(2)  # carga lenta
+            self.indice.carregar(LINHAS)
+
+        def solicitar(self):
+            pass
+
+        def iniciar(self):
+            pass
+
+        def parar(self):
+            pass
+
+    monkeypatch.setenv("BUSCA_BACKEND", "memoria")
+    monkeypatch.setattr(il, "AtualizadorIndice", AtualizadorFalso)
+    monkeypatch.setattr(il, "ao_alterar_livros", lambda ouvinte: None)
+    monkeypatch.setattr(il, "_ESPERA_APOS_FALHA", 0.0)
+    il.fechar_indice()
+    try:
+        assert il.obter_indice() is None  # primeira carga falhou
+        # A nova tentativa não bloqueia quem pede o índice: segue no Postgres
+        assert il.obter_indice() is None
+        assert il.obter_indice() is None
+        liberar.set()
+        fim = time.monotonic() + 2
+        while il.obter_indice() is None and time.monotonic() < fim:
+            time.sleep(0.01)
+        assert len(il.obter_indice()) == len(LINHAS)
+        assert len(tentativas) == 2
+    finally:
+        liberar.set()
+        il.fechar_indice()
+
+
+def test_controller_usa_o_indice_sem_tocar_no_banco(monkeypatch, indice):
+    def _sem_banco():
+        raise AssertionError("o banco não deveria ser usado")
+
+    monkeypatch.setattr(lc, "obter_indice", lambda: indice)
+    monkeypatch.setattr(lc, "obter_roteador", _sem_banco)
+    monkeypatch.setattr(lc, "obter_cache_autores", lambda: CacheLRU(max_entradas=0))
+    monkeypatch.setattr(lc, "obter_cache_ausentes", lambda: CacheLRU(max_entradas=0))
+
+    html = lc.listar_livro("fowler")
+    assert "Refactoring" in html and "UML Distilled" in html
+    corpo, status = lc.buscar_livros_api(["fowler"], ["1"], 2)
+    assert status == 200 and "Refactoring" in corpo
+    html = asyncio.run(lc.listar_livro_async("valente"))
+    assert "Engenharia de Software Moderna" in html
@@ -1,8 +1,11 @@
+from contextlib import contextmanager
 from types import SimpleNamespace
 import pytest
 
 # Módulo sob teste
 import app.controller.livro_controller as lc
+from app.dao.cache_livros import CacheLRU
+from app.dao.livro_dao import PaginaLivros
 
 
 # ---------- Fakes utilitários ----------
@@ -10,24 +13,40 @@ import app.controller.livro_controller as lc
 class FakeConexao:
     def __init__(self):
         self.closed = False
+        self.devolvida = False
 
     def close(self):
         self.closed = True
 
 
+class FakePool:
+    """Simula o roteador de conexões: empresta FakeConexao e registra devoluções."""
+    def __init__(self, conexoes_registradas):
+        self.conexoes_registradas = conexoes_registradas
+
+    @contextmanager
+    def leitura(self):
+        conn = FakeConexao()
+        self.conexoes_registradas.append(conn)
+        try:
+            yield conn
+        finally:
+            conn.devolvida = True
+
+
 class FakeLivroDAOFound:
     """Simula DAO que encontra livros por autor."""
     def __init__(self, conexao):
         self.conexao = conexao
         self.ultimo_autor = None
 
-    def pesquisar_por_autor(self, autor):
+    def pesquisar_por_autor_paginado(self, autor, limite, apos_titulo=None, apos_isbn=None):
         self.ultimo_autor = autor
-        # O controller usa o índice [0] e lê atributos .titulo/.autor/.isbn
-        return [
+        # A view lê atributos .titulo/.autor/.isbn de cada livro da página
+        return PaginaLivros([
             SimpleNamespace(titulo="Livro A", autor="Autor A", isbn="123-ABC"),
             SimpleNamespace(titulo="Livro B", autor="Autor A", isbn="456-DEF"),
-        ]
+        ])
 
 
 class FakeLivroDAONotFound:
@@ -35,58 +54,66 @@ class FakeLivroDAONotFound:
     def __init__(self, conexao):
         self.conexao = conexao
 
-    def pesquisar_por_autor(self, autor):
-        # Pode devolver lista vazia...
-        return []
+    def pesquisar_por_autor_paginado(self, autor, limite, apos_titulo=None, apos_isbn=None):
+        # Pode devolver página vazia...
+        return PaginaLivros([])
+
+
+class FakeLivroDAOErro(FakeLivroDAONotFound):
+    """Simula DAO que engoliu um erro de banco e devolveu página vazia."""
+    def pesquisar_por_autor_paginado(self, autor, limite, apos_titulo=None, apos_isbn=None):
+        return PaginaLivros([], erro=True)
 
 
 class FakeLivroDAOReturnsNone(FakeLivroDAONotFound):
     """Alguns DAOs devolvem None quando não há resultados."""
-    def pesquisar_por_autor(self, autor):
+    def pesquisar_por_autor_paginado(self, autor, limite, apos_titulo=None, apos_isbn=None):
         return None
 
 
 class FakePagina:
     """Simula camada de view utilizada pelo controller."""
     @staticmethod
-    def exibe_livro(titulo, autor, isbn):
+    def exibe_pagina(livros, autor, proxima_url=None):
         # Retorno previsível para asserção
-        return f"EXIBE::{titulo}|{autor}|{isbn}"
+        return "EXIBE::" + ";".join(f"{l.titulo}|{l.autor}|{l.isbn}" for l in livros)
 
 
 # ---------- Helpers para monkeypatch ----------
 
 def _patch_ambiente(monkeypatch, dao_cls, conexoes_registradas):
     """
-    - Substitui 'conectar' no módulo do controller por uma fábrica de FakeConexao
-      que armazena as conexões criadas em 'conexoes_registradas' (lista).
+    - Substitui 'obter_roteador' no módulo do controller por um FakePool que
+      armazena as conexões emprestadas em 'conexoes_registradas' (lista).
     - Substitui 'LivroDAO' no módulo do controller pelo 'dao_cls' informado.
     - Substitui 'PaginaDadosLivro' por 'FakePagina'.
     """
-    def fake_conectar():
-        conn = FakeConexao()
-        conexoes_registradas.append(conn)
-        return conn
+    pool = FakePool(conexoes_registradas)
 
     # Patches no namespace do módulo testado:
-    monkeypatch.setattr(lc, "conectar", fake_conectar, raising=True)
+    monkeypatch.setattr(lc, "obter_roteador", lambda: pool, raising=True)
+    # Cache vazio por teste, para que cada chamada chegue ao DAO
+    cache = CacheLRU()
+    monkeypatch.setattr(lc, "obter_cache_autores", lambda: cache, raising=True)
+    ausentes = CacheLRU()
+    monkeypatch.setattr(lc, "obter_cache_ausentes", lambda: ausentes, raising=True)
     monkeypatch.setattr(lc, "LivroDAO", dao_cls, raising=True)
-    # PaginaDadosLivro é um módulo/classe com metodo exibe_livro
+    # PaginaDadosLivro é um módulo/classe com metodo exibe_pagina
     monkeypatch.setattr(lc, "PaginaDadosLivro", FakePagina, raising=True)
 
 
 # ---------- Testes ----------
 
-def test_listar_livro_quando_encontrado_deve_renderizar_primeiro_resultado(monkeypatch):
+def test_listar_livro_quando_encontrado_deve_renderizar_pagina_de_resultados(monkeypatch):
     conexoes = []
     _patch_ambiente(monkeypatch, FakeLivroDAOFound, conexoes)
 
     saida = lc.listar_livro("Autor A")
 
     # Verifica saída proveniente da view fake
-    assert saida == "EXIBE::Livro A|Autor A|123-ABC"
-    # Garante que a conexão foi fechada
-    assert len(conexoes) == 1 and conexoes[0].closed is True
+    assert saida == "EXIBE::Livro A|Autor A|123-ABC;Livro B|Autor A|456-DEF"
+    # Garante que a conexão foi devolvida ao pool
+    assert len(conexoes) == 1 and conexoes[0].devolvida is True
 
 
 def test_listar_livro_quando_nao_encontrado_lista_vazia(monkeypatch):
@@ -96,7 +123,7 @@ def test_listar_livro_quando_nao_encontrado_lista_vazia(monkeypatch):
     saida = lc.listar_livro("Autor Inexistente")
 
     assert saida == ("Livro não encontrado", 404)
-    assert len(conexoes) == 1 and conexoes[0].closed is True
+    assert len(conexoes) == 1 and conexoes[0].devolvida is True
 
 
 def test_listar_livro_quando_nao_encontrado_none(monkeypatch):
@@ -106,7 +133,7 @@ def test_listar_livro_quando_nao_encontrado_none(monkeypatch):
     saida = lc.listar_livro("Qualquer Autor")
 
     assert saida == ("Livro não encontrado", 404)
-    assert len(conexoes) == 1 and conexoes[0].closed is True
+    assert len(conexoes) == 1 and conexoes[0].devolvida is True
 
 
 def test_listar_livro_deve_passar_parametros_corretos_para_view(monkeypatch):
@@ -117,21 +144,21 @@ def test_listar_livro_deve_passar_parametros_corretos_para_view(monkeypatch):
     conexoes = []
     _patch_ambiente(monkeypatch, FakeLivroDAOFound, conexoes)
 
-    # Espiona a chamada de exibe_livro
+    # Espiona a chamada de exibe_pagina
     capturado = {}
-    def spy_exibe_livro(titulo, autor, isbn):
-        capturado["titulo"] = titulo
+    def spy_exibe_pagina(livros, autor, proxima_url=None):
+        capturado["isbns"] = [l.isbn for l in livros]
         capturado["autor"] = autor
-        capturado["isbn"] = isbn
+        capturado["proxima_url"] = proxima_url
         return "OK"
 
-    monkeypatch.setattr(lc.PaginaDadosLivro, "exibe_livro", spy_exibe_livro, raising=True)
+    monkeypatch.setattr(lc.PaginaDadosLivro, "exibe_pagina", spy_exibe_pagina, raising=True)
 
     saida = lc.listar_livro("Autor A")
 
     assert saida == "OK"
-    assert capturado == {"titulo": "Livro A", "autor": "Autor A", "isbn": "123-ABC"}
-    assert len(conexoes) == 1 and conexoes[0].closed is True
+    assert capturado == {"isbns": ["123-ABC", "456-DEF"], "autor": "Autor A", "proxima_url": None}
+    assert len(conexoes) == 1 and conexoes[0].devolvida is True
 
 
 def test_listar_livro_propaga_excecao_do_dao(monkeypatch):
@@ -141,7 +168,7 @@ def test_listar_livro_propaga_excecao_do_dao(monkeypatch):
     """
     class FakeDAOErro:
         def __init__(self, conn): pass
-        def pesquisar_por_autor(self, autor):
+        def pesquisar_por_autor_paginado(self, autor, limite, apos_titulo=None, apos_isbn=None):
             raise RuntimeError("erro no acesso a dados")
 
     conexoes = []
@@ -150,7 +177,177 @@ def test_listar_livro_propaga_excecao_do_dao(monkeypatch):
     with pytest.raises(RuntimeError):
         lc.listar_livro("Autor X")
 
-    # Mesmo em erro, a conexão é fechada (porque o close ocorre após a chamada).
-    # Observação: se a exceção ocorrer antes do close, este assert pode falhar.
-    # Se isso ocorrer, considere usar try/finally no controller para fechar sempre.
-    # Aqui mantemos o comportamento atual.
\ No newline at end of file
+    # Mesmo em erro, a conexão volta ao pool (o `with` do controller garante).
+    assert len(conexoes) == 1 and conexoes[0].devolvida is True
+
+
+def test_listar_livro_serve_autor_repetido_do_cache(monkeypatch):
+    conexoes = []
+    _patch_ambiente(monkeypatch, FakeLivroDAOFound, conexoes)
+
+    primeira = lc.listar_livro("Autor A")
+    segunda = lc.listar_livro("  autor a ")  # mesma chave normalizada
+
+    assert primeira == segunda == "EXIBE::Livro A|Autor A|123-ABC;Livro B|Autor A|456-DEF"
+    # Apenas a primeira chamada chegou ao banco
+    assert len(conexoes) == 1
+
+
+def test_listar_livro_nao_guarda_erro_de_banco_no_cache(monkeypatch):
+    conexoes = []
+    _patch_ambiente(monkeypatch, FakeLivroDAOErro, conexoes)
+
+    lc.listar_livro("Autor Inexistente")
+    lc.listar_livro("Autor Inexistente")
+
+    assert len(conexoes) == 2
+
+
+def test_listar_livro_responde_autor_sem_livros_do_cache_de_ausentes(monkeypatch):
+    conexoes = []
+    _patch_ambiente(monkeypatch, FakeLivroDAONotFound, conexoes)
+
+    assert lc.listar_livro("Autor Inexistente") == ("Livro não encontrado", 404)
+    assert lc.listar_livro(" autor INEXISTENTE") == ("Livro não encontrado", 404)
+    assert len(conexoes) == 1
+
+    # Livro gravado: o cache é esvaziado e a busca volta ao banco
+    lc.obter_cache_ausentes().invalidar()
+    lc.listar_livro("Autor Inexistente")
+    assert len(conexoes) == 2
+
+
+def test_listar_livro_monta_link_da_proxima_pagina(monkeypatch):
+    class FakeDAOComProxima(FakeLivroDAOFound):
+        def pesquisar_por_autor_paginado(self, autor, limite, apos_titulo=None, apos_isbn=None):
+            chamadas.append((autor, limite, apos_titulo, apos_isbn))
+            pagina = super().pesquisar_por_autor_paginado(autor, limite)
+            return pagina._replace(proximo=("Livro B", "456-DEF"))
+
+    chamadas = []
+    conexoes = []
+    _patch_ambiente(monkeypatch, FakeDAOComProxima, conexoes)
+    capturado = {}
+    monkeypatch.setattr(
+        lc.PaginaDadosLivro, "exibe_pagina",
+        lambda livros, autor, proxima_url=None: capturado.setdefault("url", proxima_url),
+    )
+
+    lc.listar_livro("Autor A", apos_titulo="Livro 0", apos_isbn="000", limite=2)
+
+    assert chamadas == [("Autor A", 2, "Livro 0", "000")]
+    assert capturado["url"] == "/pesquisa?autor=Autor+A&apos_titulo=Livro+B&apos_isbn=456-DEF"
+
+
+# ---------- Exportação ----------
+
+def test_exportar_livros_streaming_devolve_conexao(monkeypatch):
+    registradas = []
+
+    class FakeDAOExport:
+        def __init__(self, conexao):
+            self.conexao = conexao
+
+        def iterar_linhas(self, autor=None, lote=1000):
+            assert autor == "Autor X"
+            yield ("1", "Livro A", "Autor X")
+
+    _patch_ambiente(monkeypatch, FakeDAOExport, registradas)
+
+    content_type, blocos = lc.exportar_livros("Autor X", "csv")
+    assert registradas == []  # só empresta a conexão quando a iteração começa
+    corpo = b"".join(blocos)
+
+    assert content_type.startswith("text/csv")
+    assert corpo == b"isbn,titulo,autor\n1,Livro A,Autor X\n"
+    assert registradas[0].devolvida is True
+
+
+def test_exportar_livros_formato_invalido():
+    with pytest.raises(ValueError):
+        lc.exportar_livros(None, "xml")
+
+
+# ---------- API em lote ----------
+
+def test_buscar_livros_api_agrupa_resultado_em_json(monkeypatch):
+    import json
+
+    from app.dao.livro_dao import ResultadoLote
+    from app.model.livro import Livro, LivroResultSet
+
+    registradas = []
+    chamadas = []
+
+    class FakeDAOLote:
+        def __init__(self, conexao):
+            pass
+
+        def pesquisar_em_lote(self, autores, isbns, limite):
+            chamadas.append((autores, isbns, limite))
+            return ResultadoLote(
+                {"Fowler": LivroResultSet.de_linhas([("1", "Refactoring", "Martin Fowler")])},
+                {"9": Livro(isbn="9", titulo="Clean Code", autor="Robert Martin"), "404": None},
+            )
+
+    _patch_ambiente(monkeypatch, FakeDAOLote, registradas)
+
+    corpo, status = lc.buscar_livros_api([" Fowler ", ""], ["9", "404"], "5")
+
+    assert status == 200
+    assert chamadas == [(["Fowler"], ["9", "404"], 5)]
+    assert json.loads(corpo) == {
+        "autores": {"Fowler": [{"isbn": "1", "titulo": "Refactoring", "autor": "Martin Fowler"}]},
+        "isbns": {"9": {"isbn": "9", "titulo": "Clean Code", "autor": "Robert Martin"}, "404": None},
+    }
+    assert registradas[0].devolvida is True
+
+
+@pytest.mark.parametrize("autores, isbns, limite", [
+    ([], [], None),
+    (["A"], [], "abc"),
+    (["A"], [], "0"),
+    (["A"] * 101, [], None),
+])
+def test_buscar_livros_api_parametros_invalidos_400(autores, isbns, limite):
+    corpo, status = lc.buscar_livros_api(autores, isbns, limite)
+    assert status == 400 and "erro" in corpo
+
+
+def test_buscar_livros_api_erro_de_banco_503(monkeypatch):
+    import psycopg2
+
+    class FakeDAOFalha:
+        def __init__(self, conexao):
+            pass
+
+        def pesquisar_em_lote(self, *a):
+            raise psycopg2.OperationalError("fora do ar")
+
+    _patch_ambiente(monkeypatch, FakeDAOFalha, [])
+    corpo, status = lc.buscar_livros_api(["A"])
+    assert status == 503
+
+
+# ---------- Busca por ISBN ----------
+
+def test_exibir_livro_por_isbn(monkeypatch):
+    from app.model.livro import Livro
+
+    registradas = []
+
+    class FakeDAOIsbn:
+        def __init__(self, conexao):
+            pass
+
+        def buscar_por_isbn(self, isbn):
+            return Livro(isbn=isbn, titulo="Refactoring", autor="Fowler") if isbn == "1" else None
+
+    _patch_ambiente(monkeypatch, FakeDAOIsbn, registradas)
+    monkeypatch.setattr(
+        FakePagina, "exibe_livro", staticmethod(lambda t, a, i: f"LIVRO::{t}|{a}|{i}"), raising=False
+    )
+
+    assert lc.exibir_livro("1") == "LIVRO::Refactoring|Fowler|1"
+    assert lc.exibir_livro("2") == ("Livro não encontrado", 404)
+    assert all(c.devolvida for c in registradas)
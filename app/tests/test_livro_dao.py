@@ -155,9 +155,13 @@ def test_pesquisar_por_autor_retorna_lista_de_Livro(fake_conn, fake_cursor):
     assert resultado[0].autor == "Autor X"
 
     # 2) valida SQL e parâmetros
-    assert "WHERE autor ILIKE %s" in fake_cursor.last_sql
+    # Coluna e termo normalizados pela mesma função do banco
+    assert "WHERE autor_normalizado LIKE '%%' || replace(" in fake_cursor.last_sql
+    assert "biblioteca.normalizar_busca(%s)" in fake_cursor.last_sql
+    # Curingas do LIKE digitados pelo usuário valem como texto
+    assert "'%%', '\\%%'), '_', '\\_')" in fake_cursor.last_sql
     assert "ORDER BY titulo" in fake_cursor.last_sql
-    assert fake_cursor.last_params == ("%Autor X%",)
+    assert fake_cursor.last_params == ("Autor X",)
 
 
 def test_pesquisar_por_autor_sem_linhas_retorna_lista_vazia():
@@ -169,8 +173,8 @@ def test_pesquisar_por_autor_sem_linhas_retorna_lista_vazia():
 
     assert resultado == []
     # mesmo sem linhas, SQL e params devem ter sido passados
-    assert "ILIKE %s" in cursor_vazio.last_sql
-    assert cursor_vazio.last_params == ("%Ninguem%",)
+    assert "biblioteca.normalizar_busca(%s)" in cursor_vazio.last_sql
+    assert cursor_vazio.last_params == ("Ninguem",)
 
 
 def test_pesquisar_por_autor_trata_excecao_e_retorna_vazio(
@@ -185,4 +189,277 @@ def test_pesquisar_por_autor_trata_excecao_e_retorna_vazio(
     # retorna vazio e imprime mensagem de erro
     assert resultado == []
     out, err = capsys.readouterr()
-    assert "Erro no banco de dados:" in out
\ No newline at end of file
+    assert "Erro no banco de dados:" in out
+
+# =========================
+# Testes com pool de conexões
+# =========================
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.obtidas = 0
+        self.devolvidas = []
+
+    def obter(self):
+        self.obtidas += 1
+        return self.conn
+
+    def devolver(self, conn):
+        self.devolvidas.append(conn)
+
+
+def test__conn_empresta_do_pool_e_liberar_devolve(fake_conn, conectar_spy):
+    pool = FakePool(fake_conn)
+
+    with LivroDAO(pool=pool) as dao:
+        resultado = dao.pesquisar_por_autor("Autor X")
+        assert len(resultado) == 2
+
+    assert pool.obtidas == 1
+    assert pool.devolvidas == [fake_conn]
+    assert dao.conexao is None
+    assert conectar_spy["count"] == 0  # não abre conexão avulsa
+
+
+def test_liberar_nao_devolve_conexao_externa(fake_conn):
+    pool = FakePool(fake_conn)
+    dao = LivroDAO(conexao=fake_conn, pool=pool)
+
+    dao.pesquisar_por_autor("Autor X")
+    dao.liberar()
+
+    # Conexão recebida no construtor pertence a quem a criou
+    assert pool.devolvidas == []
+    assert dao.conexao is fake_conn
+
+
+def test_pesquisar_por_autor_async_devolve_conexao_ao_pool(fake_conn):
+    import asyncio
+
+    pool = FakePool(fake_conn)
+    dao = LivroDAO(pool=pool)
+
+    resultado = asyncio.run(dao.pesquisar_por_autor_async("Autor X"))
+
+    assert [l.titulo for l in resultado] == ["Algoritmos", "Banco de Dados"]
+    # A conexão não fica presa ao DAO entre chamadas assíncronas
+    assert pool.devolvidas == [fake_conn]
+    assert dao.conexao is None
+
+
+# =========================
+# Testes de pesquisar_por_autor_similar()
+# =========================
+class FakeCursorHistorico(FakeCursor):
+    """Registra todas as execuções, não só a última."""
+    def __init__(self, rows=None):
+        super().__init__(rows=rows)
+        self.execucoes = []
+
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        self.execucoes.append((self.last_sql, params))
+
+
+def test_pesquisar_por_autor_similar_define_limiar_e_ordena_por_similaridade(livro_rows):
+    cursor = FakeCursorHistorico(rows=livro_rows)
+    dao = LivroDAO(conexao=FakeConn(cursor))
+
+    resultado = dao.pesquisar_por_autor_similar("autr x", limiar=0.4)
+
+    assert [l.isbn for l in resultado] == ["9780000000001", "9780000000002"]
+    (sql_cfg, params_cfg), (sql_busca, params_busca) = cursor.execucoes
+    # limiar vale só para a transação (is_local = true)
+    assert "set_config('pg_trgm.similarity_threshold', %s, true)" in sql_cfg
+    assert params_cfg == ("0.4",)
+    assert "WHERE autor %% %s" in sql_busca
+    assert "ORDER BY similarity(autor, %s) DESC, titulo" in sql_busca
+    assert params_busca == ("autr x", "autr x")
+
+
+def test_pesquisar_por_autor_similar_rejeita_limiar_invalido(fake_conn):
+    dao = LivroDAO(conexao=fake_conn)
+    with pytest.raises(ValueError):
+        dao.pesquisar_por_autor_similar("fowler", limiar=1.5)
+
+
+# =========================
+# Testes de paginação e cursor nomeado
+# =========================
+def test_pesquisar_por_autor_paginado_primeira_pagina_indica_proxima(livro_rows):
+    cursor = FakeCursor(rows=livro_rows)
+    dao = LivroDAO(conexao=FakeConn(cursor))
+
+    pagina = dao.pesquisar_por_autor_paginado("Autor X", limite=1)
+
+    assert [l.isbn for l in pagina.livros] == ["9780000000001"]
+    assert pagina.proximo == ("Algoritmos", "9780000000001")
+    assert "(titulo, isbn) >" not in cursor.last_sql
+    assert "ORDER BY titulo, isbn LIMIT %s" in cursor.last_sql
+    assert cursor.last_params == ("Autor X", 2)  # limite + 1
+
+
+def test_pesquisar_por_autor_paginado_usa_cursor_keyset(livro_rows):
+    cursor = FakeCursor(rows=livro_rows[1:])
+    dao = LivroDAO(conexao=FakeConn(cursor))
+
+    pagina = dao.pesquisar_por_autor_paginado(
+        "Autor X", limite=5, apos_titulo="Algoritmos", apos_isbn="9780000000001"
+    )
+
+    assert [l.titulo for l in pagina.livros] == ["Banco de Dados"]
+    assert pagina.proximo is None  # última página
+    assert "AND (titulo, isbn) > (%s, %s)" in cursor.last_sql
+    assert cursor.last_params == ("Autor X", "Algoritmos", "9780000000001", 6)
+
+
+def test_pesquisar_por_autor_paginado_erro_devolve_pagina_vazia(patch_psycopg2_error, fake_conn):
+    fake_conn._cursor_obj.raise_on = "execute"
+    pagina = LivroDAO(conexao=fake_conn).pesquisar_por_autor_paginado("Autor X")
+    assert len(pagina.livros) == 0 and pagina.proximo is None
+    assert pagina.erro  # vazia por falha, não por falta de livros
+
+
+def test_iterar_livros_usa_cursor_nomeado_com_itersize(livro_rows):
+    class CursorNomeado(FakeCursor):
+        itersize = None
+
+        def __iter__(self):
+            return iter(self.rows)
+
+    cursor = CursorNomeado(rows=livro_rows)
+    nomes = []
+
+    class ConnNomeada(FakeConn):
+        def cursor(self, name=None):
+            nomes.append(name)
+            return cursor
+
+    dao = LivroDAO(conexao=ConnNomeada(cursor))
+
+    livros = list(dao.iterar_livros("Autor X", lote=500))
+
+    assert [l.isbn for l in livros] == ["9780000000001", "9780000000002"]
+    assert nomes[0] and nomes[0].startswith("livros_")
+    assert cursor.itersize == 500
+    assert cursor.last_params == ("Autor X",)
+
+
+def test_iterar_linhas_gera_tuplas_sem_criar_livro(livro_rows):
+    class CursorNomeado(FakeCursor):
+        itersize = None
+
+        def __iter__(self):
+            return iter(self.rows)
+
+    class ConnNomeada(FakeConn):
+        def cursor(self, name=None):
+            return self._cursor_obj
+
+    dao = LivroDAO(conexao=ConnNomeada(CursorNomeado(rows=livro_rows)))
+
+    assert list(dao.iterar_linhas()) == list(livro_rows)
+
+
+def test_pesquisar_em_lote_uma_consulta_agrupada_por_chave():
+    rows = [
+        ("autor", "Fowler", "1", "Refactoring", "Martin Fowler"),
+        ("autor", "Fowler", "2", "UML Distilled", "Martin Fowler"),
+        ("isbn", "9", "9", "Clean Code", "Robert Martin"),
+    ]
+    cursor = FakeCursor(rows=rows)
+    dao = LivroDAO(conexao=FakeConn(cursor))
+
+    resultado = dao.pesquisar_em_lote(["Fowler", "Beck", "Fowler"], ["9", "404"], limite_por_autor=5)
+
+    assert "unnest(%s::text[])" in cursor.last_sql and "= ANY(%s::text[])" in cursor.last_sql
+    assert cursor.last_params == (["Fowler", "Beck"], 5, ["9", "404"])
+    assert list(resultado.por_autor) == ["Fowler", "Beck"]
+    assert resultado.por_autor["Fowler"].isbns == ("1", "2")
+    assert len(resultado.por_autor["Beck"]) == 0
+    assert resultado.por_isbn["9"].titulo == "Clean Code"
+    assert resultado.por_isbn["404"] is None
+
+
+def test_pesquisar_em_lote_vazio_nao_consulta_banco():
+    cursor = FakeCursor()
+    resultado = LivroDAO(conexao=FakeConn(cursor)).pesquisar_em_lote()
+    assert resultado == ({}, {}) and cursor.last_sql is None
+
+
+class CursorRegistrador(FakeCursor):
+    """Registra todos os SQLs executados na conexão (não só o último)."""
+    def __init__(self, conn, rows):
+        super().__init__(rows=rows)
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        self.conn.executados.append((self.last_sql, params))
+        if self.conn.falhas_execute and sql.startswith("EXECUTE"):
+            raise self.conn.falhas_execute.pop(0)
+
+
+class ConnRegistradora:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.executados = []
+        self.falhas_execute = []
+        self.rollbacks = 0
+        self.closed = 0
+
+    def cursor(self):
+        return CursorRegistrador(self, self.rows)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_buscar_por_isbn_prepara_uma_vez_e_reusa():
+    conn = ConnRegistradora(rows=[("1", "Refactoring", "Fowler")])
+    dao = LivroDAO(conexao=conn)
+
+    livro = dao.buscar_por_isbn("1")
+    dao.buscar_por_isbn("1")
+
+    assert livro == Livro(isbn="1", titulo="Refactoring", autor="Fowler")
+    sqls = [sql for sql, _ in conn.executados]
+    assert sqls[0].startswith("PREPARE livro_por_isbn (text) AS SELECT")
+    assert sqls[1:] == ["EXECUTE livro_por_isbn (%s)"] * 2
+    assert conn.executados[1][1] == ("1",)
+
+
+def test_buscar_por_isbn_inexistente_devolve_none():
+    assert LivroDAO(conexao=ConnRegistradora()).buscar_por_isbn("404") is None
+
+
+def test_buscar_por_isbn_prepara_de_novo_se_sessao_perdeu_o_nome():
+    from psycopg2.errors import InvalidSqlStatementName
+
+    conn = ConnRegistradora(rows=[("1", "T", "A")])
+    dao = LivroDAO(conexao=conn)
+    dao.buscar_por_isbn("1")
+    conn.falhas_execute.append(InvalidSqlStatementName("não existe"))
+
+    assert dao.buscar_por_isbn("1").isbn == "1"
+    sqls = [sql.split(" (")[0] for sql, _ in conn.executados]
+    assert sqls == ["PREPARE livro_por_isbn", "EXECUTE livro_por_isbn",
+                    "EXECUTE livro_por_isbn", "PREPARE livro_por_isbn", "EXECUTE livro_por_isbn"]
+    assert conn.rollbacks == 1
+
+
+def test_buscar_por_isbns_usa_array_e_devolve_dict():
+    conn = ConnRegistradora(rows=[("1", "T1", "A"), ("2", "T2", "B")])
+    livros = LivroDAO(conexao=conn).buscar_por_isbns(["1", "2", "1", "3"])
+
+    assert set(livros) == {"1", "2"} and livros["2"].titulo == "T2"
+    assert conn.executados[-1] == ("EXECUTE livros_por_isbns (%s)", (["1", "2", "3"],))
+    assert LivroDAO(conexao=ConnRegistradora()).buscar_por_isbns([]) == {}
+
+
+def test_autores_e_titulos_distintos():
+    cursor = FakeCursor(rows=[("Valor",)])
+    autores, titulos = LivroDAO(conexao=FakeConn(cursor)).autores_e_titulos()
+
+    assert autores == ["Valor"] and titulos == ["Valor"]
+    assert cursor.last_sql == "SELECT DISTINCT titulo FROM biblioteca.livros"
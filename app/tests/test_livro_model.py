@@ -1,9 +1,12 @@
 # app/tests/test_livro_controller.py
+from contextlib import contextmanager
 from types import SimpleNamespace
 import pytest
 
 # Módulo sob teste
 import app.controller.livro_controller as lc
+from app.dao.cache_livros import CacheLRU
+from app.dao.livro_dao import PaginaLivros
 
 
 # ---------- Fakes utilitários ----------
@@ -11,55 +14,73 @@ import app.controller.livro_controller as lc
 class FakeConexao:
     def __init__(self):
         self.closed = False
+        self.devolvida = False
     def close(self):
         self.closed = True
 
 
+class FakePool:
+    """Simula o roteador de conexões: empresta FakeConexao e registra devoluções."""
+    def __init__(self, conexoes_registradas):
+        self.conexoes_registradas = conexoes_registradas
+
+    @contextmanager
+    def leitura(self):
+        conn = FakeConexao()
+        self.conexoes_registradas.append(conn)
+        try:
+            yield conn
+        finally:
+            conn.devolvida = True
+
+
 class FakeLivroDAOFound:
     """DAO fake que encontra livros por autor."""
     def __init__(self, conexao):
         self.conexao = conexao
         self.ultimo_autor = None
-    def pesquisar_por_autor(self, autor):
+    def pesquisar_por_autor_paginado(self, autor, limite, apos_titulo=None, apos_isbn=None):
         self.ultimo_autor = autor
-        # O controller acessa [0].titulo/.autor/.isbn
-        return [
+        # A view acessa .titulo/.autor/.isbn de cada livro
+        return PaginaLivros([
             SimpleNamespace(titulo="Livro A", autor="Autor A", isbn="123-ABC"),
             SimpleNamespace(titulo="Livro B", autor="Autor A", isbn="456-DEF"),
-        ]
+        ])
 
 
 class FakeLivroDAONotFound:
     """DAO fake sem resultados."""
     def __init__(self, conexao):
         self.conexao = conexao
-    def pesquisar_por_autor(self, autor):
-        return []
+    def pesquisar_por_autor_paginado(self, autor, limite, apos_titulo=None, apos_isbn=None):
+        return PaginaLivros([])
 
 
 class FakeLivroDAOReturnsNone(FakeLivroDAONotFound):
     """Alguns DAOs podem retornar None quando não encontram resultados."""
-    def pesquisar_por_autor(self, autor):
+    def pesquisar_por_autor_paginado(self, autor, limite, apos_titulo=None, apos_isbn=None):
         return None
 
 
 class FakePagina:
     """View fake usada pelo controller."""
     @staticmethod
-    def exibe_livro(titulo, autor, isbn):
-        return f"EXIBE::{titulo}|{autor}|{isbn}"
+    def exibe_pagina(livros, autor, proxima_url=None):
+        return "EXIBE::" + ";".join(f"{l.titulo}|{l.autor}|{l.isbn}" for l in livros)
 
 
 # ---------- Helper para montar o ambiente (patches) ----------
 
 def _patch_ambiente(monkeypatch, dao_cls, conexoes_registradas):
-    """Patches em conectar, LivroDAO e PaginaDadosLivro no módulo do controller."""
-    def fake_conectar():
-        conn = FakeConexao()
-        conexoes_registradas.append(conn)
-        return conn
-
-    monkeypatch.setattr(lc, "conectar", fake_conectar, raising=True)
+    """Patches em obter_roteador, LivroDAO e PaginaDadosLivro no módulo do controller."""
+    pool = FakePool(conexoes_registradas)
+
+    monkeypatch.setattr(lc, "obter_roteador", lambda: pool, raising=True)
+    # Cache vazio por teste, para que cada chamada chegue ao DAO
+    cache = CacheLRU()
+    monkeypatch.setattr(lc, "obter_cache_autores", lambda: cache, raising=True)
+    ausentes = CacheLRU()
+    monkeypatch.setattr(lc, "obter_cache_ausentes", lambda: ausentes, raising=True)
     monkeypatch.setattr(lc, "LivroDAO", dao_cls, raising=True)
     monkeypatch.setattr(lc, "PaginaDadosLivro", FakePagina, raising=True)
 
@@ -72,10 +93,10 @@ def test_listar_livro_quando_encontrado(monkeypatch):
 
     saida = lc.listar_livro("Autor A")
 
-    # Retorno da view fake com os campos do primeiro resultado
-    assert saida == "EXIBE::Livro A|Autor A|123-ABC"
-    # Conexão deve ser fechada no caminho de sucesso
-    assert len(conexoes) == 1 and conexoes[0].closed is True
+    # Retorno da view fake com os campos de todos os livros da página
+    assert saida == "EXIBE::Livro A|Autor A|123-ABC;Livro B|Autor A|456-DEF"
+    # Conexão deve ser devolvida ao pool no caminho de sucesso
+    assert len(conexoes) == 1 and conexoes[0].devolvida is True
 
 
 def test_listar_livro_quando_nao_encontrado_lista_vazia(monkeypatch):
@@ -85,7 +106,7 @@ def test_listar_livro_quando_nao_encontrado_lista_vazia(monkeypatch):
     saida = lc.listar_livro("Autor Inexistente")
 
     assert saida == ("Livro não encontrado", 404)
-    assert len(conexoes) == 1 and conexoes[0].closed is True
+    assert len(conexoes) == 1 and conexoes[0].devolvida is True
 
 
 def test_listar_livro_quando_nao_encontrado_none(monkeypatch):
@@ -95,7 +116,7 @@ def test_listar_livro_quando_nao_encontrado_none(monkeypatch):
     saida = lc.listar_livro("Qualquer Autor")
 
     assert saida == ("Livro não encontrado", 404)
-    assert len(conexoes) == 1 and conexoes[0].closed is True
+    assert len(conexoes) == 1 and conexoes[0].devolvida is True
 
 
 def test_listar_livro_parametros_corretos_para_view(monkeypatch):
@@ -103,26 +124,26 @@ def test_listar_livro_parametros_corretos_para_view(monkeypatch):
     _patch_ambiente(monkeypatch, FakeLivroDAOFound, conexoes)
 
     capturado = {}
-    def spy_exibe_livro(titulo, autor, isbn):
-        capturado["titulo"] = titulo
+    def spy_exibe_pagina(livros, autor, proxima_url=None):
+        capturado["isbns"] = [l.isbn for l in livros]
         capturado["autor"] = autor
-        capturado["isbn"] = isbn
+        capturado["proxima_url"] = proxima_url
         return "OK"
 
-    monkeypatch.setattr(lc.PaginaDadosLivro, "exibe_livro", spy_exibe_livro, raising=True)
+    monkeypatch.setattr(lc.PaginaDadosLivro, "exibe_pagina", spy_exibe_pagina, raising=True)
 
     saida = lc.listar_livro("Autor A")
 
     assert saida == "OK"
-    assert capturado == {"titulo": "Livro A", "autor": "Autor A", "isbn": "123-ABC"}
-    assert len(conexoes) == 1 and conexoes[0].closed is True
+    assert capturado == {"isbns": ["123-ABC", "456-DEF"], "autor": "Autor A", "proxima_url": None}
+    assert len(conexoes) == 1 and conexoes[0].devolvida is True
 
 
 def test_listar_livro_propaga_excecao_do_dao(monkeypatch):
     """Comportamento atual: se o DAO lança, a exceção é propagada (não é capturada)."""
     class FakeDAOErro:
         def __init__(self, conn): pass
-        def pesquisar_por_autor(self, autor):
+        def pesquisar_por_autor_paginado(self, autor, limite, apos_titulo=None, apos_isbn=None):
             raise RuntimeError("falha no DAO")
 
     conexoes = []
@@ -130,5 +151,47 @@ def test_listar_livro_propaga_excecao_do_dao(monkeypatch):
 
     with pytest.raises(RuntimeError):
         lc.listar_livro("Autor X")
-    # Observação: sem try/finally no controller, a conexão pode não fechar em erro.
-    # Se desejar garantir fechamento, alterar o controller para usar try/finally.
+    # O `with` do controller devolve a conexão ao pool mesmo em erro.
+    assert len(conexoes) == 1 and conexoes[0].devolvida is True
+
+
+# ---------- Testes do modelo Livro / LivroResultSet ----------
+
+from app.model.livro import Livro, LivroResultSet
+
+
+def test_livro_usa_slots_sem_dict():
+    livro = Livro(isbn="1", autor="A", titulo="T")
+    assert not hasattr(livro, "__dict__")
+    with pytest.raises(AttributeError):
+        livro.editora = "X"
+
+
+def test_livro_igualdade_e_hash_pelo_isbn():
+    a = Livro(isbn="1", autor="A", titulo="T")
+    b = Livro(isbn="1", autor="Outro", titulo="Outro")
+    c = Livro(isbn="2", autor="A", titulo="T")
+
+    assert a == b and hash(a) == hash(b)
+    assert a != c
+    assert len({a, b, c}) == 2
+
+
+def test_result_set_guarda_colunas_e_materializa_sob_demanda():
+    rs = LivroResultSet.de_linhas([("1", "Algoritmos", "X"), ("2", "Banco de Dados", "Y")])
+
+    assert len(rs) == 2 and bool(rs)
+    assert rs.titulos == ("Algoritmos", "Banco de Dados")
+    assert rs[1] == Livro(isbn="2", autor="Y", titulo="Banco de Dados")
+    assert [l.autor for l in rs] == ["X", "Y"]
+    assert list(rs.linhas()) == [("1", "Algoritmos", "X"), ("2", "Banco de Dados", "Y")]
+
+
+def test_result_set_fatia_sem_materializar_e_vazio_e_falso():
+    rs = LivroResultSet.de_linhas([("1", "A", "X"), ("2", "B", "Y"), ("3", "C", "Z")])
+
+    fatia = rs[1:]
+    assert isinstance(fatia, LivroResultSet) and fatia.isbns == ("2", "3")
+    assert not LivroResultSet.de_linhas([])
+    with pytest.raises(ValueError):
+        LivroResultSet(("1",), (), ())
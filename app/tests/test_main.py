@@ -1,7 +1,9 @@
 # app/tests/test_main.py
 import io
 import sys
+import time
 import types
+from email.message import Message
 from pathlib import Path
 import pytest
 
@@ -44,6 +46,7 @@ def _make_handler(monkeypatch):
     h = app_main.BibliotecaMVCHandler.__new__(app_main.BibliotecaMVCHandler)
     h.rfile = io.BytesIO()
     h.wfile = io.BytesIO()
+    h.headers = Message()
     h.client_address = ("127.0.0.1", 0)
     h.server = None
     h.command = "GET"
@@ -96,3 +99,339 @@ def test_render_template_sucesso(monkeypatch, tmp_path, monkeypatch_context=None
     h, cap = _make_handler(monkeypatch)
     h.render_template("index.html")
 
+
+
+# -----------------------------------------------------------------------------
+# Testes do serve_static() com cache HTTP
+# -----------------------------------------------------------------------------
+
+def test_serve_static_envia_validadores_de_cache(monkeypatch):
+    h, cap = _make_handler(monkeypatch)
+    h.serve_static("/static/css/style.css")
+
+    nomes = dict(cap["headers"])
+    assert cap["status"] == 200
+    assert nomes["Content-Type"] == "text/css"
+    assert nomes["ETag"] and nomes["Last-Modified"]
+    assert nomes["Cache-Control"].startswith("public, max-age=")
+    assert h.wfile.getvalue().startswith(b"@import")
+
+
+def test_serve_static_responde_304_quando_etag_confere(monkeypatch):
+    h, cap = _make_handler(monkeypatch)
+    h.serve_static("/static/css/style.css")
+    etag = dict(cap["headers"])["ETag"]
+
+    h2, cap2 = _make_handler(monkeypatch)
+    h2.headers["If-None-Match"] = etag
+    h2.serve_static("/static/css/style.css")
+
+    assert cap2["status"] == 304
+    assert h2.wfile.getvalue() == b""
+    assert ("ETag", etag) in cap2["headers"]
+
+
+def test_serve_static_inexistente_retorna_404(monkeypatch):
+    h, cap = _make_handler(monkeypatch)
+    h.serve_static("/static/nao-existe.css")
+    assert cap["status"] == 404
+
+
+def test_respond_comprime_corpo_grande_quando_cliente_aceita(monkeypatch):
+    import gzip
+
+    h, cap = _make_handler(monkeypatch)
+    h.headers["Accept-Encoding"] = "gzip"
+    html = "<li>livro</li>" * 500
+    h.respond(html)
+
+    assert ("Content-Encoding", "gzip") in cap["headers"]
+    assert ("Vary", "Accept-Encoding") in cap["headers"]
+    assert gzip.decompress(h.wfile.getvalue()) == html.encode("utf-8")
+
+
+def test_serve_static_envia_variante_comprimida(monkeypatch):
+    import gzip
+
+    h, cap = _make_handler(monkeypatch)
+    h.headers["Accept-Encoding"] = "gzip"
+    h.serve_static("/static/css/style.css")
+
+    assert ("Content-Encoding", "gzip") in cap["headers"]
+    assert gzip.decompress(h.wfile.getvalue()).startswith(b"@import")
+
+
+def test_serve_static_envia_do_disco_arquivo_maior_que_o_orcamento(monkeypatch, tmp_path):
+    from app.servidor import estaticos
+
+    (tmp_path / "grande.css").write_bytes(b"a{}" * 100)
+    monkeypatch.setattr(estaticos, "_cache", estaticos.CacheEstaticos(raiz=tmp_path, orcamento=10))
+    h, cap = _make_handler(monkeypatch)
+    h.headers["Accept-Encoding"] = "gzip"
+    h.serve_static("/static/grande.css")
+
+    nomes = dict(cap["headers"])
+    assert cap["status"] == 200
+    assert nomes["Content-Length"] == "300"
+    assert "Content-Encoding" not in nomes
+    assert h.wfile.getvalue() == b"a{}" * 100
+
+
+# -----------------------------------------------------------------------------
+# Exportação em streaming (Transfer-Encoding: chunked)
+# -----------------------------------------------------------------------------
+
+def _dechunk(dados: bytes) -> tuple[bytes, bool]:
+    """Decodifica um corpo chunked; devolve (corpo, terminou_com_chunk_final)."""
+    corpo = b""
+    while dados:
+        tamanho, _, resto = dados.partition(b"\r\n")
+        n = int(tamanho, 16)
+        if n == 0:
+            return corpo, True
+        corpo += resto[:n]
+        dados = resto[n + 2:]
+    return corpo, False
+
+
+def test_respond_stream_envia_chunks(monkeypatch):
+    h, cap = _make_handler(monkeypatch)
+    h.respond_stream(iter([b"abc", b"", b"defg"]), "text/csv; charset=utf-8", nome_arquivo="livros.csv")
+
+    corpo, completo = _dechunk(h.wfile.getvalue())
+    assert cap["status"] == 200
+    assert ("Transfer-Encoding", "chunked") in cap["headers"]
+    assert ("Content-Disposition", 'attachment; filename="livros.csv"') in cap["headers"]
+    assert not any(k == "Content-Length" for k, _ in cap["headers"])
+    assert corpo == b"abcdefg" and completo
+
+
+def test_respond_stream_comprime_em_streaming(monkeypatch):
+    import gzip
+
+    h, cap = _make_handler(monkeypatch)
+    h.headers["Accept-Encoding"] = "gzip"
+    h.respond_stream(iter([b"linha\n"] * 1000), "text/csv; charset=utf-8")
+
+    corpo, completo = _dechunk(h.wfile.getvalue())
+    assert ("Content-Encoding", "gzip") in cap["headers"]
+    assert completo and gzip.decompress(corpo) == b"linha\n" * 1000
+
+
+def test_respond_stream_http10_fecha_conexao(monkeypatch):
+    h, cap = _make_handler(monkeypatch)
+    h.request_version = "HTTP/1.0"
+    h.respond_stream(iter([b"abc"]), "text/csv")
+    assert ("Connection", "close") in cap["headers"]
+    assert h.wfile.getvalue() == b"abc"
+
+
+def test_respond_stream_falha_antes_do_primeiro_bloco_vira_500(monkeypatch):
+    h, cap = _make_handler(monkeypatch)
+    monkeypatch.setattr(app_main.BibliotecaMVCHandler, "log_error", lambda *a: None)
+
+    def blocos():
+        raise RuntimeError("banco fora")
+        yield b""
+
+    h.respond_stream(blocos(), "text/csv")
+    assert cap["status"] == 500
+
+
+def test_respond_stream_falha_no_meio_corta_resposta(monkeypatch):
+    h, cap = _make_handler(monkeypatch)
+    monkeypatch.setattr(app_main.BibliotecaMVCHandler, "log_error", lambda *a: None)
+    h.close_connection = False
+
+    def blocos():
+        yield b"abc"
+        raise RuntimeError("banco caiu")
+
+    h.respond_stream(blocos(), "text/csv")
+    corpo, completo = _dechunk(h.wfile.getvalue())
+    assert cap["status"] == 200 and corpo == b"abc"
+    assert not completo and h.close_connection is True
+
+
+def test_exportar_formato_invalido_retorna_400(monkeypatch):
+    h, cap = _make_handler(monkeypatch)
+    h.path = "/exportar?formato=xml"
+    h.do_GET()
+    assert cap["status"] == 400
+
+
+# -----------------------------------------------------------------------------
+# HTTP/1.1: conexões persistentes com servidor real (porta efêmera)
+# -----------------------------------------------------------------------------
+
+@pytest.fixture
+def servidor_real(monkeypatch):
+    import threading
+    from app.servidor.modos import ServidorThreadPool
+
+    httpd = ServidorThreadPool(("127.0.0.1", 0), app_main.BibliotecaMVCHandler, threads=2)
+    monkeypatch.setattr(app_main.BibliotecaMVCHandler, "log_message", lambda *a: None)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_keep_alive_reusa_conexao_com_content_length(servidor_real):
+    import http.client
+
+    conn = http.client.HTTPConnection("127.0.0.1", servidor_real, timeout=5)
+    conn.request("GET", "/static/css/style.css")
+    r1 = conn.getresponse()
+    corpo1 = r1.read()
+    sock = conn.sock
+    conn.request("GET", "/static/css/style.css")
+    r2 = conn.getresponse()
+    r2.read()
+
+    assert r1.version == 11 and r1.status == 200
+    assert int(r1.getheader("Content-Length")) == len(corpo1)
+    assert conn.sock is sock  # mesma conexão TCP nas duas requisições
+    conn.close()
+
+
+def test_conexao_fecha_ao_atingir_limite_de_requisicoes(servidor_real, monkeypatch):
+    import http.client
+
+    monkeypatch.setattr(app_main.BibliotecaMVCHandler, "max_requisicoes", 2)
+    conn = http.client.HTTPConnection("127.0.0.1", servidor_real, timeout=5)
+    cabecalhos = []
+    for _ in range(2):
+        conn.request("GET", "/static/css/style.css")
+        resp = conn.getresponse()
+        resp.read()
+        cabecalhos.append(resp.getheader("Connection"))
+
+    assert cabecalhos == [None, "close"]
+    conn.close()
+
+
+def test_conexao_ociosa_e_fechada_apos_timeout(servidor_real, monkeypatch):
+    import socket
+    import time
+
+    monkeypatch.setattr(app_main.BibliotecaMVCHandler, "timeout", 0.2)
+    with socket.create_connection(("127.0.0.1", servidor_real), timeout=5) as s:
+        time.sleep(0.5)
+        assert s.recv(1) == b""  # servidor encerrou a conexão ociosa
+
+
+def test_api_livros_responde_json(monkeypatch):
+    import app.controller.livro_controller as lc
+
+    recebidos = []
+
+    def fake_buscar(autores, isbns, limite):
+        recebidos.append((autores, isbns, limite))
+        return '{"autores": {}, "isbns": {}}', 200
+
+    monkeypatch.setattr(lc, "buscar_livros_api", fake_buscar)
+    h, cap = _make_handler(monkeypatch)
+    h.path = "/api/livros?autor=A&autor=B&isbn=1&limite=3"
+    h.do_GET()
+
+    assert recebidos == [(["A", "B"], ["1"], "3")]
+    assert cap["status"] == 200
+    assert ("Content-Type", "application/json; charset=utf-8") in cap["headers"]
+
+
+def test_api_autocomplete_responde_json(monkeypatch):
+    import app.controller.livro_controller as lc
+
+    recebidos = []
+
+    def fake_autocompletar(prefixo, limite):
+        recebidos.append((prefixo, limite))
+        return '{"q": "fow", "autores": [], "titulos": []}', 200
+
+    monkeypatch.setattr(lc, "autocompletar", fake_autocompletar)
+    h, cap = _make_handler(monkeypatch)
+    h.path = "/api/autocomplete?q=fow&limite=5"
+    h.do_GET()
+
+    assert recebidos == [("fow", "5")]
+    assert cap["status"] == 200
+    assert ("Content-Type", "application/json; charset=utf-8") in cap["headers"]
+
+
+def test_rota_livro_por_isbn(monkeypatch):
+    import app.controller.livro_controller as lc
+
+    pedidos = []
+    monkeypatch.setattr(lc, "exibir_livro", lambda isbn: pedidos.append(isbn) or "<p>ok</p>")
+    h, cap = _make_handler(monkeypatch)
+    h.path = "/livro/978-85%2001"
+    h.do_GET()
+
+    assert pedidos == ["978-85 01"]
+    assert cap["status"] == 200 and h.wfile.getvalue() == b"<p>ok</p>"
+
+
+def test_rota_livro_sem_isbn_404(monkeypatch):
+    h, cap = _make_handler(monkeypatch)
+    h.path = "/livro/"
+    h.do_GET()
+    assert cap["status"] == 404
+
+
+def test_metrics_conta_requisicoes_por_rota_e_status(servidor_real, monkeypatch):
+    import http.client
+
+    import app.metricas as metricas_mod
+
+    monkeypatch.setattr(metricas_mod, "_metricas", metricas_mod.Metricas())
+    conn = http.client.HTTPConnection("127.0.0.1", servidor_real, timeout=5)
+    for alvo in ("/static/css/style.css", "/nao-existe"):
+        conn.request("GET", alvo)
+        conn.getresponse().read()
+    # O 404 fecha a conexão e a requisição é contada depois da resposta
+    # enviada: /metrics pode chegar (por outra conexão) antes disso
+    for tentativa in range(1, 51):
+        conn.request("GET", "/metrics")
+        resp = conn.getresponse()
+        corpo = resp.read().decode("utf-8")
+        if 'status="404"' in corpo:
+            break
+        time.sleep(0.01)
+    conn.close()
+
+    assert resp.getheader("Content-Type").startswith("text/plain; version=0.0.4")
+    assert 'biblioteca_requisicoes_total{rota="/static/*",status="200"} 1' in corpo
+    assert 'biblioteca_requisicoes_total{rota="outras",status="404"} 1' in corpo
+    assert f'biblioteca_etapa_segundos_count{{etapa="roteamento"}} {2 + tentativa}' in corpo
+
+
+def test_servidor_de_uma_thread_fecha_a_conexao_apos_cada_resposta(monkeypatch):
+    import http.client
+    import socket
+    import threading
+
+    from app.servidor.modos import criar_servidor
+
+    monkeypatch.setattr(app_main.BibliotecaMVCHandler, "log_message", lambda *a: None)
+    httpd = criar_servidor(("127.0.0.1", 0), app_main.BibliotecaMVCHandler, threads=1)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        porta = httpd.server_address[1]
+        conn = http.client.HTTPConnection("127.0.0.1", porta, timeout=5)
+        conn.request("GET", "/static/css/style.css")
+        resp = conn.getresponse()
+        resp.read()
+        assert resp.getheader("Connection") == "close"
+
+        # Um cliente que ficaria ocioso não segura o servidor: o próximo é atendido
+        with socket.create_connection(("127.0.0.1", porta), timeout=5) as ocioso:
+            ocioso.sendall(b"GET /static/css/style.css HTTP/1.1\r\nHost: x\r\n\r\n")
+            outro = http.client.HTTPConnection("127.0.0.1", porta, timeout=2)
+            outro.request("GET", "/static/css/style.css")
+            assert outro.getresponse().status == 200
+            outro.close()
+        conn.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
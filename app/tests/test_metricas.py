@@ -0,0 +1,69 @@
+import pytest
+
+import app.metricas as m
+
+
+@pytest.fixture
+def metricas(monkeypatch):
+    registro = m.Metricas(limites=(0.01, 0.1))
+    monkeypatch.setattr(m, "_metricas", registro)
+    return registro
+
+
+def test_histograma_conta_no_bucket_certo_e_exporta_cumulativo(metricas):
+    for valor in (0.005, 0.01, 0.05, 3.0):
+        metricas.observar("biblioteca_etapa_segundos", valor, etapa="consulta")
+
+    texto = metricas.exportar()
+
+    assert "# TYPE biblioteca_etapa_segundos histogram" in texto
+    assert 'biblioteca_etapa_segundos_bucket{etapa="consulta",le="0.01"} 2' in texto
+    assert 'biblioteca_etapa_segundos_bucket{etapa="consulta",le="0.1"} 3' in texto
+    assert 'biblioteca_etapa_segundos_bucket{etapa="consulta",le="+Inf"} 4' in texto
+    assert 'biblioteca_etapa_segundos_count{etapa="consulta"} 4' in texto
+    assert 'biblioteca_etapa_segundos_sum{etapa="consulta"} 3.065' in texto
+
+
+def test_registrar_requisicao_conta_por_rota_e_status(metricas):
+    metricas.registrar_requisicao("/pesquisa", 200, 0.02)
+    metricas.registrar_requisicao("/pesquisa", 200, 0.03)
+    metricas.registrar_requisicao("/pesquisa", 404, 0.01)
+
+    texto = metricas.exportar()
+
+    assert 'biblioteca_requisicoes_total{rota="/pesquisa",status="200"} 2' in texto
+    assert 'biblioteca_requisicoes_total{rota="/pesquisa",status="404"} 1' in texto
+    assert 'biblioteca_requisicao_segundos_count{rota="/pesquisa"} 3' in texto
+    assert texto.count("# TYPE biblioteca_requisicoes_total counter") == 1
+
+
+def test_medir_etapa_observa_duracao_mesmo_com_excecao(metricas):
+    with pytest.raises(RuntimeError):
+        with m.medir_etapa("renderizacao"):
+            raise RuntimeError("falhou")
+    assert 'biblioteca_etapa_segundos_count{etapa="renderizacao"} 1' in metricas.exportar()
+
+
+def test_metricas_inativas_nao_registram():
+    registro = m.Metricas(ativo=False)
+    registro.incrementar("x")
+    with registro.medir("y"):
+        pass
+    assert registro.exportar() == "\n"
+
+
+def test_rotulos_sao_escapados(metricas):
+    metricas.incrementar("teste_total", rota='a"b\\c')
+    assert 'teste_total{rota="a\\"b\\\\c"} 1' in metricas.exportar()
+
+
+@pytest.mark.parametrize("path, rota", [
+    ("/static/css/style.css", "/static/*"),
+    ("/livro/123", "/livro/{isbn}"),
+    ("/pesquisa", "/pesquisa"),
+    ("/api/livros", "/api/livros"),
+    ("/", "/"),
+    ("/wp-admin", "outras"),
+])
+def test_rota_metrica_limita_cardinalidade(path, rota):
+    assert m.rota_metrica(path) == rota
@@ -90,4 +90,28 @@ def test_exibe_livro_converte_argumentos_para_string(titulo, autor, isbn):
     # f-string converte para str(...) implicitamente
     assert _normalize(f"<li>Título: {str(titulo)}</li>") in norm
     assert _normalize(f"<li>Autor: {str(autor)}</li>") in norm
-    assert _normalize(f"<li>ISBN: {str(isbn)}</li>") in norm
\ No newline at end of file
+    assert _normalize(f"<li>ISBN: {str(isbn)}</li>") in norm
+
+def test_exibe_pagina_lista_livros_e_link_da_proxima():
+    from types import SimpleNamespace
+
+    livros = [
+        SimpleNamespace(titulo="Livro A", autor="Autor", isbn="1"),
+        SimpleNamespace(titulo="Livro B", autor="Autor", isbn="2"),
+    ]
+    saida = PaginaDadosLivro.exibe_pagina(livros, "Autor", "/pesquisa?autor=Autor&apos_titulo=Livro+B")
+
+    assert saida.count("<li>") == 2
+    assert "Livro A" in saida and "Livro B" in saida
+    assert 'href="/pesquisa?autor=Autor&amp;apos_titulo=Livro+B"' in saida
+
+
+def test_exibe_pagina_escapa_html_e_omite_link_na_ultima_pagina():
+    from types import SimpleNamespace
+
+    livros = [SimpleNamespace(titulo="<script>x</script>", autor="A & B", isbn="1")]
+    saida = PaginaDadosLivro.exibe_pagina(livros, "<b>", None)
+
+    assert "<script>" not in saida and "&lt;script&gt;" in saida
+    assert "A &amp; B" in saida
+    assert "Próxima página" not in saida
@@ -0,0 +1,132 @@
+import json
+import logging
+
+import pytest
+
+import app.dao.perfil_consultas as pc
+from app.dao.livro_dao import LivroDAO
+
+
+class CursorPerfil:
+    def __init__(self, falhar_explain=False):
+        self.executados = []
+        self.falhar_explain = falhar_explain
+        self._resultado = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executados.append(sql)
+        if sql.startswith("EXPLAIN"):
+            if self.falhar_explain:
+                raise RuntimeError("sem permissão")
+            self._resultado = [("Index Scan using livros_pkey",), ("Buffers: shared hit=3",)]
+        else:
+            self._resultado = [("1", "Titulo", "Autor")]
+
+    def fetchall(self):
+        return list(self._resultado)
+
+
+class ConexaoPerfil:
+    closed = 0
+    autocommit = False
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+def _relogio(*instantes):
+    valores = iter(instantes)
+    return lambda: next(valores)
+
+
+def test_agrega_estatisticas_por_consulta():
+    perfil = pc.PerfilConsultas(limiar_lento=1.0, amostragem=0, relogio=_relogio(0, 0.1, 1, 1.3))
+    cur = CursorPerfil()
+
+    perfil.executar(None, cur, "q", "SELECT  1\n  FROM x", ())
+    perfil.executar(None, cur, "q", "SELECT 1 FROM x", ())
+
+    consulta = perfil.relatorio()["consultas"]["q"]
+    assert consulta["sql"] == "SELECT 1 FROM x"
+    assert consulta["chamadas"] == 2
+    assert consulta["total_ms"] == pytest.approx(400)
+    assert consulta["max_ms"] == pytest.approx(300)
+    assert consulta["lentas"] == 0
+
+
+def test_consulta_lenta_vai_para_log_com_parametros(caplog):
+    perfil = pc.PerfilConsultas(limiar_lento=0.2, amostragem=0, relogio=_relogio(0, 0.5))
+    with caplog.at_level(logging.WARNING, logger="app.dao.consultas"):
+        perfil.executar(None, CursorPerfil(), "pesquisar_por_autor", "SELECT ...", ("%fowler%",))
+
+    relatorio = perfil.relatorio()
+    assert relatorio["lentas"][0]["consulta"] == "pesquisar_por_autor"
+    assert relatorio["lentas"][0]["params"] == "('%fowler%',)"
+    assert "Consulta lenta pesquisar_por_autor" in caplog.text and "%fowler%" in caplog.text
+
+
+def test_amostra_roda_explain_em_savepoint_antes_da_consulta():
+    cur = CursorPerfil()
+    perfil = pc.PerfilConsultas(amostragem=0.5, sortear=lambda: 0.1)
+
+    perfil.executar(ConexaoPerfil(cur), cur, "q", "SELECT * FROM livros WHERE isbn = %s", ("1",))
+
+    assert cur.executados == [
+        "SAVEPOINT perfil_explain",
+        "EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM livros WHERE isbn = %s",
+        "RELEASE SAVEPOINT perfil_explain",
+        "SELECT * FROM livros WHERE isbn = %s",
+    ]
+    assert perfil.relatorio()["planos"]["q"]["plano"].startswith("Index Scan")
+    assert cur.fetchall() == [("1", "Titulo", "Autor")]  # resultado é o da consulta real
+
+
+def test_falha_no_explain_nao_impede_a_consulta():
+    cur = CursorPerfil(falhar_explain=True)
+    perfil = pc.PerfilConsultas(amostragem=1, sortear=lambda: 0.0)
+
+    perfil.executar(ConexaoPerfil(cur), cur, "q", "SELECT 1", ())
+
+    assert "ROLLBACK TO SAVEPOINT perfil_explain" in cur.executados
+    assert cur.executados[-1] == "SELECT 1"
+    assert perfil.relatorio()["planos"] == {}
+
+
+def test_dao_passa_consultas_pelo_perfil():
+    cur = CursorPerfil()
+    perfil = pc.PerfilConsultas(amostragem=0)
+    dao = LivroDAO(conexao=ConexaoPerfil(cur), perfil=perfil)
+
+    livros = dao.pesquisar_por_autor("Autor")
+
+    assert [l.isbn for l in livros] == ["1"]
+    assert perfil.relatorio()["consultas"]["pesquisar_por_autor"]["chamadas"] == 1
+
+
+def test_obter_perfil_desligado_por_padrao(monkeypatch):
+    monkeypatch.delenv("PERFIL_CONSULTAS", raising=False)
+    assert pc.obter_perfil() is None
+
+
+def test_relatorio_consultas_admin(monkeypatch):
+    from app.controller import admin_controller
+
+    monkeypatch.delenv("PERFIL_CONSULTAS", raising=False)
+    assert admin_controller.relatorio_consultas()[1] == 404
+
+    perfil = pc.PerfilConsultas(amostragem=0)
+    perfil.executar(None, CursorPerfil(), "q", "SELECT 1", ())
+    monkeypatch.setattr(admin_controller, "obter_perfil", lambda: perfil)
+
+    corpo, status = admin_controller.relatorio_consultas(limpar=True)
+    assert status == 200 and json.loads(corpo)["consultas"]["q"]["chamadas"] == 1
+    assert perfil.relatorio()["consultas"] == {}
@@ -0,0 +1,208 @@
+# app/tests/test_servidor_assincrono.py
+import asyncio
+
+import app.controller.livro_controller as lc
+from app.servidor.assincrono import ServidorAssincrono, despachar
+
+
+async def _com_servidor(corpo_teste):
+    servidor = ServidorAssincrono("127.0.0.1", 0, timeout_ocioso=1)
+    await servidor.iniciar()
+    try:
+        return await corpo_teste(servidor.porta)
+    finally:
+        await servidor.parar(prazo=1)
+
+
+async def _ler_resposta(reader):
+    cabecalho = await reader.readuntil(b"\r\n\r\n")
+    linhas = cabecalho.decode("latin-1").split("\r\n")
+    status = int(linhas[0].split()[1])
+    headers = dict(l.split(": ", 1) for l in linhas[1:] if l)
+    corpo = await reader.readexactly(int(headers["Content-Length"]))
+    return status, headers, corpo
+
+
+def test_keep_alive_atende_varias_requisicoes_na_mesma_conexao(monkeypatch, tmp_path):
+    (tmp_path / "index.html").write_text("<h1>Index</h1>", encoding="utf-8")
+    monkeypatch.setenv("TEMPLATES_DIR", str(tmp_path))
+
+    async def cenario(porta):
+        reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+        respostas = []
+        for alvo in ("/", "/index", "/nao-existe"):
+            writer.write(f"GET {alvo} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+            await writer.drain()
+            respostas.append(await _ler_resposta(reader))
+        writer.close()
+        return respostas
+
+    respostas = asyncio.run(_com_servidor(cenario))
+
+    assert [r[0] for r in respostas] == [200, 200, 404]
+    assert respostas[0][2] == b"<h1>Index</h1>"
+    assert all(r[1]["Connection"] == "keep-alive" for r in respostas)
+
+
+def test_connection_close_encerra_conexao(monkeypatch, tmp_path):
+    (tmp_path / "index.html").write_text("x", encoding="utf-8")
+    monkeypatch.setenv("TEMPLATES_DIR", str(tmp_path))
+
+    async def cenario(porta):
+        reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+        writer.write(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        resposta = await _ler_resposta(reader)
+        resto = await reader.read()
+        writer.close()
+        return resposta, resto
+
+    (status, headers, _), resto = asyncio.run(_com_servidor(cenario))
+
+    assert status == 200
+    assert headers["Connection"] == "close"
+    assert resto == b""  # servidor fechou o socket
+
+
+def test_corpo_da_requisicao_e_descartado_sem_dessincronizar_keep_alive(monkeypatch, tmp_path):
+    (tmp_path / "index.html").write_text("<h1>Index</h1>", encoding="utf-8")
+    monkeypatch.setenv("TEMPLATES_DIR", str(tmp_path))
+
+    async def cenario(porta):
+        reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+        corpo = b"GET /nao-existe HTTP/1.1\r\n\r\n"  # parece uma requisição
+        writer.write(b"POST / HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(corpo), corpo))
+        writer.write(b"GET / HTTP/1.1\r\nHost: x\r\n\r\n")
+        await writer.drain()
+        respostas = [await _ler_resposta(reader), await _ler_resposta(reader)]
+        writer.close()
+        return respostas
+
+    post, get = asyncio.run(_com_servidor(cenario))
+
+    assert post[0] == 501 and post[1]["Connection"] == "keep-alive"
+    assert get[0] == 200 and get[2] == b"<h1>Index</h1>"
+
+
+def test_corpo_grande_ou_chunked_fecha_a_conexao(monkeypatch, tmp_path):
+    from app.servidor import assincrono
+
+    monkeypatch.setattr(assincrono, "MAX_CORPO", 4)
+
+    async def cenario(porta):
+        respostas = []
+        for extra in (b"Content-Length: 5\r\n\r\n12345", b"Transfer-Encoding: chunked\r\n\r\n0\r\n\r\n"):
+            reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+            writer.write(b"POST / HTTP/1.1\r\n" + extra)
+            await writer.drain()
+            respostas.append((await _ler_resposta(reader), await reader.read()))
+            writer.close()
+        return respostas
+
+    for (status, headers, _), resto in asyncio.run(_com_servidor(cenario)):
+        assert status == 501
+        assert headers["Connection"] == "close" and resto == b""
+
+
+def test_content_length_invalido_responde_400():
+    async def cenario(porta):
+        reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+        writer.write(b"POST / HTTP/1.1\r\nContent-Length: abc\r\n\r\n")
+        await writer.drain()
+        resposta = await _ler_resposta(reader)
+        writer.close()
+        return resposta
+
+    assert asyncio.run(_com_servidor(cenario))[0] == 400
+
+
+def test_estatico_maior_que_o_orcamento_sai_do_disco_sem_quebrar_keep_alive(monkeypatch, tmp_path):
+    from app.servidor import estaticos
+
+    conteudo = bytes(range(256)) * 1024
+    (tmp_path / "grande.bin").write_bytes(conteudo)
+    monkeypatch.setattr(estaticos, "_cache", estaticos.CacheEstaticos(raiz=tmp_path, orcamento=1024))
+
+    async def cenario(porta):
+        reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+        respostas = []
+        for metodo in ("GET", "HEAD", "GET"):
+            writer.write(f"{metodo} /static/grande.bin HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+            await writer.drain()
+            if metodo == "HEAD":
+                cabecalho = await reader.readuntil(b"\r\n\r\n")
+                respostas.append(cabecalho)
+            else:
+                respostas.append(await _ler_resposta(reader))
+        writer.close()
+        return respostas
+
+    primeira, head, ultima = asyncio.run(_com_servidor(cenario))
+
+    assert primeira[0] == 200 and primeira[2] == conteudo
+    assert primeira[1]["Content-Length"] == str(len(conteudo))
+    assert f"Content-Length: {len(conteudo)}".encode() in head
+    assert ultima[2] == conteudo
+
+
+def test_despachar_pesquisa_usa_controller_async(monkeypatch):
+    recebidos = []
+
+    async def fake_listar(autor, apos_titulo=None, apos_isbn=None):
+        recebidos.append((autor, apos_titulo, apos_isbn))
+        return "Livro não encontrado", 404
+
+    monkeypatch.setattr(lc, "listar_livro_async", fake_listar)
+
+    resposta = asyncio.run(despachar("GET", "/pesquisa?autor=fowler&apos_titulo=P&apos_isbn=1"))
+
+    assert recebidos == [("fowler", "P", "1")]
+    assert resposta.status == 404
+    assert resposta.corpo == "Livro não encontrado".encode("utf-8")
+
+
+def test_despachar_estatico_e_metodo_nao_suportado():
+    css = asyncio.run(despachar("GET", "/static/css/style.css"))
+    fuga = asyncio.run(despachar("GET", "/static/../../main.py"))
+    post = asyncio.run(despachar("POST", "/"))
+
+    assert css.status == 200 and css.tipo == "text/css"
+    assert fuga.status == 404
+    assert post.status == 501
+
+
+def test_despachar_api_livros_usa_controller_async(monkeypatch):
+    async def fake_api(autores, isbns, limite):
+        return '{"ok": true}', 200
+
+    monkeypatch.setattr(lc, "buscar_livros_api_async", fake_api)
+    resposta = asyncio.run(despachar("GET", "/api/livros?autor=A&isbn=1"))
+
+    assert resposta.status == 200
+    assert resposta.tipo.startswith("application/json")
+    assert resposta.corpo == b'{"ok": true}'
+
+
+def test_despachar_autocomplete_usa_controller_async(monkeypatch):
+    recebidos = []
+
+    async def fake_autocompletar(prefixo, limite):
+        recebidos.append((prefixo, limite))
+        return '{"autores": []}', 200
+
+    monkeypatch.setattr(lc, "autocompletar_async", fake_autocompletar)
+    resposta = asyncio.run(despachar("GET", "/api/autocomplete?q=ma"))
+
+    assert recebidos == [("ma", None)]
+    assert resposta.status == 200 and resposta.tipo.startswith("application/json")
+
+
+def test_despachar_metrics_registra_requisicoes(monkeypatch):
+    import app.metricas as metricas_mod
+
+    monkeypatch.setattr(metricas_mod, "_metricas", metricas_mod.Metricas())
+    asyncio.run(despachar("GET", "/nao-existe"))
+    resposta = asyncio.run(despachar("GET", "/metrics"))
+
+    assert resposta.status == 200
+    assert b'biblioteca_requisicoes_total{rota="outras",status="404"} 1' in resposta.corpo
@@ -0,0 +1,82 @@
+# app/tests/test_servidor_modos.py
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from app.servidor.modos import ServidorThreadPool, criar_servidor
+
+
+class HandlerLento(BaseHTTPRequestHandler):
+    """Handler que demora um pouco para simular uma consulta lenta ao banco."""
+    atraso = 0.2
+
+    def do_GET(self):
+        time.sleep(self.atraso)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def _iniciar(httpd):
+    t = threading.Thread(target=httpd.serve_forever, daemon=True)
+    t.start()
+    return t
+
+
+def _get(porta):
+    with urllib.request.urlopen(f"http://127.0.0.1:{porta}/", timeout=5) as resp:
+        return resp.read()
+
+
+def test_criar_servidor_escolhe_classe_por_threads():
+    simples = criar_servidor(("127.0.0.1", 0), HandlerLento, threads=1)
+    pool = criar_servidor(("127.0.0.1", 0), HandlerLento, threads=4)
+    try:
+        assert type(simples) is HTTPServer
+        assert isinstance(pool, ServidorThreadPool) and pool.threads == 4
+    finally:
+        simples.server_close()
+        pool.server_close()
+
+
+def test_thread_pool_atende_requisicoes_em_paralelo():
+    httpd = ServidorThreadPool(("127.0.0.1", 0), HandlerLento, threads=4)
+    porta = httpd.server_address[1]
+    _iniciar(httpd)
+    try:
+        inicio = time.monotonic()
+        respostas = []
+        clientes = [threading.Thread(target=lambda: respostas.append(_get(porta))) for _ in range(4)]
+        for c in clientes:
+            c.start()
+        for c in clientes:
+            c.join()
+        decorrido = time.monotonic() - inicio
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+    assert respostas == [b"ok"] * 4
+    # Quatro requisições de 0.2s em paralelo não podem somar 0.8s
+    assert decorrido < 0.6
+
+
+def test_server_close_drena_requisicoes_em_andamento():
+    httpd = ServidorThreadPool(("127.0.0.1", 0), HandlerLento, threads=2)
+    porta = httpd.server_address[1]
+    _iniciar(httpd)
+
+    resultado = []
+    cliente = threading.Thread(target=lambda: resultado.append(_get(porta)))
+    cliente.start()
+    time.sleep(0.05)  # garante que a requisição já está sendo atendida
+
+    httpd.shutdown()
+    httpd.server_close()
+    cliente.join()
+
+    assert resultado == [b"ok"]
@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+import psycopg2
+import pytest
+
+import app.controller.livro_controller as lc
+from app.dao.cache_livros import CacheLRU
+from app.dao.sugestoes_livros import IndiceSugestoes, SugestoesLivros
+
+AUTORES = ["Martin Fowler", "Marco Túlio Valente", "Kent Beck", "Maria Gonçalves", "Martin Fowler"]
+TITULOS = ["Refactoring", "Engenharia de Software Moderna", "Refactoring to Patterns", "Test-Driven Development"]
+
+
+# ---------- IndiceSugestoes ----------
+
+def test_sugere_por_prefixo_sem_acentos_nem_caixa():
+    indice = IndiceSugestoes(AUTORES, TITULOS)
+    assert indice.sugerir("MAR") == {
+        "autores": ["Marco Túlio Valente", "Maria Gonçalves", "Martin Fowler"], "titulos": [],
+    }
+    assert indice.sugerir("goncal")["autores"] == ["Maria Gonçalves"]
+    assert indice.sugerir("refac")["titulos"] == ["Refactoring", "Refactoring to Patterns"]
+
+
+def test_autores_tambem_pelo_inicio_de_outras_palavras_depois_do_inicio():
+    indice = IndiceSugestoes(AUTORES + ["Fowler Jr"], TITULOS)
+    # Casamento no início do nome vem antes do casamento no sobrenome
+    assert indice.sugerir("fow")["autores"] == ["Fowler Jr", "Martin Fowler"]
+    assert indice.sugerir("tulio")["autores"] == ["Marco Túlio Valente"]
+    # Títulos só pelo início
+    assert indice.sugerir("patterns")["titulos"] == []
+
+
+def test_limite_e_prefixo_vazio():
+    indice = IndiceSugestoes(AUTORES, TITULOS)
+    assert indice.sugerir("m", limite=2)["autores"] == ["Marco Túlio Valente", "Maria Gonçalves"]
+    assert indice.sugerir("   ") == {"autores": [], "titulos": []}
+
+
+# ---------- SugestoesLivros ----------
+
+class Catalogo:
+    def __init__(self):
+        self.leituras = 0
+        self.falhar = False
+
+    def __call__(self):
+        self.leituras += 1
+        if self.falhar:
+            raise psycopg2.OperationalError("banco fora")
+        return AUTORES[: self.leituras + 1], TITULOS
+
+
+def test_cache_por_prefixo_e_reconstrucao_ao_invalidar():
+    catalogo = Catalogo()
+    sugestoes = SugestoesLivros(catalogo, cache=CacheLRU(), disparar=lambda f: f())
+    assert not sugestoes.pronto
+
+    primeira = sugestoes.sugerir("ma")
+    assert sugestoes.sugerir("MA ") is primeira  # mesma chave normalizada, do cache
+    assert catalogo.leituras == 1 and sugestoes.cache.acertos == 1
+
+    sugestoes.invalidar()
+    sugestoes.sugerir("ma")  # dispara a reconstrução; responde com o índice anterior
+    assert catalogo.leituras == 2
+    assert "Kent Beck" in sugestoes.sugerir("k")["autores"]
+
+
+def test_reconstrucao_apos_o_intervalo_e_falha_mantem_o_indice():
+    agora = [0.0]
+    catalogo = Catalogo()
+    sugestoes = SugestoesLivros(catalogo, recarga=60, relogio=lambda: agora[0], disparar=lambda f: f())
+    sugestoes.sugerir("ma")
+
+    agora[0] = 61
+    catalogo.falhar = True
+    assert sugestoes.sugerir("ma")["autores"] == ["Marco Túlio Valente", "Martin Fowler"]
+    assert catalogo.leituras == 2
+    # Nova tentativa só depois de outro intervalo
+    sugestoes.sugerir("ma")
+    assert catalogo.leituras == 2
+
+
+def test_primeira_carga_propaga_erro():
+    catalogo = Catalogo()
+    catalogo.falhar = True
+    with pytest.raises(psycopg2.Error):
+        SugestoesLivros(catalogo).sugerir("ma")
+
+
+# ---------- Controller ----------
+
+@pytest.fixture
+def sugestoes(monkeypatch):
+    sugestoes = SugestoesLivros(lambda: (AUTORES, TITULOS), disparar=lambda f: f())
+    monkeypatch.setattr(lc, "obter_sugestoes", lambda: sugestoes)
+    return sugestoes
+
+
+def test_autocompletar_devolve_json(sugestoes):
+    corpo, status = lc.autocompletar(" fowl ", "3")
+    assert status == 200
+    assert json.loads(corpo) == {"q": "fowl", "autores": ["Martin Fowler"], "titulos": []}
+
+
+@pytest.mark.parametrize("limite", ["x", "0", "21"])
+def test_autocompletar_limite_invalido_400(sugestoes, limite):
+    corpo, status = lc.autocompletar("ma", limite)
+    assert status == 400 and "limite" in json.loads(corpo)["erro"]
+
+
+def test_autocompletar_banco_indisponivel_503(monkeypatch):
+    def _falha():
+        raise psycopg2.OperationalError("banco fora")
+
+    monkeypatch.setattr(lc, "obter_sugestoes", lambda: SugestoesLivros(_falha))
+    assert lc.autocompletar("ma")[1] == 503
+    assert asyncio.run(lc.autocompletar_async("ma"))[1] == 503
+
+
+def test_autocompletar_async_carrega_fora_do_loop(sugestoes):
+    corpo, status = asyncio.run(lc.autocompletar_async("ref"))
+    assert status == 200 and sugestoes.pronto
+    assert json.loads(corpo)["titulos"] == ["Refactoring", "Refactoring to Patterns"]
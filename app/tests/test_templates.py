@@ -0,0 +1,58 @@
+# app/tests/test_templates.py
+import os
+
+import pytest
+
+from app.view.templates import CacheTemplates, Template
+
+
+def test_template_substitui_e_escapa_variaveis():
+    t = Template("<p>{{ titulo }}</p><div>{{ html | safe }}</div>")
+
+    saida = t.renderizar(titulo="<b>A & B</b>", html="<i>ok</i>")
+
+    assert saida == "<p>&lt;b&gt;A &amp; B&lt;/b&gt;</p><div><i>ok</i></div>".encode("utf-8")
+
+
+def test_template_sem_variaveis_fica_pre_codificado():
+    t = Template("<h1>Índice</h1>")
+    assert t.estatico == "<h1>Índice</h1>".encode("utf-8")
+    assert t.renderizar() is t.estatico
+
+
+def test_template_variavel_ausente_lanca_keyerror():
+    with pytest.raises(KeyError, match="autor"):
+        Template("{{ autor }}").renderizar()
+
+
+def test_cache_le_arquivo_uma_unica_vez(tmp_path, monkeypatch):
+    (tmp_path / "index.html").write_text("<h1>{{ nome }}</h1>", encoding="utf-8")
+    cache = CacheTemplates(recarregar=False)
+
+    primeiro = cache.obter("index.html", tmp_path)
+    # Alterações no disco não são vistas sem o modo de recarga
+    (tmp_path / "index.html").write_text("mudou", encoding="utf-8")
+    segundo = cache.obter("index.html", tmp_path)
+
+    assert primeiro is segundo
+    assert segundo.renderizar(nome="x") == b"<h1>x</h1>"
+
+
+def test_cache_recarrega_quando_mtime_muda(tmp_path):
+    arquivo = tmp_path / "index.html"
+    arquivo.write_text("v1", encoding="utf-8")
+    cache = CacheTemplates(recarregar=True)
+
+    assert cache.obter("index.html", tmp_path).renderizar() == b"v1"
+    assert cache.obter("index.html", tmp_path) is cache.obter("index.html", tmp_path)
+
+    arquivo.write_text("v2", encoding="utf-8")
+    st = arquivo.stat()
+    os.utime(arquivo, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    assert cache.obter("index.html", tmp_path).renderizar() == b"v2"
+
+
+def test_cache_template_inexistente(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        CacheTemplates().obter("nao-existe.html", tmp_path)
@@ -0,0 +1,42 @@
+"""
+Representação JSON dos livros para a API (`/api/livros` e `/api/autocomplete`).
+"""
+
+import json
+
+JSON = "application/json; charset=utf-8"
+
+_CAMPOS = ("isbn", "titulo", "autor")
+
+
+def _livro(livro):
+    if livro is None:
+        return None
+    return {"isbn": livro.isbn, "titulo": livro.titulo, "autor": livro.autor}
+
+
+def exibe_lote(resultado) -> str:
+    """`{"autores": {autor: [livro, ...]}, "isbns": {isbn: livro | null}}`."""
+    return json.dumps(
+        {
+            # `linhas()` evita criar um `Livro` por item só para serializar
+            "autores": {
+                autor: [dict(zip(_CAMPOS, linha)) for linha in livros.linhas()]
+                for autor, livros in resultado.por_autor.items()
+            },
+            "isbns": {isbn: _livro(livro) for isbn, livro in resultado.por_isbn.items()},
+        },
+        ensure_ascii=False,
+    )
+
+
+def exibe_sugestoes(prefixo: str, sugestoes: dict) -> str:
+    """`{"q": prefixo, "autores": [...], "titulos": [...]}`."""
+    return json.dumps(
+        {"q": prefixo, "autores": sugestoes["autores"], "titulos": sugestoes["titulos"]},
+        ensure_ascii=False,
+    )
+
+
+def exibe_erro(mensagem: str) -> str:
+    return json.dumps({"erro": mensagem}, ensure_ascii=False)
@@ -0,0 +1,62 @@
+"""
+Serialização do catálogo para exportação (CSV e JSON Lines).
+
+As funções recebem um iterável de linhas `(isbn, titulo, autor)` e geram
+blocos de bytes de ~`tamanho_bloco`, prontos para serem enviados como
+*chunks* HTTP. Nada é acumulado além do bloco corrente, então a memória
+usada não depende do tamanho do catálogo.
+"""
+
+import csv
+import io
+import json
+
+TAMANHO_BLOCO = 64 * 1024
+
+CAMPOS = ("isbn", "titulo", "autor")
+
+
+def _em_blocos(textos, tamanho_bloco):
+    # Agrupa pequenos pedaços de texto em blocos de bytes de tamanho razoável
+    partes, acumulado = [], 0
+    for texto in textos:
+        dados = texto.encode("utf-8")
+        partes.append(dados)
+        acumulado += len(dados)
+        if acumulado >= tamanho_bloco:
+            yield b"".join(partes)
+            partes, acumulado = [], 0
+    if partes:
+        yield b"".join(partes)
+
+
+def _linhas_csv(linhas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    escritor.writerow(CAMPOS)
+    for linha in linhas:
+        escritor.writerow(linha)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # O cabeçalho sai mesmo sem nenhuma linha
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def csv_em_blocos(linhas, tamanho_bloco=TAMANHO_BLOCO):
+    """CSV com cabeçalho `isbn,titulo,autor`."""
+    return _em_blocos(_linhas_csv(linhas), tamanho_bloco)
+
+
+def jsonl_em_blocos(linhas, tamanho_bloco=TAMANHO_BLOCO):
+    """Um objeto JSON `{"isbn", "titulo", "autor"}` por linha."""
+    textos = (json.dumps(dict(zip(CAMPOS, linha)), ensure_ascii=False) + "\n" for linha in linhas)
+    return _em_blocos(textos, tamanho_bloco)
+
+
+# formato -> (Content-Type, serializador)
+FORMATOS = {
+    "csv": ("text/csv; charset=utf-8", csv_em_blocos),
+    "jsonl": ("application/x-ndjson; charset=utf-8", jsonl_em_blocos),
+}
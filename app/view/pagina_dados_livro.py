@@ -2,16 +2,45 @@
 # Marco Tulio Valente. Engenharia de Software Moderna: Princípios e Práticas para Desenvolvimento de Software com Produtividade, Editora: Independente, 2020.
 # UnB-FGA-EPS-MDS
 
-class PaginaDadosLivro:
-    @staticmethod
-    def exibe_livro(titulo, autor, isbn):
-        return f"""
+from app.view.templates import Template
+
+# Templates compilados uma única vez, na importação do módulo
+_LIVRO = Template("""
         <meta charset="UTF-8">
         <link rel="stylesheet" href="/static/css/style.css">
         <h1> Dados do Livro Pesquisado </h1>
         <ul>
-            <li> Título: {titulo} </li>
-            <li> Autor: {autor} </li>
-            <li> ISBN: {isbn} </li>
+            <li> Título: {{ titulo }} </li>
+            <li> Autor: {{ autor }} </li>
+            <li> ISBN: {{ isbn }} </li>
         </ul>
-        """
+        """)
+
+_ITEM = Template("""
+            <li> {{ titulo }} — {{ autor }} (ISBN: {{ isbn }}) </li>""")
+
+_PROXIMA = Template('<a class="proxima-pagina" href="{{ url }}"> Próxima página </a>')
+
+_PAGINA = Template("""
+        <meta charset="UTF-8">
+        <link rel="stylesheet" href="/static/css/style.css">
+        <h1> Livros de "{{ autor }}" </h1>
+        <ul>{{ itens | safe }}
+        </ul>
+        {{ proxima | safe }}
+        """)
+
+
+class PaginaDadosLivro:
+    @staticmethod
+    def exibe_livro(titulo, autor, isbn):
+        return _LIVRO.renderizar_texto(titulo=titulo, autor=autor, isbn=isbn)
+
+    @staticmethod
+    def exibe_pagina(livros, autor, proxima_url=None):
+        itens = "".join(
+            _ITEM.renderizar_texto(titulo=livro.titulo, autor=livro.autor, isbn=livro.isbn)
+            for livro in livros
+        )
+        proxima = _PROXIMA.renderizar_texto(url=proxima_url) if proxima_url else ""
+        return _PAGINA.renderizar_texto(autor=autor, itens=itens, proxima=proxima)
@@ -0,0 +1,105 @@
+"""
+Templates compilados e mantidos em memória.
+
+Sintaxe mínima:
+- `{{ nome }}`: valor de `nome` convertido para `str` e escapado para HTML;
+- `{{ nome | safe }}`: valor inserido sem escape (apenas HTML confiável).
+
+Um `Template` é compilado uma única vez em uma sequência de fragmentos
+estáticos (já codificados em UTF-8) e variáveis. `CacheTemplates` carrega
+cada arquivo uma vez; com `recarregar=True` (desenvolvimento,
+`TEMPLATES_RECARREGAR=1`) verifica o `mtime` a cada uso e recompila quando o
+arquivo muda.
+"""
+
+import os
+import re
+import threading
+from html import escape
+
+from app.servidor.recursos import caminho_template, resolver_templates_dir
+
+_VARIAVEL = re.compile(r"\{\{\s*(\w+)\s*(\|\s*safe\s*)?\}\}")
+
+
+class Template:
+    """Template compilado: fragmentos em bytes intercalados com variáveis."""
+
+    __slots__ = ("_partes", "estatico")
+
+    def __init__(self, fonte: str):
+        partes = []
+        inicio = 0
+        for m in _VARIAVEL.finditer(fonte):
+            if m.start() > inicio:
+                partes.append(fonte[inicio:m.start()].encode("utf-8"))
+            # (nome, escapar)
+            partes.append((m.group(1), m.group(2) is None))
+            inicio = m.end()
+        if inicio < len(fonte):
+            partes.append(fonte[inicio:].encode("utf-8"))
+        self._partes = tuple(partes)
+        # Sem variáveis, o corpo inteiro fica pronto desde a compilação
+        self.estatico = b"".join(partes) if all(isinstance(p, bytes) for p in partes) else None
+
+    def renderizar(self, **contexto) -> bytes:
+        """Devolve o HTML em bytes UTF-8, pronto para o `wfile`."""
+        if self.estatico is not None:
+            return self.estatico
+        saida = []
+        for parte in self._partes:
+            if isinstance(parte, bytes):
+                saida.append(parte)
+                continue
+            nome, escapar = parte
+            try:
+                valor = str(contexto[nome])
+            except KeyError:
+                raise KeyError(f"Variável de template não informada: {nome}") from None
+            saida.append((escape(valor) if escapar else valor).encode("utf-8"))
+        return b"".join(saida)
+
+    def renderizar_texto(self, **contexto) -> str:
+        return self.renderizar(**contexto).decode("utf-8")
+
+
+class CacheTemplates:
+    """Carrega e compila templates de arquivo uma única vez por caminho."""
+
+    def __init__(self, recarregar: bool = False):
+        self.recarregar = recarregar
+        self._compilados = {}  # caminho -> (mtime, Template)
+        self._lock = threading.Lock()
+
+    def obter(self, filename: str, templates_dir=None) -> Template:
+        """Template compilado de `filename`; `FileNotFoundError` se não existir."""
+        templates_dir = templates_dir or resolver_templates_dir()
+        chave = (str(templates_dir), filename)
+        item = self._compilados.get(chave)
+        if item is not None and not self.recarregar:
+            return item[1]
+
+        path = caminho_template(filename, templates_dir)
+        mtime = path.stat().st_mtime_ns
+        if item is not None and item[0] == mtime:
+            return item[1]
+
+        template = Template(path.read_text(encoding="utf-8"))
+        with self._lock:
+            self._compilados[chave] = (mtime, template)
+        return template
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._compilados.clear()
+
+
+_cache = None
+
+
+def obter_templates() -> CacheTemplates:
+    """Cache de templates do processo (ver `TEMPLATES_RECARREGAR`)."""
+    global _cache
+    if _cache is None:
+        _cache = CacheTemplates(recarregar=os.getenv("TEMPLATES_RECARREGAR", "0") == "1")
+    return _cache
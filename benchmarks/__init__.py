@@ -0,0 +1 @@
+"""Benchmarks reproduzíveis do mvc-biblioteca (ver `python -m benchmarks --help`)."""
@@ -0,0 +1,225 @@
+"""
+Gerador de carga para um servidor `main.py` em execução.
+
+Mistura três tipos de requisição (proporções em `--mix`):
+- `pesquisa`: `/pesquisa?autor=...` com autores sorteados por uma
+  distribuição de Zipf (poucos autores concentram a maior parte das
+  buscas). O vocabulário junta autores que existem no catálogo
+  (`--autores`) e autores inexistentes, que exercitam o 404 de
+  "Livro não encontrado" (`--fracao-inexistentes`);
+- `index`: página inicial;
+- `estatico`: `/static/css/style.css`.
+
+Com `--taxa`, a carga é em malha aberta: as requisições são agendadas a
+intervalos fixos e a latência conta a partir do horário agendado, então
+atrasos do servidor não ficam escondidos (*coordinated omission*). Sem
+`--taxa`, cada cliente dispara a próxima assim que recebe a resposta.
+
+Uso:
+    python -m benchmarks.carga --url http://localhost:8080 --duracao 30 \\
+        --concorrencia 32 --taxa 500 --saida carga.json
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import random
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode, urlparse
+
+from benchmarks.suite import resumir
+
+AUTORES_PADRAO = ("valente", "fowler", "gof")
+MIX_PADRAO = {"pesquisa": 70, "index": 10, "estatico": 20}
+ALVOS_FIXOS = {"index": "/", "estatico": "/static/css/style.css"}
+
+
+def pesos_zipf(n: int, expoente: float = 1.1) -> list[float]:
+    """Pesos cumulativos de Zipf para os postos 1..n (peso ~ 1 / posto^expoente)."""
+    return list(itertools.accumulate(1 / posto ** expoente for posto in range(1, n + 1)))
+
+
+def vocabulario(autores, fracao_inexistentes: float, semente: int) -> list[tuple[str, bool]]:
+    """Lista `(autor, existe)` embaralhada; a posição define a popularidade."""
+    autores = list(dict.fromkeys(autores))
+    inexistentes = round(len(autores) * fracao_inexistentes / max(1e-9, 1 - fracao_inexistentes))
+    termos = [(a, True) for a in autores] + [(f"inexistente-{i:04d}", False) for i in range(inexistentes)]
+    random.Random(semente).shuffle(termos)
+    return termos
+
+
+def ler_mix(texto: str) -> dict[str, float]:
+    """`pesquisa=70,index=10,estatico=20` -> dicionário de pesos."""
+    mix = {}
+    for parte in texto.split(","):
+        nome, _, peso = parte.partition("=")
+        nome = nome.strip()
+        if nome not in MIX_PADRAO:
+            raise ValueError(f"Tipo de requisição desconhecido no mix: {nome!r}")
+        mix[nome] = float(peso)
+    if sum(mix.values()) <= 0:
+        raise ValueError("O mix precisa de ao menos um peso positivo")
+    return mix
+
+
+class Sorteador:
+    """Sorteia `(tipo, alvo, status_esperados)` conforme o mix e o Zipf de autores."""
+
+    def __init__(self, termos, mix, expoente=1.1, semente=0):
+        self.termos = termos
+        self.cum_autores = pesos_zipf(len(termos), expoente)
+        # Sem vocabulário de autores não há como gerar buscas
+        self.tipos = [t for t in mix if mix[t] > 0 and (termos or t != "pesquisa")]
+        if not self.tipos:
+            raise ValueError("Nenhum tipo de requisição disponível no mix")
+        self.cum_tipos = list(itertools.accumulate(mix[t] for t in self.tipos))
+        self.semente = semente
+
+    def gerador(self, indice: int):
+        aleatorio = random.Random(self.semente * 1_000_003 + indice)
+        while True:
+            tipo = aleatorio.choices(self.tipos, cum_weights=self.cum_tipos)[0]
+            if tipo == "pesquisa":
+                autor, existe = aleatorio.choices(self.termos, cum_weights=self.cum_autores)[0]
+                alvo = "/pesquisa?" + urlencode({"autor": autor})
+                yield tipo, alvo, (200,) if existe else (404,)
+            else:
+                yield tipo, ALVOS_FIXOS[tipo], (200, 304)
+
+
+class Agenda:
+    """Horários de envio compartilhados pelos clientes (malha aberta)."""
+
+    def __init__(self, taxa: float | None, inicio: float):
+        self.intervalo = 1 / taxa if taxa else None
+        self.inicio = inicio
+        self._contador = itertools.count()
+        self._lock = threading.Lock()
+
+    def proximo(self) -> float | None:
+        if self.intervalo is None:
+            return None
+        with self._lock:
+            n = next(self._contador)
+        return self.inicio + n * self.intervalo
+
+
+def executar_carga(url: str, duracao: float, concorrencia: int, taxa: float | None,
+                   sorteador: Sorteador, timeout: float = 10.0) -> dict:
+    """Roda a carga e devolve o relatório (vazão, percentis e erros)."""
+    destino = urlparse(url)
+    host, porta = destino.hostname or "127.0.0.1", destino.port or 80
+    prefixo = destino.path.rstrip("/")
+
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+    agenda = Agenda(taxa, inicio)
+    por_tipo = {tipo: [] for tipo in sorteador.tipos}
+    status = {}
+    erros = {"conexao": 0, "status_inesperado": 0}
+    lock = threading.Lock()
+
+    def cliente(indice):
+        conn = http.client.HTTPConnection(host, porta, timeout=timeout)
+        latencias = {tipo: [] for tipo in sorteador.tipos}
+        meus_status, meus_erros = {}, {"conexao": 0, "status_inesperado": 0}
+        for tipo, alvo, esperados in sorteador.gerador(indice):
+            agendado = agenda.proximo()
+            if agendado is not None:
+                if agendado >= fim:
+                    break
+                espera = agendado - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+            elif time.perf_counter() >= fim:
+                break
+            enviado = agendado if agendado is not None else time.perf_counter()
+            try:
+                conn.request("GET", prefixo + alvo)
+                resposta = conn.getresponse()
+                resposta.read()
+            except (OSError, http.client.HTTPException):
+                meus_erros["conexao"] += 1
+                conn.close()  # reconecta na próxima requisição
+                continue
+            latencias[tipo].append(time.perf_counter() - enviado)
+            meus_status[resposta.status] = meus_status.get(resposta.status, 0) + 1
+            if resposta.status not in esperados:
+                meus_erros["status_inesperado"] += 1
+        conn.close()
+        with lock:
+            for tipo, valores in latencias.items():
+                por_tipo[tipo].extend(valores)
+            for codigo, n in meus_status.items():
+                status[codigo] = status.get(codigo, 0) + n
+            for chave, n in meus_erros.items():
+                erros[chave] += n
+
+    clientes = [threading.Thread(target=cliente, args=(i,), daemon=True) for i in range(concorrencia)]
+    for c in clientes:
+        c.start()
+    for c in clientes:
+        c.join()
+    decorrido = time.perf_counter() - inicio
+
+    todas = [l for valores in por_tipo.values() for l in valores]
+    total = len(todas) + erros["conexao"]
+    relatorio = {
+        "geral": resumir(todas, decorrido),
+        "por_tipo": {tipo: resumir(valores, decorrido) for tipo, valores in por_tipo.items()},
+        "status": {str(codigo): n for codigo, n in sorted(status.items())},
+        "erros": erros,
+        "taxa_erros": round(sum(erros.values()) / total, 4) if total else 0.0,
+        "parametros": {
+            "url": url, "duracao": duracao, "concorrencia": concorrencia, "taxa": taxa,
+        },
+    }
+    if taxa and decorrido > 0:
+        relatorio["taxa_atingida"] = round(relatorio["geral"]["ops_por_segundo"] / taxa, 3)
+    return relatorio
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gerador de carga com buscas por autor em Zipf.")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--duracao", type=float, default=30.0, help="segundos de carga")
+    parser.add_argument("--concorrencia", type=int, default=16, help="clientes keep-alive simultâneos")
+    parser.add_argument("--taxa", type=float, help="requisições/s (malha aberta); omita para carga máxima")
+    parser.add_argument("--mix", type=ler_mix, default=dict(MIX_PADRAO),
+                        help="pesos por tipo, ex.: pesquisa=70,index=10,estatico=20")
+    parser.add_argument("--autores", type=Path,
+                        help="arquivo com um autor existente por linha (padrão: os do init.sql)")
+    parser.add_argument("--fracao-inexistentes", type=float, default=0.3,
+                        help="fração do vocabulário de autores que não existe no catálogo")
+    parser.add_argument("--zipf", type=float, default=1.1, help="expoente da distribuição de Zipf")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", type=Path, help="arquivo JSON para gravar o relatório")
+    args = parser.parse_args(argv)
+
+    if not 0 <= args.fracao_inexistentes < 1:
+        parser.error("--fracao-inexistentes deve estar em [0, 1)")
+    autores = AUTORES_PADRAO
+    if args.autores:
+        autores = [l.strip() for l in args.autores.read_text(encoding="utf-8").splitlines() if l.strip()]
+
+    termos = vocabulario(autores, args.fracao_inexistentes, args.semente)
+    sorteador = Sorteador(termos, args.mix, args.zipf, args.semente)
+    relatorio = executar_carga(args.url, args.duracao, args.concorrencia, args.taxa, sorteador)
+
+    geral = relatorio["geral"]
+    print(f"{geral['operacoes']} respostas em {args.duracao:.0f}s: {geral['ops_por_segundo']:.1f} req/s, "
+          f"p50={geral['p50_ms']:.2f}ms p99={geral['p99_ms']:.2f}ms, erros={relatorio['taxa_erros']:.2%}")
+    for tipo, medida in relatorio["por_tipo"].items():
+        print(f"  {tipo:10s} {medida['operacoes']:>8d}  p50={medida['p50_ms']:.2f}ms  p99={medida['p99_ms']:.2f}ms")
+    print(f"  status: {relatorio['status']}")
+
+    if args.saida:
+        args.saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
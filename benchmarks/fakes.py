@@ -0,0 +1,73 @@
+"""
+Conexão e pool falsos, em processo, para medir o caminho da aplicação sem
+Postgres: o cursor devolve linhas pré-montadas, então o tempo medido é só
+o do nosso código (DAO, mapeamento, controller, view e servidor).
+"""
+
+from contextlib import contextmanager
+
+
+def gerar_linhas(quantidade: int, autor: str = "Autor Benchmark"):
+    """Linhas `(isbn, titulo, autor)` determinísticas."""
+    return [(f"{978_0000000000 + i}", f"Título {i:06d}", autor) for i in range(quantidade)]
+
+
+class CursorFalso:
+    def __init__(self, linhas):
+        self._linhas = linhas
+        self.rowcount = len(linhas)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchall(self):
+        return list(self._linhas)
+
+    def __iter__(self):
+        return iter(self._linhas)
+
+
+class ConexaoFalsa:
+    closed = 0
+
+    def __init__(self, linhas):
+        self._linhas = linhas
+
+    def cursor(self, name=None):
+        return CursorFalso(self._linhas)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class PoolFalso:
+    """Mesma interface do `RoteadorConexoes` usada pelo controller/DAO."""
+
+    def __init__(self, linhas):
+        self._linhas = linhas
+
+    def obter(self, timeout=None):
+        return ConexaoFalsa(self._linhas)
+
+    obter_leitura = obter
+
+    def devolver(self, conexao, descartar=False):
+        pass
+
+    @contextmanager
+    def conexao(self, timeout=None):
+        yield ConexaoFalsa(self._linhas)
+
+    leitura = conexao
@@ -0,0 +1,285 @@
+"""
+Suíte de benchmarks do mvc-biblioteca.
+
+- HTTP: vazão e latência (p50/p99) das rotas `/`, `/static/css/style.css`,
+  `/pesquisa` e `/api/autocomplete` do `BibliotecaMVCHandler`, com um servidor real em porta
+  efêmera e clientes keep-alive concorrentes;
+- Micro: mapeamento de linhas em `LivroDAO.pesquisar_por_autor` e
+  renderização de `PaginaDadosLivro.exibe_livro`.
+
+O banco é substituído por `benchmarks.fakes`, e os caches de autores, de
+buscas sem resultado e de prefixos são desligados, para que cada `/pesquisa` percorra controller,
+DAO e view e cada `/api/autocomplete` consulte o índice de prefixos.
+Os resultados saem em JSON e podem ser comparados com uma execução
+anterior (`--comparar`), falhando se a vazão cair mais que a tolerância.
+"""
+
+import argparse
+import datetime
+import http.client
+import json
+import math
+import platform
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.fakes import ConexaoFalsa, PoolFalso, gerar_linhas
+
+ROTAS_HTTP = {
+    "http_index": "/",
+    "http_estatico": "/static/css/style.css",
+    "http_pesquisa": "/pesquisa?autor=benchmark",
+    "http_autocomplete": "/api/autocomplete?q=tit",
+}
+
+
+def percentil(ordenados, p: float) -> float:
+    """Percentil por *nearest rank* de uma lista já ordenada."""
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados), max(1, math.ceil(p / 100 * len(ordenados)))) - 1
+    return ordenados[indice]
+
+
+def resumir(latencias, duracao: float) -> dict:
+    """Vazão e percentis (em ms) de uma série de latências em segundos."""
+    ordenadas = sorted(latencias)
+    return {
+        "operacoes": len(ordenadas),
+        "ops_por_segundo": round(len(ordenadas) / duracao, 1) if duracao > 0 else 0.0,
+        "p50_ms": round(percentil(ordenadas, 50) * 1000, 4),
+        "p99_ms": round(percentil(ordenadas, 99) * 1000, 4),
+        "max_ms": round(ordenadas[-1] * 1000, 4) if ordenadas else 0.0,
+    }
+
+
+# -----------------------------------------------------------------------------
+# HTTP
+# -----------------------------------------------------------------------------
+
+def _preparar_ambiente(linhas_por_pesquisa: int):
+    """Troca roteador de conexões e caches do controller pelos falsos; devolve uma função que desfaz.
+
+    O índice em memória também é desligado: mesmo com `BUSCA_BACKEND=memoria`
+    no ambiente, a suíte não tenta carregar o catálogo do banco real.
+    """
+    import app.controller.livro_controller as lc
+    from app.dao.cache_livros import CacheLRU
+    from app.dao.sugestoes_livros import SugestoesLivros
+
+    originais = (lc.obter_roteador, lc.obter_cache_autores, lc.obter_cache_ausentes,
+                 lc.obter_sugestoes, lc.obter_indice)
+    pool = PoolFalso(gerar_linhas(linhas_por_pesquisa))
+    sem_cache = CacheLRU(max_entradas=0)
+    catalogo = gerar_linhas(10_000)
+    sugestoes = SugestoesLivros(
+        lambda: ([f"Autor {i:05d}" for i in range(1000)], [titulo for _, titulo, _ in catalogo]),
+        cache=CacheLRU(max_entradas=0),
+    )
+    lc.obter_roteador = lambda: pool
+    lc.obter_cache_autores = lambda: sem_cache
+    lc.obter_cache_ausentes = lambda: sem_cache
+    lc.obter_sugestoes = lambda: sugestoes
+    lc.obter_indice = lambda: None
+
+    def restaurar():
+        (lc.obter_roteador, lc.obter_cache_autores, lc.obter_cache_ausentes,
+         lc.obter_sugestoes, lc.obter_indice) = originais
+
+    return restaurar
+
+
+def _iniciar_servidor(threads: int):
+    import main as app_main
+    from app.servidor.modos import ServidorThreadPool
+
+    class HandlerSilencioso(app_main.BibliotecaMVCHandler):
+        max_requisicoes = sys.maxsize
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ServidorThreadPool(("127.0.0.1", 0), HandlerSilencioso, threads=threads)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def medir_rota(porta: int, alvo: str, requisicoes: int, concorrencia: int,
+               aquecimento: int = 20) -> dict:
+    """Dispara `requisicoes` GETs em `concorrencia` conexões keep-alive."""
+    por_cliente = max(1, requisicoes // concorrencia)
+    latencias = [[] for _ in range(concorrencia)]
+    erros = []
+    largada = threading.Barrier(concorrencia + 1)
+
+    def cliente(i):
+        conn = http.client.HTTPConnection("127.0.0.1", porta, timeout=10)
+        try:
+            for _ in range(aquecimento):
+                conn.request("GET", alvo)
+                conn.getresponse().read()
+            largada.wait()
+            minhas = latencias[i]
+            for _ in range(por_cliente):
+                inicio = time.perf_counter()
+                conn.request("GET", alvo)
+                resposta = conn.getresponse()
+                resposta.read()
+                minhas.append(time.perf_counter() - inicio)
+                if resposta.status != 200:
+                    erros.append(resposta.status)
+        except Exception as e:  # registra e libera a barreira para não travar a medição
+            erros.append(repr(e))
+            largada.abort()
+        finally:
+            conn.close()
+
+    clientes = [threading.Thread(target=cliente, args=(i,)) for i in range(concorrencia)]
+    for c in clientes:
+        c.start()
+    try:
+        largada.wait()
+    except threading.BrokenBarrierError:
+        pass
+    inicio = time.perf_counter()
+    for c in clientes:
+        c.join()
+    duracao = time.perf_counter() - inicio
+
+    resultado = resumir([l for lista in latencias for l in lista], duracao)
+    resultado["concorrencia"] = concorrencia
+    resultado["erros"] = len(erros)
+    return resultado
+
+
+def benchmarks_http(requisicoes=2000, concorrencia=4, threads=8, linhas_por_pesquisa=20) -> dict:
+    restaurar = _preparar_ambiente(linhas_por_pesquisa)
+    servidor = _iniciar_servidor(threads)
+    try:
+        porta = servidor.server_address[1]
+        return {
+            nome: medir_rota(porta, alvo, requisicoes, concorrencia)
+            for nome, alvo in ROTAS_HTTP.items()
+        }
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+        restaurar()
+
+
+# -----------------------------------------------------------------------------
+# Micro-benchmarks
+# -----------------------------------------------------------------------------
+
+def medir_funcao(funcao, repeticoes: int, aquecimento: int = 10) -> dict:
+    for _ in range(aquecimento):
+        funcao()
+    latencias = []
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        funcao()
+        latencias.append(time.perf_counter() - t0)
+    return resumir(latencias, time.perf_counter() - inicio)
+
+
+def benchmarks_micro(repeticoes=2000, linhas=1000) -> dict:
+    from app.dao.livro_dao import LivroDAO
+    from app.view.pagina_dados_livro import PaginaDadosLivro
+
+    dao = LivroDAO(conexao=ConexaoFalsa(gerar_linhas(linhas)))
+    resultados = {
+        f"dao_pesquisar_por_autor_{linhas}_linhas": medir_funcao(
+            lambda: dao.pesquisar_por_autor("benchmark"), max(1, repeticoes // 10)
+        ),
+        "view_exibe_livro": medir_funcao(
+            lambda: PaginaDadosLivro.exibe_livro("Título <1>", "Autor & Cia", "9780000000000"),
+            repeticoes,
+        ),
+    }
+    return resultados
+
+
+# -----------------------------------------------------------------------------
+# Resultados
+# -----------------------------------------------------------------------------
+
+def _commit_atual() -> str | None:
+    try:
+        saida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return saida.stdout.strip() or None
+
+
+def executar(requisicoes=2000, concorrencia=4, threads=8, repeticoes=2000) -> dict:
+    """Roda a suíte completa e devolve o documento de resultados."""
+    resultados = {}
+    resultados.update(benchmarks_micro(repeticoes=repeticoes))
+    resultados.update(benchmarks_http(requisicoes=requisicoes, concorrencia=concorrencia, threads=threads))
+    return {
+        "meta": {
+            "data": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit_atual(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "parametros": {
+                "requisicoes": requisicoes, "concorrencia": concorrencia,
+                "threads": threads, "repeticoes": repeticoes,
+            },
+        },
+        "resultados": resultados,
+    }
+
+
+def comparar(atual: dict, base: dict, tolerancia: float = 0.2) -> list[str]:
+    """Regressões de vazão maiores que `tolerancia` (fração) em relação a `base`."""
+    regressoes = []
+    for nome, medida in atual["resultados"].items():
+        anterior = base.get("resultados", {}).get(nome)
+        if not anterior or not anterior.get("ops_por_segundo"):
+            continue
+        razao = medida["ops_por_segundo"] / anterior["ops_por_segundo"]
+        if razao < 1 - tolerancia:
+            regressoes.append(
+                f"{nome}: {anterior['ops_por_segundo']:.1f} -> {medida['ops_por_segundo']:.1f} ops/s "
+                f"({(razao - 1) * 100:+.1f}%)"
+            )
+    return regressoes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do mvc-biblioteca (sem Postgres).")
+    parser.add_argument("--saida", type=Path, help="arquivo JSON para gravar os resultados")
+    parser.add_argument("--comparar", type=Path, help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="queda de vazão aceita antes de acusar regressão (padrão 0.2 = 20%%)")
+    parser.add_argument("--requisicoes", type=int, default=2000, help="requisições HTTP por rota")
+    parser.add_argument("--concorrencia", type=int, default=4, help="clientes HTTP simultâneos")
+    parser.add_argument("--threads", type=int, default=8, help="threads do servidor")
+    parser.add_argument("--repeticoes", type=int, default=2000, help="repetições dos micro-benchmarks")
+    args = parser.parse_args(argv)
+
+    documento = executar(args.requisicoes, args.concorrencia, args.threads, args.repeticoes)
+
+    for nome, medida in documento["resultados"].items():
+        print(f"{nome:40s} {medida['ops_por_segundo']:>10.1f} ops/s  "
+              f"p50={medida['p50_ms']:.3f}ms  p99={medida['p99_ms']:.3f}ms")
+
+    if args.saida:
+        args.saida.write_text(json.dumps(documento, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Resultados gravados em {args.saida}")
+
+    if args.comparar:
+        regressoes = comparar(documento, json.loads(args.comparar.read_text(encoding="utf-8")), args.tolerancia)
+        for linha in regressoes:
+            print(f"REGRESSÃO {linha}")
+        if regressoes:
+            return 1
+    return 0
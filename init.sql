@@ -3,6 +3,7 @@ SET client_min_messages TO WARNING;
 CREATE SCHEMA IF NOT EXISTS biblioteca;
 
 CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA public;
 
 DO $$
 BEGIN
@@ -10,11 +11,79 @@ BEGIN
 END$$;
 
 CREATE TABLE IF NOT EXISTS biblioteca.livros (
-    isbn   VARCHAR(20) PRIMARY KEY,
+    isbn   VARCHAR(20) NOT NULL,
     titulo VARCHAR(255) NOT NULL,
-    autor  VARCHAR(255) NOT NULL
+    autor  VARCHAR(255) NOT NULL,
+    -- Chave primária de cobertura: busca por ISBN com Index Only Scan
+    -- (migrations/003_indice_isbn_cobertura.sql)
+    CONSTRAINT livros_pkey PRIMARY KEY (isbn) INCLUDE (titulo, autor)
 );
 
+-- Índices trigram para ILIKE '%...%' e busca por similaridade
+-- (mesmo conteúdo de migrations/001_indices_trigram.sql)
+CREATE INDEX IF NOT EXISTS livros_autor_trgm_idx
+    ON biblioteca.livros USING gin (autor public.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS livros_titulo_trgm_idx
+    ON biblioteca.livros USING gin (titulo public.gin_trgm_ops);
+
+-- Paginação por keyset em (titulo, isbn) (migrations/002_indice_paginacao.sql)
+CREATE INDEX IF NOT EXISTS livros_titulo_isbn_idx
+    ON biblioteca.livros (titulo, isbn);
+
+-- Rastreio de alterações para o backend de busca em memória
+-- (migrations/004_rastreio_alteracoes.sql)
+ALTER TABLE biblioteca.livros
+    ADD COLUMN IF NOT EXISTS atualizado_em TIMESTAMPTZ NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS livros_atualizado_em_idx
+    ON biblioteca.livros (atualizado_em);
+
+CREATE TABLE IF NOT EXISTS biblioteca.livros_removidos (
+    isbn        VARCHAR(20) NOT NULL,
+    removido_em TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS livros_removidos_removido_em_idx
+    ON biblioteca.livros_removidos (removido_em);
+
+CREATE OR REPLACE FUNCTION biblioteca.marcar_livro_atualizado() RETURNS trigger AS $$
+BEGIN
+    NEW.atualizado_em := now();
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION biblioteca.registrar_livro_removido() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO biblioteca.livros_removidos (isbn) VALUES (OLD.isbn);
+    RETURN OLD;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS livros_atualizado_em ON biblioteca.livros;
+CREATE TRIGGER livros_atualizado_em
+    BEFORE UPDATE ON biblioteca.livros
+    FOR EACH ROW EXECUTE FUNCTION biblioteca.marcar_livro_atualizado();
+
+DROP TRIGGER IF EXISTS livros_removido ON biblioteca.livros;
+CREATE TRIGGER livros_removido
+    AFTER DELETE ON biblioteca.livros
+    FOR EACH ROW EXECUTE FUNCTION biblioteca.registrar_livro_removido();
+
+-- Busca por autor sem acentos/caixa (migrations/005_autor_normalizado.sql)
+CREATE OR REPLACE FUNCTION biblioteca.normalizar_busca(texto text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$
+    SELECT btrim(regexp_replace(lower(public.unaccent('public.unaccent'::regdictionary, texto)), '\s+', ' ', 'g'))
+$$;
+
+ALTER TABLE biblioteca.livros
+    ADD COLUMN IF NOT EXISTS autor_normalizado TEXT
+    GENERATED ALWAYS AS (biblioteca.normalizar_busca(autor)) STORED;
+
+CREATE INDEX IF NOT EXISTS livros_autor_normalizado_trgm_idx
+    ON biblioteca.livros USING gin (autor_normalizado public.gin_trgm_ops);
+
 INSERT INTO biblioteca.livros (isbn, titulo, autor) VALUES
 ('12345', 'Engenharia de Software Moderna', 'valente'),
 ('67890', 'Patterns of Enterprise Application Architecture', 'fowler'),
@@ -6,20 +6,29 @@ que oferece:
 - Renderização simples de templates HTML a partir de um diretório configurável;
 - Roteamento básico para páginas e busca de livros (controller);
 - Servir arquivos estáticos de maneira segura (evitando path traversal);
+- Exportação do catálogo em streaming (`respond_stream()`);
+- Métricas de latência por rota/etapa em `/metrics` (formato Prometheus);
 - Um utilitário `respond()` para padronizar respostas HTTP.
 
 ⚠️ Observação: este servidor é adequado para desenvolvimento/ensino.
 """
 
-import mimetypes
+import itertools
 import os
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import time
+from http.server import BaseHTTPRequestHandler
 from pathlib import Path
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import parse_qs, unquote, urlparse
 
-# Raiz dos arquivos estáticos (ex.: CSS, JS, imagens). Mantida fora da pasta
-# de templates para separação de responsabilidades.
-STATIC_ROOT = Path(__file__).resolve().parent / "app" / "static"
+from app.metricas import CONTENT_TYPE as METRICAS_CONTENT_TYPE
+from app.metricas import medir_etapa, obter_metricas, rota_metrica
+from app.servidor.compressao import compressivel, compressor, escolher_codificacao, negociar
+from app.servidor.estaticos import CACHE_CONTROL, obter_estaticos
+from app.servidor.recursos import STATIC_ROOT, resolver_templates_dir  # noqa: F401
+from app.view.api_livros import JSON
+from app.view.templates import obter_templates
+
+HTML = 'text/html; charset=utf-8'
 
 
 class BibliotecaMVCHandler(BaseHTTPRequestHandler):
@@ -30,57 +39,91 @@ class BibliotecaMVCHandler(BaseHTTPRequestHandler):
     - Resolver o diretório de templates com fallback para variáveis de ambiente;
     - Renderizar um template HTML e devolvê-lo ao cliente;
     - Roteamento básico por caminho em `do_GET`;
-    - Servir arquivos estáticos com detecção de MIME;
+    - Servir arquivos estáticos com detecção de MIME e cache HTTP;
     - Padronizar o envio de respostas via `respond`.
+
+    Fala HTTP/1.1 com conexões persistentes (keep-alive) quando o servidor
+    atende em um pool de threads (`conexoes_persistentes`): toda resposta
+    leva `Content-Length`, conexões ociosas por mais de `timeout` segundos
+    são fechadas e cada conexão atende no máximo `max_requisicoes`. Num
+    `HTTPServer` de uma thread só, toda resposta leva `Connection: close`.
     """
 
+    protocol_version = 'HTTP/1.1'
+    # TCP_NODELAY: cabeçalhos e corpo saem em `send()` separados; com Nagle
+    # ligado, o corpo esperaria o ACK atrasado do cliente (~40 ms) em
+    # conexões keep-alive
+    disable_nagle_algorithm = True
+    # Timeout do socket: encerra conexões keep-alive ociosas (e libera a
+    # thread do pool que as atende)
+    timeout = float(os.getenv('SERVIDOR_TIMEOUT_OCIOSO', '15'))
+    # Após N requisições a resposta leva `Connection: close`
+    max_requisicoes = int(os.getenv('SERVIDOR_MAX_REQUISICOES', '100'))
+
+    # ---------------------------------------------------------------------
+    # Conexões persistentes
+    # ---------------------------------------------------------------------
+    def handle_one_request(self) -> None:
+        self._requisicoes_na_conexao = getattr(self, '_requisicoes_na_conexao', 0) + 1
+        super().handle_one_request()
+
+    def send_response(self, code, message=None) -> None:
+        # Guarda o status para as métricas (`send_error` também passa por aqui)
+        self._status = code
+        super().send_response(code, message)
+
+    def end_headers(self) -> None:
+        # `send_header('Connection', 'close')` também marca `close_connection`.
+        # Sem pool de threads, um cliente ocioso em keep-alive bloquearia
+        # todos os outros por até `timeout` segundos
+        if (
+            getattr(self, '_requisicoes_na_conexao', 0) >= self.max_requisicoes
+            or not getattr(self.server, 'conexoes_persistentes', False)
+        ):
+            self.send_header('Connection', 'close')
+        super().end_headers()
+
     # ---------------------------------------------------------------------
     # Templates
     # ---------------------------------------------------------------------
     def resolve_templates_dir(self) -> Path:
-        """Resolve o diretório de templates com múltiplos fallbacks.
+        """Resolve o diretório de templates (ver `resolver_templates_dir`).
 
         Ordem de resolução:
         1) Variável de ambiente `TEMPLATES_DIR` (útil em testes e containers);
         2) Caminho '/app/app/templates' (compatível com layout em Docker);
-        3) Pasta local 'templates' ao lado deste arquivo.
+        3) Pasta 'app/templates' do projeto.
         """
-        env_dir = os.getenv('TEMPLATES_DIR')
-        if env_dir:
-            return Path(env_dir).resolve()
-
-        # Fallback para um caminho usado frequentemente em imagens Docker
-        cand = Path('/app/app/templates')
-        if cand.exists():
-            return cand.resolve()
-
-        # Por fim, usa a pasta local de templates
-        base = Path(__file__).resolve().parent
-        return (base / 'templates').resolve()
+        return resolver_templates_dir()
 
     def render_template(self, filename: str) -> None:
         """Renderiza um arquivo HTML de `templates` e envia ao cliente.
 
         - Garante que apenas o *nome* do arquivo seja utilizado (mitiga
           tentativas de path traversal fornecendo um caminho absoluto);
-        - Define `Content-Type` adequado para HTML com charset UTF-8;
+        - Usa o cache de templates compilados: o arquivo só é lido na primeira
+          vez (ou quando muda, com `TEMPLATES_RECARREGAR=1`);
+        - Define `Content-Type` adequado para HTML com charset UTF-8 e
+          comprime conforme `Accept-Encoding`;
         - Em caso de ausência do arquivo, responde com 404.
         """
         try:
-            templates_dir = self.resolve_templates_dir()
-            # Usa somente o nome do arquivo para evitar que subcaminhos escapem
-            safe_name = Path(filename).name
-            path = (templates_dir / safe_name).resolve()
-
-            if not path.is_file():
-                raise FileNotFoundError(path)
-
-            content = path.read_text(encoding='utf-8')
+            # Compilado e guardado em memória no primeiro uso (ver app.view.templates)
+            template = obter_templates().obter(filename, self.resolve_templates_dir())
+            # Templates sem variáveis são comprimidos uma única vez (memorizado)
+            with medir_etapa('renderizacao'):
+                corpo = template.renderizar()
+            content, codificacao = negociar(
+                corpo, HTML, self.headers.get('Accept-Encoding'),
+                memorizar=template.estatico is not None,
+            )
 
             self.send_response(200)
-            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Type', HTML)
+            self.send_header('Content-Length', str(len(content)))
+            self._send_codificacao(HTML, codificacao)
             self.end_headers()
-            self.wfile.write(content.encode('utf-8'))
+            self.wfile.write(content)
         except FileNotFoundError:
             self.send_error(404, 'Template não encontrado')
 
@@ -92,29 +135,115 @@ class BibliotecaMVCHandler(BaseHTTPRequestHandler):
 
         Rotas suportadas:
         - `/static/*`: arquivos estáticos;
-        - `/pesquisa?autor=...`: lista livros pelo autor (controller);
+        - `/pesquisa?autor=...[&apos_titulo=...&apos_isbn=...]`: página de
+          livros do autor (controller);
+        - `/livro/<isbn>`: dados de um livro pela chave primária;
+        - `/api/livros?autor=...&autor=...&isbn=...[&limite=N]`: vários
+          autores e ISBNs em uma única consulta, em JSON;
+        - `/api/autocomplete?q=...[&limite=N]`: autores e títulos que começam
+          com o prefixo (busca enquanto se digita), em JSON;
+        - `/exportar?formato=csv|jsonl[&autor=...]`: catálogo completo (ou
+          filtrado por autor) em streaming;
+        - `/metrics`: métricas do processo no formato texto do Prometheus;
+        - `/admin/consultas[?limpar=1]`: perfil das consultas do DAO (só com
+          `PERFIL_CONSULTAS=1`);
         - `/` ou `/index`: página inicial via template `index.html`.
         Outros caminhos retornam 404.
+
+        Cada requisição é contada por rota e status, com a latência total.
         """
+        inicio = time.perf_counter()
+        self._status = None
+        metricas = obter_metricas()
         parsed_path = urlparse(self.path)
+        rota = rota_metrica(parsed_path.path)
+        metricas.observar('biblioteca_etapa_segundos', time.perf_counter() - inicio, etapa='roteamento')
+        try:
+            self._rotear(parsed_path)
+        finally:
+            metricas.registrar_requisicao(rota, self._status or 0, time.perf_counter() - inicio)
+
+    def _rotear(self, parsed_path) -> None:
         path = parsed_path.path
 
+        if path == '/metrics':
+            self.respond(obter_metricas().exportar(), content_type=METRICAS_CONTENT_TYPE)
+            return
+
+        if path == '/admin/consultas':
+            from app.controller.admin_controller import relatorio_consultas  # type: ignore
+
+            limpar = parse_qs(parsed_path.query).get('limpar', ['0'])[0] == '1'
+            self.respond(relatorio_consultas(limpar), content_type=JSON)
+            return
+
         if path.startswith('/static/'):
             self.serve_static(path)
             return
 
         if path.startswith('/pesquisa'):
-            # Extrai o parâmetro `autor` (padrão vazio se ausente)
+            # Extrai o parâmetro `autor` (padrão vazio se ausente) e o cursor
+            # da página (`apos_titulo`/`apos_isbn`), presente a partir da 2ª
             query = parse_qs(parsed_path.query)
             autor = query.get('autor', [''])[0]
+            apos_titulo = query.get('apos_titulo', [None])[0]
+            apos_isbn = query.get('apos_isbn', [None])[0]
 
             # Import tardio para manter dependências locais ao ponto de uso
             from app.controller.livro_controller import listar_livro  # type: ignore
 
-            html = listar_livro(autor)
+            html = listar_livro(autor, apos_titulo, apos_isbn)
             self.respond(html)
             return
 
+        if path.startswith('/livro/'):
+            isbn = unquote(path[len('/livro/'):])
+            if not isbn or '/' in isbn:
+                self.send_error(404, 'Página não encontrada')
+                return
+
+            from app.controller.livro_controller import exibir_livro  # type: ignore
+
+            self.respond(exibir_livro(isbn))
+            return
+
+        if path == '/api/livros':
+            query = parse_qs(parsed_path.query)
+
+            from app.controller.livro_controller import buscar_livros_api  # type: ignore
+
+            resultado = buscar_livros_api(
+                query.get('autor', []), query.get('isbn', []), query.get('limite', [None])[0]
+            )
+            self.respond(resultado, content_type=JSON)
+            return
+
+        if path == '/api/autocomplete':
+            query = parse_qs(parsed_path.query)
+
+            from app.controller.livro_controller import autocompletar  # type: ignore
+
+            self.respond(
+                autocompletar(query.get('q', [''])[0], query.get('limite', [None])[0]),
+                content_type=JSON,
+            )
+            return
+
+        if path == '/exportar':
+            query = parse_qs(parsed_path.query)
+            autor = query.get('autor', [''])[0]
+            formato = query.get('formato', ['csv'])[0]
+
+            from app.controller.livro_controller import exportar_livros  # type: ignore
+
+            try:
+                content_type, blocos = exportar_livros(autor, formato)
+            except ValueError:
+                self.send_error(400, 'Formato de exportação inválido')
+                return
+            self.respond_stream(blocos, content_type, nome_arquivo=f'livros.{formato}')
+            return
+
         if path in ('/', '/index'):
             self.render_template('index.html')
             return
@@ -125,29 +254,56 @@ class BibliotecaMVCHandler(BaseHTTPRequestHandler):
     # Arquivos estáticos
     # ---------------------------------------------------------------------
     def serve_static(self, path: str) -> None:
-        """Serve arquivos estáticos de forma segura.
+        """Serve arquivos estáticos de forma segura e com cache HTTP.
 
         - Remove o prefixo `/static/` e resolve o caminho relativo dentro de
-          `STATIC_ROOT`;
-        - Garante que o caminho final esteja *dentro* de `STATIC_ROOT` para
-          evitar *path traversal* (ex.: `../../etc/passwd`);
-        - Detecta o MIME via `mimetypes.guess_type` e faz o streaming do arquivo.
+          `STATIC_ROOT`, sem permitir *path traversal* (ex.: `../../etc/passwd`);
+        - O conteúdo vem do cache em memória (`app.servidor.estaticos`), lido
+          do disco só no primeiro acesso; arquivos maiores que o orçamento do
+          cache são enviados do disco em blocos;
+        - Envia `ETag`, `Last-Modified` e `Cache-Control`, e responde 304 a
+          requisições condicionais (`If-None-Match`/`If-Modified-Since`);
+        - Arquivos textuais saem na variante gzip/deflate do recurso (comprimida
+          na primeira vez em que é pedida) quando o cliente aceita.
         """
-        # Remove o prefixo '/static/' e resolve o caminho relativo
-        rel = path[len('/static/'):] if path.startswith('/static/') else path
-        wanted = (STATIC_ROOT / rel).resolve()
-        root = STATIC_ROOT.resolve()
+        recurso = obter_estaticos().obter(path)
+        if recurso is None:
+            self.send_error(404, 'Arquivo estático não encontrado')
+            return
 
-        # Evita fuga do diretório estático e serve o arquivo
-        if wanted.is_file() and str(wanted).startswith(str(root)):
-            self.send_response(200)
-            mime, _ = mimetypes.guess_type(str(wanted))
-            self.send_header('Content-Type', mime or 'application/octet-stream')
+        corpo, codificacao, etag = recurso.representacao(self.headers.get('Accept-Encoding'))
+        if recurso.nao_modificado(self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since'), etag):
+            self.send_response(304)
+            self._send_validadores(recurso, etag)
             self.end_headers()
-            self.wfile.write(wanted.read_bytes())
             return
 
-        self.send_error(404, 'Arquivo estático não encontrado')
+        self.send_response(200)
+        self.send_header('Content-Type', recurso.tipo)
+        self.send_header('Content-Length', str(recurso.tamanho_arquivo if recurso.em_disco else len(corpo)))
+        if codificacao:
+            self.send_header('Content-Encoding', codificacao)
+        self._send_validadores(recurso, etag)
+        self.end_headers()
+        if recurso.em_disco:
+            for bloco in recurso.blocos():
+                self.wfile.write(bloco)
+        else:
+            self.wfile.write(corpo)
+
+    def _send_validadores(self, recurso, etag: str) -> None:
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', recurso.last_modified)
+        self.send_header('Cache-Control', CACHE_CONTROL)
+        if recurso.compressivel:
+            self.send_header('Vary', 'Accept-Encoding')
+
+    def _send_codificacao(self, content_type: str, codificacao: str | None) -> None:
+        """`Content-Encoding` da resposta e `Vary` para caches intermediários."""
+        if codificacao:
+            self.send_header('Content-Encoding', codificacao)
+        if compressivel(content_type):
+            self.send_header('Vary', 'Accept-Encoding')
 
     # ---------------------------------------------------------------------
     # Utilitário de resposta
@@ -172,6 +328,9 @@ class BibliotecaMVCHandler(BaseHTTPRequestHandler):
             Código HTTP quando `content` não for tupla.
         content_type:
             Cabeçalho `Content-Type` enviado quando o corpo é texto.
+
+        O corpo é comprimido (gzip/deflate) conforme `Accept-Encoding` quando
+        for textual e maior que `COMPRESSAO_MINIMO`.
         """
         # Concilia assinaturas flexíveis via tupla (html, status) ou (status, html)
         if isinstance(content, tuple):
@@ -189,16 +348,111 @@ class BibliotecaMVCHandler(BaseHTTPRequestHandler):
         if isinstance(content, str):
             content = content.encode('utf-8')
 
+        # Corpos textuais acima de COMPRESSAO_MINIMO saem comprimidos
+        content, codificacao = negociar(content, content_type, self.headers.get('Accept-Encoding'))
+
         self.send_response(status)
         self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self._send_codificacao(content_type, codificacao)
         self.end_headers()
         self.wfile.write(content)
 
+    def respond_stream(self, blocos, content_type: str, nome_arquivo: str | None = None) -> None:
+        """Envia um corpo gerado aos poucos, sem conhecer o tamanho total.
+
+        - Em HTTP/1.1 usa `Transfer-Encoding: chunked` (um chunk por bloco),
+          mantendo a conexão reutilizável; em HTTP/1.0 o fim do corpo é
+          sinalizado fechando a conexão;
+        - Comprime em streaming (gzip/deflate) conforme `Accept-Encoding`;
+        - Uma falha antes do primeiro bloco ainda vira 500; depois dos
+          cabeçalhos enviados, a conexão é fechada sem o chunk final, e o
+          cliente percebe a resposta incompleta.
+        """
+        blocos = iter(blocos)
+        try:
+            try:
+                primeiro = next(blocos, b'')
+            except Exception as e:
+                self.log_error('Falha ao iniciar streaming: %r', e)
+                self.send_error(500, 'Falha ao gerar a resposta')
+                return
+
+            codificacao = escolher_codificacao(self.headers.get('Accept-Encoding')) if compressivel(content_type) else None
+            comp = compressor(codificacao) if codificacao else None
+            chunked = self.request_version == 'HTTP/1.1'
+
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            if nome_arquivo:
+                self.send_header('Content-Disposition', f'attachment; filename="{nome_arquivo}"')
+            self._send_codificacao(content_type, codificacao)
+            if chunked:
+                self.send_header('Transfer-Encoding', 'chunked')
+            else:
+                self.send_header('Connection', 'close')
+            self.end_headers()
+
+            def escrever(dados: bytes) -> None:
+                if not dados:
+                    return  # chunk vazio encerraria o corpo
+                if chunked:
+                    self.wfile.write(b'%X\r\n%s\r\n' % (len(dados), dados))
+                else:
+                    self.wfile.write(dados)
+
+            try:
+                for bloco in itertools.chain((primeiro,), blocos):
+                    escrever(comp.compress(bloco) if comp else bloco)
+                if comp:
+                    escrever(comp.flush())
+                if chunked:
+                    self.wfile.write(b'0\r\n\r\n')
+            except Exception as e:
+                self.log_error('Streaming interrompido: %r', e)
+                self.close_connection = True
+        finally:
+            # Fecha o gerador (devolve a conexão ao pool) mesmo se o cliente sumiu
+            fechar = getattr(blocos, 'close', None)
+            if fechar is not None:
+                fechar()
+
+
+def main(argv=None) -> None:
+    """Ponto de entrada: lê as opções de linha de comando e sobe o servidor.
+
+    - `--workers N`: N processos (pre-fork) compartilhando o socket de escuta;
+    - `--threads M`: pool de M threads de atendimento por processo;
+    - `--assincrono`: servidor asyncio com keep-alive (ignora as opções acima).
+    Com ambos iguais a 1, o comportamento é o servidor de uma thread original.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Servidor HTTP do mvc-biblioteca.')
+    # Em contêineres, 0.0.0.0 permite aceitar conexões externas. Em ambiente
+    # local, use 127.0.0.1.
+    parser.add_argument('--host', default=os.getenv('SERVIDOR_HOST', '0.0.0.0'))
+    parser.add_argument('--porta', type=int, default=int(os.getenv('SERVIDOR_PORTA', '8080')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('SERVIDOR_WORKERS', '1')))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('SERVIDOR_THREADS', '1')))
+    parser.add_argument('--assincrono', action='store_true', help='usa o servidor asyncio')
+    args = parser.parse_args(argv)
+
+    if args.assincrono:
+        from app.servidor import assincrono
+
+        print(f'Servidor assíncrono rodando em http://localhost:{args.porta}')
+        assincrono.executar((args.host, args.porta))
+        return
+
+    from app.servidor.modos import executar
+
+    print(
+        f'Servidor rodando em http://localhost:{args.porta} '
+        f'(workers={args.workers}, threads={args.threads})'
+    )
+    executar((args.host, args.porta), BibliotecaMVCHandler, workers=args.workers, threads=args.threads)
+
 
 if __name__ == '__main__':
-    # Configuração do endereço/porta do servidor. Em contêineres, 0.0.0.0
-    # permite aceitar conexões externas. Em ambiente local, use 127.0.0.1.
-    server_address = ('0.0.0.0', 8080)
-    httpd = HTTPServer(server_address, BibliotecaMVCHandler)
-    print('Servidor rodando em http://localhost:8080')
-    httpd.serve_forever()
+    main()
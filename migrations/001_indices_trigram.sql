@@ -0,0 +1,19 @@
+-- Índices trigram (pg_trgm) para buscas por substring e similaridade.
+--
+-- Sem estes índices, `autor ILIKE '%...%'` faz varredura sequencial em
+-- biblioteca.livros. Com GIN + gin_trgm_ops, ILIKE/LIKE com pelo menos 3
+-- caracteres e os operadores `%`/similarity() passam a usar o índice.
+--
+-- Aplicar em bancos já existentes:
+--   psql -h localhost -U postgres -d mvc_biblioteca_db -f migrations/001_indices_trigram.sql
+-- (bancos novos já recebem os índices pelo init.sql)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+
+CREATE INDEX IF NOT EXISTS livros_autor_trgm_idx
+    ON biblioteca.livros USING gin (autor public.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS livros_titulo_trgm_idx
+    ON biblioteca.livros USING gin (titulo public.gin_trgm_ops);
+
+ANALYZE biblioteca.livros;
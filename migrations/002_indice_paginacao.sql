@@ -0,0 +1,8 @@
+-- Índice para a paginação por keyset de LivroDAO.pesquisar_por_autor_paginado
+-- e para o ORDER BY titulo, isbn do cursor de exportação.
+--
+-- Aplicar em bancos já existentes:
+--   psql -h localhost -U postgres -d mvc_biblioteca_db -f migrations/002_indice_paginacao.sql
+
+CREATE INDEX IF NOT EXISTS livros_titulo_isbn_idx
+    ON biblioteca.livros (titulo, isbn);
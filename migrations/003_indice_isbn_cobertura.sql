@@ -0,0 +1,24 @@
+-- Índice de cobertura para as buscas por ISBN (LivroDAO.buscar_por_isbn e
+-- buscar_por_isbns): com titulo e autor no INCLUDE, o Postgres responde com
+-- Index Only Scan, sem visitar a tabela (desde que o visibility map esteja
+-- em dia, ou seja, com autovacuum ativo).
+--
+-- O índice passa a ser a própria chave primária: um segundo índice único
+-- sobre isbn dobraria a manutenção de unicidade em cada escrita (inclusive
+-- na importação em massa). Custo restante: a chave primária guarda uma
+-- cópia de titulo/autor.
+--
+-- Aplicar em bancos já existentes:
+--   psql -h localhost -U postgres -d mvc_biblioteca_db -f migrations/003_indice_isbn_cobertura.sql
+
+BEGIN;
+
+CREATE UNIQUE INDEX IF NOT EXISTS livros_isbn_cobertura_idx
+    ON biblioteca.livros (isbn) INCLUDE (titulo, autor);
+
+-- Troca o índice da chave primária; o índice novo é renomeado para livros_pkey
+ALTER TABLE biblioteca.livros DROP CONSTRAINT IF EXISTS livros_pkey;
+ALTER TABLE biblioteca.livros
+    ADD CONSTRAINT livros_pkey PRIMARY KEY USING INDEX livros_isbn_cobertura_idx;
+
+COMMIT;
@@ -0,0 +1,52 @@
+-- Rastreio de alterações em biblioteca.livros, usado pelo backend de busca
+-- em memória (BUSCA_BACKEND=memoria, app/dao/indice_livros.py) para buscar
+-- apenas o que mudou desde a última atualização:
+--
+-- - livros.atualizado_em: preenchida na inserção (DEFAULT) e em todo UPDATE
+--   (gatilho livros_atualizado_em);
+-- - livros_removidos: um registro por livro apagado (gatilho livros_removido).
+--
+-- A tabela livros_removidos só cresce; registros antigos podem ser apagados
+-- periodicamente, desde que sejam mais velhos que INDICE_RECARGA:
+--   DELETE FROM biblioteca.livros_removidos WHERE removido_em < now() - interval '1 day';
+--
+-- Aplicar em bancos já existentes:
+--   psql -h localhost -U postgres -d mvc_biblioteca_db -f migrations/004_rastreio_alteracoes.sql
+
+ALTER TABLE biblioteca.livros
+    ADD COLUMN IF NOT EXISTS atualizado_em TIMESTAMPTZ NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS livros_atualizado_em_idx
+    ON biblioteca.livros (atualizado_em);
+
+CREATE TABLE IF NOT EXISTS biblioteca.livros_removidos (
+    isbn        VARCHAR(20) NOT NULL,
+    removido_em TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS livros_removidos_removido_em_idx
+    ON biblioteca.livros_removidos (removido_em);
+
+CREATE OR REPLACE FUNCTION biblioteca.marcar_livro_atualizado() RETURNS trigger AS $$
+BEGIN
+    NEW.atualizado_em := now();
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION biblioteca.registrar_livro_removido() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO biblioteca.livros_removidos (isbn) VALUES (OLD.isbn);
+    RETURN OLD;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS livros_atualizado_em ON biblioteca.livros;
+CREATE TRIGGER livros_atualizado_em
+    BEFORE UPDATE ON biblioteca.livros
+    FOR EACH ROW EXECUTE FUNCTION biblioteca.marcar_livro_atualizado();
+
+DROP TRIGGER IF EXISTS livros_removido ON biblioteca.livros;
+CREATE TRIGGER livros_removido
+    AFTER DELETE ON biblioteca.livros
+    FOR EACH ROW EXECUTE FUNCTION biblioteca.registrar_livro_removido();
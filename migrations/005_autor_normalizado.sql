@@ -0,0 +1,33 @@
+-- Busca por autor sem diferença de acentos, caixa ou espaços extras
+-- ("Gonçalves", "goncalves" e "GONÇALVES  " encontram os mesmos livros).
+--
+-- - biblioteca.normalizar_busca(texto): unaccent + lower + espaços
+--   colapsados. O unaccent() é STABLE (depende do dicionário); a função é
+--   declarada IMMUTABLE, com o dicionário fixo e qualificado pelo schema,
+--   para poder ser usada em coluna gerada e em índice;
+-- - livros.autor_normalizado: coluna gerada (STORED) com o autor
+--   normalizado, com índice GIN de trigramas para LIKE '%...%'.
+--
+-- O LivroDAO aplica a mesma função ao termo buscado:
+--   WHERE autor_normalizado LIKE '%' || biblioteca.normalizar_busca('Gonçalves') || '%'
+-- Com o termo constante, o Postgres calcula o padrão no planejamento e
+-- usa o índice livros_autor_normalizado_trgm_idx.
+--
+-- Aplicar em bancos já existentes (reescreve a tabela para preencher a
+-- coluna gerada):
+--   psql -h localhost -U postgres -d mvc_biblioteca_db -f migrations/005_autor_normalizado.sql
+
+CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA public;
+
+CREATE OR REPLACE FUNCTION biblioteca.normalizar_busca(texto text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$
+    SELECT btrim(regexp_replace(lower(public.unaccent('public.unaccent'::regdictionary, texto)), '\s+', ' ', 'g'))
+$$;
+
+ALTER TABLE biblioteca.livros
+    ADD COLUMN IF NOT EXISTS autor_normalizado TEXT
+    GENERATED ALWAYS AS (biblioteca.normalizar_busca(autor)) STORED;
+
+CREATE INDEX IF NOT EXISTS livros_autor_normalizado_trgm_idx
+    ON biblioteca.livros USING gin (autor_normalizado public.gin_trgm_ops);